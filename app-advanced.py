@@ -1,910 +1,9 @@
-from flask import Flask, request, jsonify, render_template
-from flask_cors import CORS
 import os
-import json
-import base64
-import hashlib
-from datetime import datetime, timedelta
-import random
-import string
-import numpy as np
-from io import BytesIO
-import threading
-import time
-import math
-from collections import deque
-import statistics
 
-app = Flask(__name__)
-CORS(app)
+from face_to_phone import create_app
 
-# Advanced AI Features without GPU requirements
-class AdvancedAIFeatures:
-    def __init__(self):
-        self.behavioral_patterns = {}
-        self.device_fingerprints = {}
-        self.transaction_graph = {}
-        self.risk_models = {}
-        
-    def analyze_behavioral_patterns(self, user_id, transaction_data):
-        """Advanced behavioral analysis using statistical models"""
-        if user_id not in self.behavioral_patterns:
-            self.behavioral_patterns[user_id] = {
-                'transaction_times': deque(maxlen=50),
-                'amounts': deque(maxlen=50),
-                'locations': deque(maxlen=50),
-                'device_types': deque(maxlen=50),
-                'session_patterns': deque(maxlen=50)
-            }
-        
-        patterns = self.behavioral_patterns[user_id]
-        current_time = datetime.now()
-        
-        # Add current transaction data
-        patterns['transaction_times'].append(current_time.hour)
-        patterns['amounts'].append(transaction_data.get('amount', 0))
-        
-        # Calculate behavioral anomalies
-        anomalies = []
-        
-        # Time pattern analysis
-        if len(patterns['transaction_times']) > 5:
-            time_std = statistics.stdev(patterns['transaction_times'])
-            current_time_deviation = abs(current_time.hour - statistics.mean(patterns['transaction_times']))
-            if current_time_deviation > 2 * time_std:
-                anomalies.append("Unusual transaction time pattern")
-        
-        # Amount pattern analysis
-        if len(patterns['amounts']) > 5:
-            amount_mean = statistics.mean(patterns['amounts'])
-            amount_std = statistics.stdev(patterns['amounts'])
-            current_amount = transaction_data.get('amount', 0)
-            if abs(current_amount - amount_mean) > 2 * amount_std:
-                anomalies.append("Unusual transaction amount pattern")
-        
-        return {
-            'anomalies': anomalies,
-            'confidence': len(anomalies) / 5.0,  # Normalize to 0-1
-            'pattern_stability': self.calculate_pattern_stability(patterns)
-        }
-    
-    def calculate_pattern_stability(self, patterns):
-        """Calculate how stable user patterns are"""
-        stability_scores = []
-        
-        for pattern_name, pattern_data in patterns.items():
-            if len(pattern_data) > 3:
-                if pattern_name in ['transaction_times', 'amounts']:
-                    # For numerical data, calculate coefficient of variation
-                    mean_val = statistics.mean(pattern_data)
-                    std_val = statistics.stdev(pattern_data)
-                    cv = std_val / mean_val if mean_val > 0 else 0
-                    stability_scores.append(1 - min(cv, 1))  # Lower CV = higher stability
-                else:
-                    # For categorical data, calculate entropy
-                    value_counts = {}
-                    for val in pattern_data:
-                        value_counts[val] = value_counts.get(val, 0) + 1
-                    
-                    entropy = 0
-                    total = len(pattern_data)
-                    for count in value_counts.values():
-                        p = count / total
-                        entropy -= p * math.log2(p) if p > 0 else 0
-                    
-                    max_entropy = math.log2(len(value_counts)) if len(value_counts) > 1 else 1
-                    stability_scores.append(1 - (entropy / max_entropy))
-        
-        return statistics.mean(stability_scores) if stability_scores else 0.5
-    
-    def generate_device_fingerprint(self, request_data):
-        """Generate unique device fingerprint for fraud detection"""
-        fingerprint_data = {
-            'user_agent': request.headers.get('User-Agent', ''),
-            'accept_language': request.headers.get('Accept-Language', ''),
-            'screen_resolution': request_data.get('screen_resolution', ''),
-            'timezone': request_data.get('timezone', ''),
-            'platform': request_data.get('platform', ''),
-            'browser': request_data.get('browser', '')
-        }
-        
-        fingerprint_string = json.dumps(fingerprint_data, sort_keys=True)
-        fingerprint_hash = hashlib.sha256(fingerprint_string.encode()).hexdigest()
-        
-        return {
-            'fingerprint': fingerprint_hash,
-            'confidence': 0.95,  # High confidence for device fingerprinting
-            'risk_factors': self.analyze_device_risk(fingerprint_data)
-        }
-    
-    def analyze_device_risk(self, fingerprint_data):
-        """Analyze device-specific risk factors"""
-        risk_factors = []
-        
-        # Check for suspicious user agents
-        user_agent = fingerprint_data.get('user_agent', '').lower()
-        if 'bot' in user_agent or 'crawler' in user_agent:
-            risk_factors.append("Suspicious user agent detected")
-        
-        # Check for unusual screen resolutions
-        screen_res = fingerprint_data.get('screen_resolution', '')
-        if screen_res and 'x' in screen_res:
-            try:
-                width, height = map(int, screen_res.split('x'))
-                if width < 800 or height < 600:
-                    risk_factors.append("Unusual screen resolution")
-            except:
-                pass
-        
-        return risk_factors
-    
-    def build_transaction_graph(self, user_id, transaction_data):
-        """Build transaction relationship graph for network analysis"""
-        if user_id not in self.transaction_graph:
-            self.transaction_graph[user_id] = {
-                'nodes': set(),
-                'edges': [],
-                'clusters': {}
-            }
-        
-        graph = self.transaction_graph[user_id]
-        
-        # Add transaction as node
-        transaction_id = transaction_data.get('id', '')
-        graph['nodes'].add(transaction_id)
-        
-        # Add relationships (simplified for demo)
-        recipient = transaction_data.get('recipient', '')
-        if recipient:
-            graph['nodes'].add(recipient)
-            graph['edges'].append((transaction_id, recipient))
-        
-        # Detect suspicious patterns
-        suspicious_patterns = self.detect_graph_patterns(graph)
-        
-        return {
-            'node_count': len(graph['nodes']),
-            'edge_count': len(graph['edges']),
-            'suspicious_patterns': suspicious_patterns,
-            'network_risk': len(suspicious_patterns) * 0.2
-        }
-    
-    def detect_graph_patterns(self, graph):
-        """Detect suspicious patterns in transaction graph"""
-        patterns = []
-        
-        # Check for high-degree nodes (money mules)
-        node_degrees = {}
-        for edge in graph['edges']:
-            node_degrees[edge[0]] = node_degrees.get(edge[0], 0) + 1
-            node_degrees[edge[1]] = node_degrees.get(edge[1], 0) + 1
-        
-        for node, degree in node_degrees.items():
-            if degree > 10:  # Threshold for suspicious activity
-                patterns.append(f"High-degree node detected: {node}")
-        
-        return patterns
-
-class LightweightBiometricAuth:
-    def __init__(self):
-        self.face_templates = {}
-        self.voice_templates = {}
-        self.pin_storage = {}
-        
-    def enroll_face(self, user_id, image_data):
-        """Lightweight face enrollment using basic image analysis"""
-        try:
-            # Decode base64 image
-            image_bytes = base64.b64decode(image_data.split(',')[1])
-            
-            # Create a simple "face template" based on image properties
-            # In a real implementation, this would use proper face recognition
-            image_hash = hashlib.sha256(image_bytes).hexdigest()
-            image_size = len(image_bytes)
-            
-            # Store basic image characteristics as "face template"
-            template = {
-                'hash': image_hash,
-                'size': image_size,
-                'timestamp': datetime.now(),
-                'quality_score': self.calculate_image_quality(image_bytes)
-            }
-            
-            self.face_templates[user_id] = template
-            
-            return {
-                "status": "success", 
-                "message": f"Face enrolled successfully! Quality score: {template['quality_score']:.1f}%",
-                "template_id": image_hash[:8]
-            }
-            
-        except Exception as e:
-            return {"status": "error", "message": f"Face enrollment failed: {str(e)}"}
-    
-    def verify_face(self, user_id, image_data):
-        """Lightweight face verification"""
-        try:
-            if user_id not in self.face_templates:
-                return {"status": "error", "message": "User not enrolled"}
-            
-            # Decode and analyze new image
-            image_bytes = base64.b64decode(image_data.split(',')[1])
-            new_hash = hashlib.sha256(image_bytes).hexdigest()
-            new_size = len(image_bytes)
-            
-            stored_template = self.face_templates[user_id]
-            
-            # Simple similarity check (in real implementation, use proper face comparison)
-            hash_similarity = self.calculate_hash_similarity(stored_template['hash'], new_hash)
-            size_similarity = 1 - abs(stored_template['size'] - new_size) / max(stored_template['size'], new_size)
-            
-            # Combine similarities
-            overall_similarity = (hash_similarity * 0.7 + size_similarity * 0.3) * 100
-            
-            # Add some randomness to simulate real biometric matching
-            confidence_adjustment = random.uniform(-5, 5)
-            final_confidence = max(0, min(100, overall_similarity + confidence_adjustment))
-            
-            if final_confidence > 75:  # Threshold for verification
-                return {
-                    "status": "success",
-                    "verified": True,
-                    "confidence": round(final_confidence, 2),
-                    "message": f"Face verified with {final_confidence:.1f}% confidence"
-                }
-            else:
-                return {
-                    "status": "success",
-                    "verified": False,
-                    "confidence": round(final_confidence, 2),
-                    "message": f"Face verification failed - confidence too low ({final_confidence:.1f}%)"
-                }
-                
-        except Exception as e:
-            return {"status": "error", "message": f"Face verification failed: {str(e)}"}
-    
-    def enroll_voice(self, user_id, audio_data):
-        """Lightweight voice enrollment using audio analysis"""
-        try:
-            # Decode base64 audio
-            audio_bytes = base64.b64decode(audio_data)
-            
-            # Create simple voice template based on audio properties
-            audio_hash = hashlib.sha256(audio_bytes).hexdigest()
-            audio_size = len(audio_bytes)
-            
-            # Simulate audio feature extraction
-            template = {
-                'hash': audio_hash,
-                'size': audio_size,
-                'timestamp': datetime.now(),
-                'duration_estimate': audio_size / 16000,  # Rough estimate
-                'quality_score': self.calculate_audio_quality(audio_bytes)
-            }
-            
-            self.voice_templates[user_id] = template
-            
-            return {
-                "status": "success",
-                "message": f"Voice enrolled successfully! Quality score: {template['quality_score']:.1f}%",
-                "template_id": audio_hash[:8]
-            }
-            
-        except Exception as e:
-            return {"status": "error", "message": f"Voice enrollment failed: {str(e)}"}
-    
-    def verify_voice(self, user_id, audio_data):
-        """Lightweight voice verification"""
-        try:
-            if user_id not in self.voice_templates:
-                return {"status": "error", "message": "User not enrolled"}
-            
-            # Decode and analyze new audio
-            audio_bytes = base64.b64decode(audio_data)
-            new_hash = hashlib.sha256(audio_bytes).hexdigest()
-            new_size = len(audio_bytes)
-            
-            stored_template = self.voice_templates[user_id]
-            
-            # Simple similarity check
-            hash_similarity = self.calculate_hash_similarity(stored_template['hash'], new_hash)
-            size_similarity = 1 - abs(stored_template['size'] - new_size) / max(stored_template['size'], new_size)
-            
-            # Combine similarities
-            overall_similarity = (hash_similarity * 0.6 + size_similarity * 0.4) * 100
-            
-            # Add randomness for realistic simulation
-            confidence_adjustment = random.uniform(-8, 8)
-            final_confidence = max(0, min(100, overall_similarity + confidence_adjustment))
-            
-            if final_confidence > 70:  # Threshold for voice verification
-                return {
-                    "status": "success",
-                    "verified": True,
-                    "confidence": round(final_confidence, 2),
-                    "message": f"Voice verified with {final_confidence:.1f}% confidence"
-                }
-            else:
-                return {
-                    "status": "success",
-                    "verified": False,
-                    "confidence": round(final_confidence, 2),
-                    "message": f"Voice verification failed - confidence too low ({final_confidence:.1f}%)"
-                }
-                
-        except Exception as e:
-            return {"status": "error", "message": f"Voice verification failed: {str(e)}"}
-    
-    def calculate_image_quality(self, image_bytes):
-        """Calculate image quality score"""
-        # Simple quality estimation based on file size and basic properties
-        size_score = min(100, len(image_bytes) / 1000)  # Normalize by size
-        return min(100, size_score + random.uniform(-10, 10))
-    
-    def calculate_audio_quality(self, audio_bytes):
-        """Calculate audio quality score"""
-        # Simple quality estimation
-        size_score = min(100, len(audio_bytes) / 500)  # Normalize by size
-        return min(100, size_score + random.uniform(-5, 5))
-    
-    def calculate_hash_similarity(self, hash1, hash2):
-        """Calculate similarity between two hashes"""
-        # Simple hamming distance calculation
-        distance = sum(c1 != c2 for c1, c2 in zip(hash1, hash2))
-        max_distance = len(hash1)
-        similarity = 1 - (distance / max_distance)
-        return similarity
-
-class AdvancedFraudDetector:
-    def __init__(self):
-        self.transaction_history = deque(maxlen=1000)
-        self.user_profiles = {}
-        self.risk_models = {}
-        
-    def analyze_transaction(self, transaction_data):
-        """Advanced fraud detection using multiple AI techniques"""
-        try:
-            # Extract comprehensive features
-            features = self.extract_advanced_features(transaction_data)
-            
-            # Multiple detection methods
-            ml_score = self.machine_learning_detection(features)
-            behavioral_score = self.behavioral_analysis(features)
-            network_score = self.network_analysis(features)
-            temporal_score = self.temporal_analysis(features)
-            
-            # Ensemble scoring
-            final_score = self.ensemble_scoring([ml_score, behavioral_score, network_score, temporal_score])
-            
-            # Determine fraud status
-            is_fraud = final_score > 0.6
-            risk_level = self.get_risk_level(final_score)
-            
-            return {
-                "is_fraud": is_fraud,
-                "risk_score": round(final_score, 3),
-                "risk_level": risk_level,
-                "reason": self.generate_fraud_reason(features, final_score),
-                "confidence": self.calculate_confidence(features),
-                "detection_methods": {
-                    "ml_score": round(ml_score, 3),
-                    "behavioral_score": round(behavioral_score, 3),
-                    "network_score": round(network_score, 3),
-                    "temporal_score": round(temporal_score, 3)
-                }
-            }
-            
-        except Exception as e:
-            return {"is_fraud": False, "risk_score": 0, "risk_level": "low", "reason": "Analysis error"}
-    
-    def extract_advanced_features(self, transaction):
-        """Extract comprehensive features for fraud detection"""
-        amount = transaction.get('amount', 0)
-        current_time = datetime.now()
-        
-        # Time-based features
-        hour = current_time.hour
-        day_of_week = current_time.weekday()
-        is_weekend = day_of_week >= 5
-        is_night = hour < 6 or hour > 22
-        
-        # Amount-based features
-        amount_log = math.log(amount + 1) if amount > 0 else 0
-        
-        # Historical features
-        recent_transactions = [t for t in self.transaction_history if 
-                             (current_time - t.get('timestamp', current_time)).total_seconds() < 3600]
-        
-        avg_amount = statistics.mean([t.get('amount', 0) for t in recent_transactions[-10:]]) if recent_transactions else amount
-        amount_ratio = amount / avg_amount if avg_amount > 0 else 1
-        
-        # Frequency features
-        transaction_frequency = len(recent_transactions)
-        
-        # Velocity features
-        time_since_last = 3600  # Default 1 hour
-        if self.transaction_history:
-            last_transaction = self.transaction_history[-1]
-            time_since_last = (current_time - last_transaction.get('timestamp', current_time)).total_seconds()
-        
-        return {
-            'amount': amount,
-            'amount_log': amount_log,
-            'hour': hour,
-            'day_of_week': day_of_week,
-            'is_weekend': is_weekend,
-            'is_night': is_night,
-            'amount_ratio': amount_ratio,
-            'transaction_frequency': transaction_frequency,
-            'time_since_last': time_since_last,
-            'avg_amount': avg_amount
-        }
-    
-    def machine_learning_detection(self, features):
-        """Simulate machine learning fraud detection"""
-        # Simplified ML-like scoring
-        score = 0
-        
-        # Amount-based scoring
-        if features['amount'] > 10000:
-            score += 0.3
-        elif features['amount'] > 5000:
-            score += 0.2
-        
-        # Time-based scoring
-        if features['is_night']:
-            score += 0.2
-        if features['is_weekend']:
-            score += 0.1
-        
-        # Frequency-based scoring
-        if features['transaction_frequency'] > 5:
-            score += 0.3
-        elif features['transaction_frequency'] > 2:
-            score += 0.1
-        
-        # Velocity-based scoring
-        if features['time_since_last'] < 60:  # Less than 1 minute
-            score += 0.4
-        elif features['time_since_last'] < 300:  # Less than 5 minutes
-            score += 0.2
-        
-        # Amount ratio scoring
-        if features['amount_ratio'] > 5:
-            score += 0.3
-        elif features['amount_ratio'] > 2:
-            score += 0.1
-        
-        return min(1.0, score)
-    
-    def behavioral_analysis(self, features):
-        """Behavioral pattern analysis"""
-        # Simulate behavioral analysis
-        score = 0
-        
-        # Check for unusual patterns
-        if features['hour'] not in range(8, 18):  # Outside business hours
-            score += 0.2
-        
-        if features['amount_ratio'] > 3:  # Significantly different from usual
-            score += 0.3
-        
-        if features['transaction_frequency'] > 3:  # High frequency
-            score += 0.2
-        
-        return min(1.0, score)
-    
-    def network_analysis(self, features):
-        """Network-based fraud detection"""
-        # Simulate network analysis
-        score = 0
-        
-        # Check for suspicious network patterns
-        if features['transaction_frequency'] > 10:  # Very high frequency
-            score += 0.4
-        
-        if features['time_since_last'] < 30:  # Very rapid succession
-            score += 0.3
-        
-        return min(1.0, score)
-    
-    def temporal_analysis(self, features):
-        """Temporal pattern analysis"""
-        score = 0
-        
-        # Time-based risk factors
-        if features['is_night']:
-            score += 0.3
-        
-        if features['is_weekend']:
-            score += 0.1
-        
-        # Check for unusual timing patterns
-        if features['hour'] in [0, 1, 2, 3, 4, 5]:  # Very early morning
-            score += 0.2
-        
-        return min(1.0, score)
-    
-    def ensemble_scoring(self, scores):
-        """Combine multiple detection scores"""
-        # Weighted ensemble
-        weights = [0.3, 0.25, 0.25, 0.2]  # ML, Behavioral, Network, Temporal
-        weighted_score = sum(score * weight for score, weight in zip(scores, weights))
-        
-        # Add some randomness for realistic simulation
-        noise = random.uniform(-0.05, 0.05)
-        final_score = max(0, min(1, weighted_score + noise))
-        
-        return final_score
-    
-    def get_risk_level(self, score):
-        """Convert score to risk level"""
-        if score > 0.8:
-            return "critical"
-        elif score > 0.6:
-            return "high"
-        elif score > 0.4:
-            return "medium"
-        else:
-            return "low"
-    
-    def generate_fraud_reason(self, features, score):
-        """Generate human-readable fraud reason"""
-        reasons = []
-        
-        if features['amount'] > 10000:
-            reasons.append("Unusually large transaction amount")
-        
-        if features['is_night']:
-            reasons.append("Transaction at unusual time")
-        
-        if features['transaction_frequency'] > 5:
-            reasons.append("High transaction frequency")
-        
-        if features['time_since_last'] < 60:
-            reasons.append("Rapid succession of transactions")
-        
-        if features['amount_ratio'] > 5:
-            reasons.append("Amount significantly higher than average")
-        
-        if score > 0.8:
-            reasons.append("Multiple suspicious patterns detected")
-        
-        return "; ".join(reasons) if reasons else "Transaction appears normal"
-    
-    def calculate_confidence(self, features):
-        """Calculate confidence in fraud detection"""
-        # Base confidence on data availability and pattern strength
-        confidence = 0.7  # Base confidence
-        
-        # Increase confidence with more data
-        if features['transaction_frequency'] > 0:
-            confidence += 0.1
-        
-        # Increase confidence with stronger patterns
-        if features['amount_ratio'] > 2:
-            confidence += 0.1
-        
-        if features['transaction_frequency'] > 3:
-            confidence += 0.1
-        
-        return min(0.95, confidence)
-
-# Initialize components
-ai_features = AdvancedAIFeatures()
-biometric_auth = LightweightBiometricAuth()
-fraud_detector = AdvancedFraudDetector()
-
-# Global storage for demo
-transaction_history = []
-fraud_alerts = []
-user_profiles = {}
-
-@app.route('/')
-def index():
-    return render_template('index.html')
-
-@app.route('/api/get-enrollment-status', methods=['GET'])
-def get_enrollment_status():
-    """Get enrollment status for all biometric methods"""
-    user_id = request.args.get('user_id', 'demo_user')
-    
-    return jsonify({
-        'face_enrolled': user_id in biometric_auth.face_templates,
-        'voice_enrolled': user_id in biometric_auth.voice_templates,
-        'pin_set': user_id in biometric_auth.pin_storage
-    })
-
-@app.route('/api/enroll-face', methods=['POST'])
-def enroll_face():
-    data = request.json
-    user_id = data.get('user_id', 'demo_user')
-    image_data = data.get('image_data')
-    
-    if not image_data:
-        return jsonify({"status": "error", "message": "No image data provided"})
-    
-    result = biometric_auth.enroll_face(user_id, image_data)
-    
-    # Add device fingerprinting
-    device_info = ai_features.generate_device_fingerprint(data)
-    result['device_fingerprint'] = device_info
-    
-    return jsonify(result)
-
-@app.route('/api/verify-face', methods=['POST'])
-def verify_face():
-    data = request.json
-    user_id = data.get('user_id', 'demo_user')
-    image_data = data.get('image_data')
-    
-    if not image_data:
-        return jsonify({"status": "error", "message": "No image data provided"})
-    
-    result = biometric_auth.verify_face(user_id, image_data)
-    
-    # Add behavioral analysis
-    behavioral_analysis = ai_features.analyze_behavioral_patterns(user_id, data)
-    result['behavioral_analysis'] = behavioral_analysis
-    
-    return jsonify(result)
-
-@app.route('/api/enroll-voice', methods=['POST'])
-def enroll_voice():
-    data = request.json
-    user_id = data.get('user_id', 'demo_user')
-    audio_data = data.get('audio_data')
-    
-    if not audio_data:
-        return jsonify({"status": "error", "message": "No audio data provided"})
-    
-    result = biometric_auth.enroll_voice(user_id, audio_data)
-    
-    # Add device fingerprinting
-    device_info = ai_features.generate_device_fingerprint(data)
-    result['device_fingerprint'] = device_info
-    
-    return jsonify(result)
-
-@app.route('/api/verify-voice', methods=['POST'])
-def verify_voice():
-    data = request.json
-    user_id = data.get('user_id', 'demo_user')
-    audio_data = data.get('audio_data')
-    
-    if not audio_data:
-        return jsonify({"status": "error", "message": "No audio data provided"})
-    
-    result = biometric_auth.verify_voice(user_id, audio_data)
-    
-    # Add behavioral analysis
-    behavioral_analysis = ai_features.analyze_behavioral_patterns(user_id, data)
-    result['behavioral_analysis'] = behavioral_analysis
-    
-    return jsonify(result)
-
-@app.route('/api/setup-pin', methods=['POST'])
-def setup_pin():
-    data = request.json
-    pin = data.get('pin')
-    user_id = data.get('user_id', 'demo_user')
-    
-    if not pin or len(pin) != 4:
-        return jsonify({"status": "error", "message": "PIN must be 4 digits"})
-    
-    # Hash the PIN for security
-    pin_hash = hashlib.sha256(pin.encode()).hexdigest()
-    biometric_auth.pin_storage[user_id] = pin_hash
-    
-    return jsonify({
-        'status': 'success',
-        'message': 'PIN set successfully'
-    })
-
-@app.route('/api/verify-pin', methods=['POST'])
-def verify_pin():
-    data = request.json
-    pin = data.get('pin')
-    user_id = data.get('user_id', 'demo_user')
-    
-    if not pin:
-        return jsonify({"status": "error", "message": "No PIN provided"})
-    
-    if user_id not in biometric_auth.pin_storage:
-        return jsonify({"status": "error", "message": "PIN not set for user"})
-    
-    # Verify PIN
-    pin_hash = hashlib.sha256(pin.encode()).hexdigest()
-    stored_hash = biometric_auth.pin_storage[user_id]
-    
-    if pin_hash == stored_hash:
-        return jsonify({
-            'status': 'success',
-            'verified': True,
-            'message': 'PIN verified successfully'
-        })
-    else:
-        return jsonify({
-            'status': 'success',
-            'verified': False,
-            'message': 'Invalid PIN - possible fraud attempt'
-        })
-
-@app.route('/api/process-transaction', methods=['POST'])
-def process_transaction():
-    data = request.json
-    user_id = data.get('user_id', 'demo_user')
-    amount = data.get('amount', 0)
-    transaction_type = data.get('type', 'transfer')
-    
-    # Create transaction record
-    transaction = {
-        'id': ''.join(random.choices(string.ascii_uppercase + string.digits, k=8)),
-        'user_id': user_id,
-        'amount': amount,
-        'type': transaction_type,
-        'timestamp': datetime.now(),
-        'status': 'pending'
-    }
-    
-    # Advanced fraud detection
-    fraud_analysis = fraud_detector.analyze_transaction(transaction)
-    
-    # Add to history
-    transaction_history.append(transaction)
-    fraud_detector.transaction_history.append(transaction)
-    
-    # Generate response
-    response = {
-        'transaction_id': transaction['id'],
-        'fraud_analysis': fraud_analysis,
-        'timestamp': transaction['timestamp'].isoformat()
-    }
-    
-    # Log fraud alerts
-    if fraud_analysis['is_fraud']:
-        alert = {
-            'id': ''.join(random.choices(string.ascii_uppercase + string.digits, k=6)),
-            'transaction_id': transaction['id'],
-            'user_id': user_id,
-            'reason': fraud_analysis['reason'],
-            'risk_level': fraud_analysis['risk_level'],
-            'timestamp': datetime.now(),
-            'status': 'active',
-            'confidence': fraud_analysis.get('confidence', 0.8)
-        }
-        fraud_alerts.append(alert)
-        response['alert'] = alert
-    
-    return jsonify(response)
-
-@app.route('/api/get-alerts', methods=['GET'])
-def get_alerts():
-    return jsonify({
-        'alerts': fraud_alerts[-10:],  # Last 10 alerts
-        'total_count': len(fraud_alerts)
-    })
-
-@app.route('/api/get-transactions', methods=['GET'])
-def get_transactions():
-    return jsonify({
-        'transactions': transaction_history[-20:],  # Last 20 transactions
-        'total_count': len(transaction_history)
-    })
-
-@app.route('/api/simulate-fraud', methods=['POST'])
-def simulate_fraud():
-    """Simulate various fraud scenarios for demo"""
-    data = request.json
-    scenario = data.get('scenario', 'large_transaction')
-    
-    fraud_scenarios = {
-        'large_transaction': {
-            'amount': 50000,
-            'type': 'transfer',
-            'description': 'Simulating unusually large transaction'
-        },
-        'rapid_transactions': {
-            'amount': 1000,
-            'type': 'transfer',
-            'description': 'Simulating rapid succession of transactions'
-        },
-        'unusual_time': {
-            'amount': 2000,
-            'type': 'transfer',
-            'description': 'Simulating transaction at unusual time'
-        }
-    }
-    
-    scenario_data = fraud_scenarios.get(scenario, fraud_scenarios['large_transaction'])
-    
-    # Process the fraudulent transaction
-    transaction = {
-        'id': ''.join(random.choices(string.ascii_uppercase + string.digits, k=8)),
-        'user_id': 'fraud_user',
-        'amount': scenario_data['amount'],
-        'type': scenario_data['type'],
-        'timestamp': datetime.now(),
-        'status': 'pending'
-    }
-    
-    fraud_analysis = fraud_detector.analyze_transaction(transaction)
-    transaction_history.append(transaction)
-    fraud_detector.transaction_history.append(transaction)
-    
-    response = {
-        'scenario': scenario,
-        'description': scenario_data['description'],
-        'transaction_id': transaction['id'],
-        'fraud_analysis': fraud_analysis,
-        'timestamp': transaction['timestamp'].isoformat()
-    }
-    
-    if fraud_analysis['is_fraud']:
-        alert = {
-            'id': ''.join(random.choices(string.ascii_uppercase + string.digits, k=6)),
-            'transaction_id': transaction['id'],
-            'user_id': 'fraud_user',
-            'reason': fraud_analysis['reason'],
-            'risk_level': fraud_analysis['risk_level'],
-            'timestamp': datetime.now(),
-            'status': 'active',
-            'confidence': fraud_analysis.get('confidence', 0.8)
-        }
-        fraud_alerts.append(alert)
-        response['alert'] = alert
-    
-    return jsonify(response)
-
-@app.route('/api/get-ai-insights', methods=['GET'])
-def get_ai_insights():
-    """Get AI-powered insights and analytics"""
-    user_id = request.args.get('user_id', 'demo_user')
-    
-    # Generate insights based on transaction history
-    insights = {
-        'fraud_trends': {
-            'total_fraud_attempts': len([a for a in fraud_alerts if a['status'] == 'active']),
-            'fraud_rate_today': len([a for a in fraud_alerts if 
-                                   (datetime.now() - a['timestamp']).days == 0]) / max(1, len(transaction_history)),
-            'most_common_fraud_type': 'Large transactions' if len(transaction_history) > 0 else 'None detected'
-        },
-        'user_behavior': {
-            'transaction_frequency': len([t for t in transaction_history if t['user_id'] == user_id]),
-            'average_amount': statistics.mean([t['amount'] for t in transaction_history if t['user_id'] == user_id]) if transaction_history else 0,
-            'risk_score': 0.2  # Simulated risk score
-        },
-        'system_performance': {
-            'detection_accuracy': 98.5,
-            'false_positive_rate': 1.2,
-            'average_detection_time': 0.15
-        }
-    }
-    
-    return jsonify(insights)
-
-@app.route('/api/get-advanced-analytics', methods=['GET'])
-def get_advanced_analytics():
-    """Get advanced analytics and predictions"""
-    analytics = {
-        'predictive_insights': {
-            'fraud_probability_next_hour': random.uniform(0.1, 0.3),
-            'expected_transaction_volume': len(transaction_history) + random.randint(5, 15),
-            'risk_hotspots': ['Large transactions', 'Night-time activity', 'Rapid succession']
-        },
-        'network_analysis': {
-            'suspicious_clusters': len(ai_features.transaction_graph),
-            'money_flow_patterns': 'Normal' if len(transaction_history) < 10 else 'Suspicious',
-            'connection_strength': random.uniform(0.3, 0.8)
-        },
-        'behavioral_analysis': {
-            'pattern_stability': random.uniform(0.6, 0.9),
-            'anomaly_detection_rate': random.uniform(0.05, 0.15),
-            'user_trust_score': random.uniform(0.7, 0.95)
-        }
-    }
-    
-    return jsonify(analytics)
+# Kept for existing start scripts; equivalent to DETECTOR = advanced in config.ini
+app = create_app(engine='advanced', biometrics='lightweight')
 
 if __name__ == '__main__':
     # Create necessary directories
@@ -0,0 +1,6 @@
+"""
+Face-to-Phone shared core
+One application factory with pluggable fraud detector engines
+"""
+
+from face_to_phone.factory import create_app
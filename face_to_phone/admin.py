@@ -0,0 +1,115 @@
+"""
+Admin endpoints for inspecting and live-reloading settings
+When ADMIN_TOKEN is set, requests must send it in the X-Admin-Token header;
+without one, only requests from the local machine are served, and only
+when no reverse proxy is involved (a local proxy makes every client look
+local).
+"""
+
+import hmac
+import ipaddress
+
+from flask import request, jsonify
+
+from face_to_phone.clock import parse_timestamp
+from face_to_phone.settings import SettingsError
+
+
+def register_admin_routes(app, state):
+    """Register /api/admin/* on a Flask app"""
+    
+    def authorized():
+        token = state.settings.admin_token
+        if not token:
+            return not state.settings.proxy_hops and not is_forwarded() and is_loopback(request.remote_addr)
+        return hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token)
+    
+    @app.route('/api/admin/settings', methods=['GET'])
+    def get_settings():
+        if not authorized():
+            return jsonify({"status": "error", "message": "Invalid admin token"}), 403
+        
+        return jsonify({
+            "status": "success",
+            "config_path": state.settings.config_path,
+            "settings": state.settings.as_dict()
+        })
+    
+    @app.route('/api/admin/cache', methods=['GET'])
+    def get_cache_stats():
+        if not authorized():
+            return jsonify({"status": "error", "message": "Invalid admin token"}), 403
+        
+        return jsonify({
+            "status": "success",
+            "result_cache": state.result_cache.stats(),
+            "scoring": {"timeouts": state.scoring_timeouts},
+            "device_index": state.device_index.stats(),
+            "sketches": state.sketches.stats(),
+            "biometric_pool": dict(state.biometric_pool.stats(), face_batches=state.face_verifier.stats(),
+                                   voice_batches=state.voice_verifier.stats()),
+            "pin_credentials": state.biometric_auth.pins.stats(),
+            "verification_sessions": state.sessions.stats(),
+            "idempotency": state.idempotency.stats(),
+            "traffic": state.traffic.stats(),
+            "online_model": state.engine.model_stats(),
+            "labels": state.labels.stats(),
+            "profiles": state.profiles.stats(),
+            "storage": state.storage.stats()
+        })
+    
+    @app.route('/api/admin/archive', methods=['GET'])
+    def get_archive_summary():
+        """Totals, per-type and per-hour figures scanned from the transaction archive"""
+        if not authorized():
+            return jsonify({"status": "error", "message": "Invalid admin token"}), 403
+        if state.archive is None:
+            return jsonify({"status": "error", "message": "Transaction archive is disabled (set ARCHIVE_DIR)"}), 404
+        
+        try:
+            since, until = (parse_timestamp(request.args[name]) if request.args.get(name) else None
+                            for name in ('since', 'until'))
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({"status": "error", "message": "since/until must be ISO 8601 or epoch seconds/milliseconds"}), 400
+        
+        try:
+            summary = state.archive.summary(since, until)
+        except ImportError:
+            return jsonify({"status": "error", "message": "Archive analytics need NumPy"}), 501
+        
+        return jsonify({
+            "status": "success",
+            "archive": state.archive.stats(),
+            "summary": summary
+        })
+    
+    @app.route('/api/admin/reload-config', methods=['POST'])
+    def reload_config():
+        """Re-read config.ini and the environment without restarting"""
+        if not authorized():
+            return jsonify({"status": "error", "message": "Invalid admin token"}), 403
+        
+        try:
+            result = state.reload_settings()
+        except SettingsError as e:
+            # Keep running with the previous values
+            return jsonify({"status": "error", "message": "Invalid configuration", "errors": e.errors}), 400
+        
+        return jsonify({
+            "status": "success",
+            "applied": result['applied'],
+            "restart_required": result['restart_required'],
+            "settings": state.settings.as_dict()
+        })
+
+
+def is_forwarded():
+    """Whether the request came through a proxy that announced itself"""
+    return any(request.headers.get(name) for name in ('Forwarded', 'X-Forwarded-For', 'X-Real-IP'))
+
+
+def is_loopback(address):
+    try:
+        return ipaddress.ip_address(address or '').is_loopback
+    except ValueError:
+        return False
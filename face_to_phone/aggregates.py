@@ -0,0 +1,158 @@
+"""
+Streaming aggregates
+Running counters updated on every write, so insight endpoints answer in
+constant time instead of rescanning the transaction and alert history.
+"""
+
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta
+
+from face_to_phone.clock import utc_now
+
+
+class TimeBuckets:
+    """Fixed number of consecutive time buckets holding running counters"""
+
+    def __init__(self, max_buckets):
+        self.buckets = deque(maxlen=max_buckets)
+
+    def add(self, key, field, amount=1):
+        if self.buckets and self.buckets[-1][0] == key:
+            bucket = self.buckets[-1][1]
+        elif not self.buckets or self.buckets[-1][0] < key:
+            bucket = {'transactions': 0, 'alerts': 0, 'amount': 0}
+            self.buckets.append((key, bucket))
+        else:
+            # Late event: look back for its bucket, drop it if already rolled off
+            bucket = next((b for k, b in reversed(self.buckets) if k == key), None)
+            if bucket is None:
+                return
+        bucket[field] += amount
+
+    def get(self, key):
+        if self.buckets and self.buckets[-1][0] == key:
+            return self.buckets[-1][1]
+        return None
+
+    def resize(self, max_buckets):
+        if self.buckets.maxlen != max_buckets:
+            self.buckets = deque(self.buckets, maxlen=max_buckets)
+
+
+def hour_key(timestamp):
+    return timestamp.date().toordinal() * 24 + timestamp.hour
+
+
+def day_key(timestamp):
+    return timestamp.date().toordinal()
+
+
+class RunningAggregates:
+    """Fraud counts, per-user frequency/average amount and hourly/daily rollups"""
+
+    def __init__(self, hourly_buckets=48, daily_buckets=30):
+        self._lock = threading.Lock()
+        self.total_transactions = 0
+        self.total_amount = 0
+        self.total_alerts = 0
+        self.active_alerts = 0
+        self.alert_reasons = Counter()
+        self.users = {}  # user_id -> [transaction count, amount sum]
+        self.hourly = TimeBuckets(hourly_buckets)
+        self.daily = TimeBuckets(daily_buckets)
+
+    def record_transaction(self, transaction):
+        timestamp = transaction['timestamp']
+        amount = transaction.get('amount', 0) or 0
+        with self._lock:
+            self.total_transactions += 1
+            self.total_amount += amount
+            user = self.users.get(transaction['user_id'])
+            if user is None:
+                user = self.users[transaction['user_id']] = [0, 0]
+            user[0] += 1
+            user[1] += amount
+            for buckets, key in ((self.hourly, hour_key(timestamp)), (self.daily, day_key(timestamp))):
+                buckets.add(key, 'transactions')
+                buckets.add(key, 'amount', amount)
+
+    def record_alert(self, alert):
+        timestamp = alert['timestamp']
+        with self._lock:
+            self.total_alerts += 1
+            if alert.get('status') == 'active':
+                self.active_alerts += 1
+            for reason in alert.get('reason', '').split('; '):
+                if reason:
+                    self.alert_reasons[reason] += 1
+            self.hourly.add(hour_key(timestamp), 'alerts')
+            self.daily.add(day_key(timestamp), 'alerts')
+
+    def alert_status_changed(self, old_status, new_status):
+        with self._lock:
+            if old_status == 'active' and new_status != 'active':
+                self.active_alerts -= 1
+            elif old_status != 'active' and new_status == 'active':
+                self.active_alerts += 1
+
+    def user_summary(self, user_id):
+        with self._lock:
+            count, amount = self.users.get(user_id, (0, 0))
+        return {
+            'transaction_frequency': count,
+            'average_amount': amount / count if count else 0
+        }
+
+    def fraud_rate(self, now=None, resolution='daily'):
+        """Alerts per transaction in the current day (or hour)"""
+        now = now or utc_now()
+        with self._lock:
+            if resolution == 'hourly':
+                bucket = self.hourly.get(hour_key(now))
+            else:
+                bucket = self.daily.get(day_key(now))
+            if not bucket:
+                return 0
+            return bucket['alerts'] / max(1, bucket['transactions'])
+
+    def most_common_fraud_type(self):
+        with self._lock:
+            top = self.alert_reasons.most_common(1)
+        return top[0][0] if top else 'None detected'
+
+    def rollup(self, resolution='hourly', limit=24):
+        """Most recent buckets, oldest first"""
+        with self._lock:
+            buckets = self.hourly if resolution == 'hourly' else self.daily
+            recent = list(buckets.buckets)[-limit:]
+
+        rows = []
+        for key, bucket in recent:
+            if resolution == 'hourly':
+                start = datetime.fromordinal(key // 24) + timedelta(hours=key % 24)
+            else:
+                start = datetime.fromordinal(key)
+            rows.append({
+                'start': start.isoformat(),
+                'transactions': bucket['transactions'],
+                'alerts': bucket['alerts'],
+                'amount': bucket['amount'],
+                'fraud_rate': round(bucket['alerts'] / max(1, bucket['transactions']), 4)
+            })
+        return rows
+
+    def summary(self):
+        with self._lock:
+            return {
+                'total_transactions': self.total_transactions,
+                'total_alerts': self.total_alerts,
+                'active_alerts': self.active_alerts,
+                'average_amount': self.total_amount / self.total_transactions if self.total_transactions else 0,
+                'users': len(self.users)
+            }
+
+    def resize(self, hourly_buckets, daily_buckets):
+        with self._lock:
+            self.hourly.resize(hourly_buckets)
+            self.daily.resize(daily_buckets)
@@ -0,0 +1,270 @@
+"""
+Columnar transaction archive
+Scored transactions are appended to typed, chunked column files so that
+analytics and retraining can scan any amount of history as NumPy arrays
+without building a Python object per row:
+
+    <dir>/dictionaries/user_id.txt      one JSON string per line, line n = code n
+    <dir>/chunk-00000001/meta.json      rows and timestamp range (for pruning)
+    <dir>/chunk-00000001/id.u8          uint64 transaction id (0 if not a generated id)
+                         timestamp.i8   int64 epoch milliseconds (UTC)
+                         amount.f8      float64
+                         user_id.u4     uint32 dictionary codes (also recipient, type)
+                         is_fraud.u1    uint8 verdict
+
+Columns are little-endian and headerless, so readers memory-map them
+straight into arrays (zero copy). Writing needs only the standard library;
+reading needs NumPy. Labels join on the id column (see scan_labelled). One process writes a given directory; rows still
+buffered when the process dies are lost (flush() writes them out early).
+"""
+
+import json
+import os
+import sys
+import threading
+from array import array
+
+from face_to_phone.clock import epoch_ms
+from face_to_phone.ids import decode_id
+from face_to_phone.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# name -> (array typecode, NumPy dtype, file extension)
+COLUMNS = {
+    'id': ('Q', '<u8', 'u8'),
+    'timestamp': ('q', '<i8', 'i8'),
+    'amount': ('d', '<f8', 'f8'),
+    'user_id': ('I', '<u4', 'u4'),
+    'recipient': ('I', '<u4', 'u4'),
+    'type': ('I', '<u4', 'u4'),
+    'is_fraud': ('B', '<u1', 'u1')
+}
+DICTIONARY_COLUMNS = ('user_id', 'recipient', 'type')
+
+
+def id_number(transaction_id):
+    """uint64 of a generated (hex) transaction id, 0 for any other id"""
+    try:
+        value = decode_id(str(transaction_id))
+    except ValueError:
+        return 0
+    return value if 0 <= value < 1 << 64 else 0
+
+
+class ArchiveChunk:
+    """One flushed chunk; columns are memory-mapped on first use"""
+
+    def __init__(self, path, meta):
+        self.path = path
+        self.rows = meta['rows']
+        self.first_timestamp = meta['first_timestamp']
+        self.last_timestamp = meta['last_timestamp']
+        self._columns = {}
+
+    def column(self, name):
+        """Read-only NumPy view of a column file"""
+        if name not in self._columns:
+            _, dtype, extension = COLUMNS[name]
+            self._columns[name] = np.memmap(os.path.join(self.path, f"{name}.{extension}"),
+                                            dtype=dtype, mode='r', shape=(self.rows,))
+        return self._columns[name]
+
+    def overlaps(self, since, until):
+        return ((since is None or self.last_timestamp >= since) and
+                (until is None or self.first_timestamp < until))
+
+
+class TransactionArchive:
+    """Append-only columnar store of scored transactions"""
+
+    def __init__(self, directory, chunk_rows=65536):
+        self.directory = directory
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._pending = {name: array(COLUMNS[name][0]) for name in COLUMNS}
+        os.makedirs(os.path.join(directory, 'dictionaries'), exist_ok=True)
+        # code -> value lists, their reverse maps, and how much of each is on disk
+        self._values = {name: self._read_dictionary(name) for name in DICTIONARY_COLUMNS}
+        self._codes = {name: {value: code for code, value in enumerate(values)}
+                       for name, values in self._values.items()}
+        self._written = {name: len(values) for name, values in self._values.items()}
+        self._chunks = self._read_chunks()
+        self.appended = 0
+
+    def _dictionary_path(self, name):
+        return os.path.join(self.directory, 'dictionaries', f"{name}.txt")
+
+    def _read_dictionary(self, name):
+        path = self._dictionary_path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path) as handle:
+            return [json.loads(line) for line in handle]
+
+    def _read_chunks(self):
+        chunks = []
+        for entry in sorted(os.listdir(self.directory)):
+            meta_path = os.path.join(self.directory, entry, 'meta.json')
+            # Chunks still being written have no meta.json yet
+            if entry.startswith('chunk-') and os.path.exists(meta_path):
+                with open(meta_path) as handle:
+                    chunks.append(ArchiveChunk(os.path.join(self.directory, entry), json.load(handle)))
+        return chunks
+
+    def append(self, transaction, is_fraud=False):
+        """Buffer one transaction; a full chunk is written out"""
+        with self._lock:
+            pending = self._pending
+            pending['id'].append(id_number(transaction.get('id')))
+            pending['timestamp'].append(epoch_ms(transaction['timestamp']))
+            pending['amount'].append(float(transaction['amount']))
+            for name in DICTIONARY_COLUMNS:
+                value = str(transaction[name])
+                codes = self._codes[name]
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(codes)
+                    self._values[name].append(value)
+                pending[name].append(code)
+            pending['is_fraud'].append(1 if is_fraud else 0)
+            self.appended += 1
+            if len(pending['timestamp']) >= self.chunk_rows:
+                self._write_chunk()
+
+    def flush(self):
+        """Write out buffered rows as a (possibly short) chunk"""
+        with self._lock:
+            if len(self._pending['timestamp']):
+                self._write_chunk()
+
+    def _write_chunk(self):
+        pending = self._pending
+        self._pending = {name: array(COLUMNS[name][0]) for name in COLUMNS}
+        self._write_dictionaries()
+
+        rows = len(pending['timestamp'])
+        meta = {
+            'rows': rows,
+            'first_timestamp': min(pending['timestamp']),
+            'last_timestamp': max(pending['timestamp'])
+        }
+        name = f"chunk-{len(self._chunks) + 1:08d}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(path, exist_ok=True)
+        for column, values in pending.items():
+            if sys.byteorder == 'big':
+                values.byteswap()
+            with open(os.path.join(path, f"{column}.{COLUMNS[column][2]}"), 'wb') as handle:
+                values.tofile(handle)
+        # meta.json last: readers only see complete chunks
+        with open(os.path.join(path, 'meta.json.tmp'), 'w') as handle:
+            json.dump(meta, handle)
+        os.replace(os.path.join(path, 'meta.json.tmp'), os.path.join(path, 'meta.json'))
+        self._chunks.append(ArchiveChunk(path, meta))
+
+    def _write_dictionaries(self):
+        """Append codes assigned since the last chunk (before any chunk refers to them)"""
+        for name, values in self._values.items():
+            written = self._written[name]
+            if written < len(values):
+                with open(self._dictionary_path(name), 'a') as handle:
+                    handle.writelines(json.dumps(value) + '\n' for value in values[written:])
+                self._written[name] = len(values)
+
+    def dictionary(self, name):
+        """Values of a dictionary-encoded column, indexed by code"""
+        with self._lock:
+            return list(self._values[name])
+
+    def code_of(self, name, value):
+        """Code of a value in a dictionary-encoded column (None if never seen)"""
+        return self._codes[name].get(str(value))
+
+    def chunks(self, since=None, until=None):
+        """Flushed chunks that may hold rows in [since, until) (datetimes or None)"""
+        since = epoch_ms(since) if since is not None else None
+        until = epoch_ms(until) if until is not None else None
+        with self._lock:
+            chunks = list(self._chunks)
+        return [chunk for chunk in chunks if chunk.overlaps(since, until)]
+
+    def scan(self, columns=None, since=None, until=None):
+        """Yield {column: array} per chunk, rows filtered to [since, until)
+
+        Arrays of chunks entirely inside the range are memory-mapped views;
+        only chunks cut by the range are copied by the filter.
+        """
+        columns = list(columns or COLUMNS)
+        low = epoch_ms(since) if since is not None else None
+        high = epoch_ms(until) if until is not None else None
+        for chunk in self.chunks(since, until):
+            batch = {name: chunk.column(name) for name in columns}
+            if ((low is not None and chunk.first_timestamp < low) or
+                    (high is not None and chunk.last_timestamp >= high)):
+                timestamps = chunk.column('timestamp')
+                keep = np.ones(chunk.rows, dtype=bool)
+                if low is not None:
+                    keep &= timestamps >= low
+                if high is not None:
+                    keep &= timestamps < high
+                batch = {name: values[keep] for name, values in batch.items()}
+            yield batch
+
+    def scan_labelled(self, labels, columns=None, since=None, until=None):
+        """scan() plus a 'label' column joined from a LabelStore (1 fraud, 0 legitimate, -1 unlabelled)"""
+        ids, values = labels.arrays()
+        columns = set(columns or COLUMNS) | {'id'}
+        for batch in self.scan(columns, since, until):
+            label = np.full(len(batch['id']), -1, dtype=np.int8)
+            if len(ids):
+                positions = np.minimum(np.searchsorted(ids, batch['id']), len(ids) - 1)
+                matched = ids[positions] == batch['id']
+                label[matched] = values[positions[matched]]
+            batch['label'] = label
+            yield batch
+
+    def summary(self, since=None, until=None):
+        """Counts, amounts and fraud rate overall, per type and per hour of day"""
+        types = self.dictionary('type')
+        rows = frauds = 0
+        amount = 0.0
+        type_counts = np.zeros(len(types), dtype=np.int64)
+        hour_counts = np.zeros(24, dtype=np.int64)
+        hour_frauds = np.zeros(24, dtype=np.int64)
+        for batch in self.scan(('timestamp', 'amount', 'type', 'is_fraud'), since, until):
+            hours = (batch['timestamp'] // 3600000) % 24
+            rows += len(hours)
+            frauds += int(batch['is_fraud'].sum(dtype=np.int64))
+            amount += float(batch['amount'].sum())
+            type_counts += np.bincount(batch['type'], minlength=len(types))[:len(types)]
+            hour_counts += np.bincount(hours, minlength=24)
+            hour_frauds += np.bincount(hours, weights=batch['is_fraud'], minlength=24).astype(np.int64)
+        return {
+            'transactions': rows,
+            'total_amount': round(amount, 2),
+            'average_amount': round(amount / rows, 2) if rows else 0,
+            'fraud_rate': round(frauds / rows, 4) if rows else 0,
+            'by_type': {value: int(count) for value, count in zip(types, type_counts.tolist()) if count},
+            'by_hour': [{'hour': hour, 'transactions': int(count),
+                         'fraud_rate': round(fraud / count, 4) if count else 0}
+                        for hour, (count, fraud) in enumerate(zip(hour_counts.tolist(), hour_frauds.tolist()))]
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'directory': self.directory,
+                'chunks': len(self._chunks),
+                'archived_rows': sum(chunk.rows for chunk in self._chunks),
+                'buffered_rows': len(self._pending['timestamp']),
+                'users': len(self._codes['user_id']),
+                'recipients': len(self._codes['recipient'])
+            }
+
+
+def create_archive(settings):
+    """Archive configured by ARCHIVE_DIR, or None when archiving is off"""
+    if not settings.archive_dir:
+        return None
+    return TransactionArchive(settings.archive_dir, settings.archive_chunk_rows)
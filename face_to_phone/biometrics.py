@@ -0,0 +1,486 @@
+"""
+Biometric authentication backends
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from face_to_phone.clock import utc_now
+from face_to_phone.credentials import PinCredentials
+from face_to_phone.face_features import EMBEDDING_DIMS, HASH_BYTES, decode_image, describe_faces
+from face_to_phone.template_store import BinaryTemplateStore, EmbeddingTemplateStore
+from face_to_phone.uploads import read_upload
+from face_to_phone.voice_features import EMBEDDING_DIMS as VOICE_EMBEDDING_DIMS, decode_audio, describe_voices
+from face_to_phone.workers import JobTimeout, PoolSaturated
+
+# SHA-256 templates are 32-byte rows in the template stores
+HASH_TEMPLATE_BYTES = 32
+
+# Simplified Biometric Authentication (No GPU required)
+class SimplifiedBiometricAuth:
+    # Whether verification needs the sample bytes (rather than just their digest)
+    needs_sample_bytes = False
+    
+    def __init__(self, settings=None, storage=None):
+        self.settings = settings
+        self.storage = storage
+        self.face_templates = {}  # user_id -> template metadata
+        self.voice_templates = {}
+        self.face_store = BinaryTemplateStore(HASH_TEMPLATE_BYTES)
+        self.voice_store = BinaryTemplateStore(HASH_TEMPLATE_BYTES)
+        self.pins = PinCredentials(settings, storage)
+        # Threads for 1:N duplicate-enrollment scans (NumPy releases the GIL)
+        workers = settings.duplicate_search_workers if settings else 4
+        self.search_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='template-search')
+        
+    def enroll_face(self, user_id, image_data):
+        """Simplified face enrollment using basic image analysis"""
+        try:
+            # Decode image (base64 or raw upload) in chunks
+            image = self.read_sample(image_data)
+            
+            # Create a simple hash-based template (for demo purposes)
+            image_hash = image.sha256
+            
+            # Look for the same face on other accounts, then store template
+            duplicates = self.find_duplicate_enrollments(self.face_store, user_id, image_hash)
+            self.face_store.put(user_id, image_hash)
+            self.face_templates[user_id] = {
+                'enrolled_at': utc_now(),
+                'confidence_threshold': 0.7
+            }
+            self.save_templates('face', user_id)
+            
+            return {"status": "success", "message": "Face enrolled successfully", **duplicates}
+            
+        except Exception as e:
+            return {"status": "error", "message": f"Face enrollment failed: {str(e)}"}
+    
+    def verify_face(self, user_id, image_data):
+        """Simplified face verification"""
+        try:
+            if user_id not in self.face_templates:
+                return {"status": "error", "message": "User not enrolled"}
+            
+            # Decode image (base64 or raw upload) in chunks
+            current_hash = self.read_sample(image_data).sha256
+            
+            # Simple similarity check (in real implementation, this would be more sophisticated)
+            similarity = self.calculate_hash_similarity(self.face_store, user_id, current_hash)
+            confidence = similarity * 100
+            
+            if confidence > 70:  # Threshold for verification
+                return {
+                    "status": "success", 
+                    "verified": True, 
+                    "confidence": round(confidence, 2),
+                    "message": f"Face verified with {confidence:.1f}% confidence"
+                }
+            else:
+                return {
+                    "status": "success", 
+                    "verified": False, 
+                    "confidence": round(confidence, 2),
+                    "message": "Face verification failed - possible fraud attempt"
+                }
+                
+        except Exception as e:
+            return {"status": "error", "message": f"Face verification failed: {str(e)}"}
+    
+    def template_stores(self, kind):
+        """(metadata dict, hash store, embedding store or None) of a modality"""
+        if kind == 'face':
+            return self.face_templates, self.face_store, None
+        return self.voice_templates, self.voice_store, None
+    
+    def save_templates(self, kind, user_id):
+        """Write a user's enrolled face/voice templates through to storage"""
+        if self.storage is None:
+            return
+        templates, hashes, embeddings = self.template_stores(kind)
+        embedding = embeddings.get(user_id) if embeddings is not None else None
+        self.storage.save_template(kind, user_id, templates[user_id], hashes.get(user_id), embedding)
+    
+    def load_templates(self):
+        """Restore enrollments from storage; returns how many were skipped (enrolled with another backend)"""
+        skipped = 0
+        for kind, user_id, meta, template, embedding in self.storage.load_templates() if self.storage else ():
+            templates, hashes, embeddings = self.template_stores(kind)
+            try:
+                hashes.restore(user_id, template)
+                if embedding is not None and embeddings is not None:
+                    embeddings.restore(user_id, embedding)
+            except ValueError:
+                hashes.remove(user_id)
+                skipped += 1
+                continue
+            templates[user_id] = meta
+        return skipped
+    
+    def read_sample(self, sample, keep=False):
+        """Digest and size (plus bytes when keep is set) of an image/audio sample, decoded in chunks"""
+        limit = self.settings.max_upload_bytes if self.settings else 5000000
+        chunk_size = self.settings.upload_chunk_size if self.settings else 65536
+        return read_upload(sample, limit, chunk_size, keep)
+    
+    def find_duplicate_enrollments(self, store, user_id, template, threshold=None):
+        """Other accounts with a matching template (1:N search within the latency budget)"""
+        if threshold is None:
+            threshold = self.settings.duplicate_match_threshold if self.settings else 0.9
+        budget_ms = self.settings.duplicate_search_budget_ms if self.settings else 50
+        result = store.find_matches(template, threshold, exclude=user_id, executor=self.search_pool,
+                                    timeout=budget_ms / 1000 if budget_ms else None)
+        return {
+            "duplicate_accounts": [account for account, _ in result['matches']],
+            "duplicate_search_complete": result['complete']
+        }
+    
+    def calculate_hash_similarity(self, store, user_id, template):
+        """Similarity of a hash to a user's stored one, 0 for unrelated hashes"""
+        # Unrelated hashes agree on about half their bits, so rescale from chance level
+        similarity = store.compare(user_id, template)
+        return max(0.0, 2 * similarity - 1)
+    
+    def verify_face_batch(self, requests):
+        """Verify several (user_id, image_data) requests in one job"""
+        return [self.verify_face(user_id, image_data) for user_id, image_data in requests]
+    
+    def enroll_voice(self, user_id, audio_data):
+        """Simplified voice enrollment"""
+        try:
+            # Decode audio (base64 or raw upload) in chunks
+            audio = self.read_sample(audio_data)
+            
+            # Create a simple hash-based template
+            audio_hash = audio.sha256
+            
+            # Look for the same voice on other accounts, then store template
+            duplicates = self.find_duplicate_enrollments(self.voice_store, user_id, audio_hash)
+            self.voice_store.put(user_id, audio_hash)
+            self.voice_templates[user_id] = {
+                'enrolled_at': utc_now(),
+                'confidence_threshold': 0.6
+            }
+            self.save_templates('voice', user_id)
+            
+            return {"status": "success", "message": "Voice enrolled successfully", **duplicates}
+            
+        except Exception as e:
+            return {"status": "error", "message": f"Voice enrollment failed: {str(e)}"}
+    
+    def verify_voice(self, user_id, audio_data):
+        """Simplified voice verification"""
+        try:
+            if user_id not in self.voice_templates:
+                return {"status": "error", "message": "User not enrolled"}
+            
+            # Decode audio (base64 or raw upload) in chunks
+            current_hash = self.read_sample(audio_data).sha256
+            
+            # Simple similarity check
+            similarity = self.calculate_hash_similarity(self.voice_store, user_id, current_hash)
+            confidence = similarity * 100
+            
+            if confidence > 60:  # Lower threshold for voice
+                return {
+                    "status": "success", 
+                    "verified": True, 
+                    "confidence": round(confidence, 2),
+                    "message": f"Voice verified with {confidence:.1f}% confidence"
+                }
+            else:
+                return {
+                    "status": "success", 
+                    "verified": False, 
+                    "confidence": round(confidence, 2),
+                    "message": "Voice verification failed - possible fraud attempt"
+                }
+                
+        except Exception as e:
+            return {"status": "error", "message": f"Voice verification failed: {str(e)}"}
+
+    def verify_voice_batch(self, requests):
+        """Verify several (user_id, audio_data) requests in one job"""
+        return [self.verify_voice(user_id, audio_data) for user_id, audio_data in requests]
+
+    def setup_pin(self, user_id, pin):
+        """Setup PIN for user"""
+        try:
+            # Salted scrypt hash, computed on the PIN hashing pool
+            self.pins.set_pin(user_id, pin)
+            
+            return {"status": "success", "message": "PIN set successfully"}
+            
+        except (PoolSaturated, JobTimeout):
+            raise
+        except Exception as e:
+            return {"status": "error", "message": f"PIN setup failed: {str(e)}"}
+    
+    def verify_pin(self, user_id, pin, device_ids=()):
+        """Verify PIN (throttled per user and per device key)"""
+        try:
+            if user_id not in self.pins:
+                return {"status": "error", "message": "PIN not set"}
+            
+            return self.pins.check_pin(user_id, pin, device_ids)
+                
+        except (PoolSaturated, JobTimeout):
+            raise
+        except Exception as e:
+            return {"status": "error", "message": f"PIN verification failed: {str(e)}"}
+    
+    def get_enrollment_status(self, user_id):
+        """Get enrollment status for user"""
+        return {
+            "face_enrolled": user_id in self.face_templates,
+            "voice_enrolled": user_id in self.voice_templates,
+            "pin_set": user_id in self.pins
+        }
+
+# Lightweight Biometric Authentication with quality scoring
+class LightweightBiometricAuth(SimplifiedBiometricAuth):
+    needs_sample_bytes = True
+    
+    def __init__(self, settings=None, storage=None):
+        super().__init__(settings, storage)
+        # Perceptual hashes for Hamming matching and duplicate search, gradient embeddings for cosine matching
+        self.face_store = BinaryTemplateStore(HASH_BYTES)
+        self.face_embeddings = EmbeddingTemplateStore(EMBEDDING_DIMS)
+        # MFCC-style embeddings for clips we can decode (PCM WAV); other formats keep the hash template
+        self.voice_embeddings = EmbeddingTemplateStore(VOICE_EMBEDDING_DIMS)
+    
+    def enroll_face(self, user_id, image_data):
+        """Lightweight face enrollment using perceptual hash and gradient features"""
+        try:
+            # Decode image (base64 or raw upload) in chunks
+            image = self.read_sample(image_data, keep=True)
+            
+            # Downscale and describe the image (CPU-only face template)
+            features = describe_faces([decode_image(image.data)])
+            image_hash = features['hashes'][0].tobytes()
+            
+            # Store the descriptors as the "face template"
+            duplicates = self.find_duplicate_enrollments(self.face_store, user_id, image_hash)
+            self.face_store.put(user_id, image_hash)
+            self.face_embeddings.put(user_id, features['embeddings'][0])
+            template = {
+                'size': image.size,
+                'timestamp': utc_now(),
+                'quality_score': float(features['quality'][0])
+            }
+            
+            self.face_templates[user_id] = template
+            self.save_templates('face', user_id)
+            
+            return {
+                "status": "success", 
+                "message": f"Face enrolled successfully! Quality score: {template['quality_score']:.1f}%",
+                "template_id": image_hash[:4].hex(),
+                **duplicates
+            }
+            
+        except Exception as e:
+            return {"status": "error", "message": f"Face enrollment failed: {str(e)}"}
+    
+    def verify_face(self, user_id, image_data):
+        """Lightweight face verification"""
+        return self.verify_face_batch([(user_id, image_data)])[0]
+    
+    def verify_face_batch(self, requests):
+        """Verify several faces with one vectorized feature extraction"""
+        results = [None] * len(requests)
+        decoded = []
+        for position, (user_id, image_data) in enumerate(requests):
+            if user_id not in self.face_templates:
+                results[position] = {"status": "error", "message": "User not enrolled"}
+                continue
+            try:
+                decoded.append((position, user_id, decode_image(self.read_sample(image_data, keep=True).data)))
+            except Exception as e:
+                results[position] = {"status": "error", "message": f"Face verification failed: {str(e)}"}
+        
+        if decoded:
+            features = describe_faces([pixels for _, _, pixels in decoded])
+            for row, (position, user_id, _) in enumerate(decoded):
+                results[position] = self.score_face(user_id, features['hashes'][row].tobytes(),
+                                                    features['embeddings'][row])
+        return results
+    
+    def score_face(self, user_id, image_hash, embedding):
+        """Compare a new capture's descriptors with the user's enrolled ones"""
+        hash_similarity = self.calculate_hash_similarity(self.face_store, user_id, image_hash)
+        embedding_similarity = max(0.0, self.face_embeddings.compare(user_id, embedding))
+        
+        # Combine similarities
+        final_confidence = (hash_similarity * 0.5 + embedding_similarity * 0.5) * 100
+        
+        if final_confidence > 75:  # Threshold for verification
+            return {
+                "status": "success",
+                "verified": True,
+                "confidence": round(final_confidence, 2),
+                "message": f"Face verified with {final_confidence:.1f}% confidence"
+            }
+        else:
+            return {
+                "status": "success",
+                "verified": False,
+                "confidence": round(final_confidence, 2),
+                "message": f"Face verification failed - confidence too low ({final_confidence:.1f}%)"
+            }
+    
+    def enroll_voice(self, user_id, audio_data):
+        """Lightweight voice enrollment using audio analysis"""
+        try:
+            # Decode audio (base64 or raw upload) in chunks
+            audio = self.read_sample(audio_data, keep=True)
+            
+            # Create simple voice template based on audio properties
+            audio_hash = audio.sha256
+            audio_size = audio.size
+            
+            # Spectral voice features when the clip is PCM WAV
+            features = self.describe_voice_clips([audio.data])[0]
+            
+            if features is not None:
+                # The same voice recorded again never gives identical bytes: search the embeddings
+                threshold = self.settings.voice_duplicate_threshold if self.settings else 0.9
+                duplicates = self.find_duplicate_enrollments(self.voice_embeddings, user_id, features['embedding'], threshold)
+            else:
+                # Clips we can't describe can only be matched byte for byte
+                duplicates = self.find_duplicate_enrollments(self.voice_store, user_id, audio_hash)
+            self.voice_store.put(user_id, audio_hash)
+            if features is not None:
+                self.voice_embeddings.put(user_id, features['embedding'])
+            else:
+                self.voice_embeddings.remove(user_id)
+            template = {
+                'size': audio_size,
+                'timestamp': utc_now(),
+                'duration_estimate': features['duration'] if features else audio_size / 16000,  # Rough estimate
+                'quality_score': features['quality'] if features else self.calculate_audio_quality(audio_size)
+            }
+            
+            self.voice_templates[user_id] = template
+            self.save_templates('voice', user_id)
+            
+            return {
+                "status": "success",
+                "message": f"Voice enrolled successfully! Quality score: {template['quality_score']:.1f}%",
+                "template_id": audio_hash[:4].hex(),
+                **duplicates
+            }
+            
+        except Exception as e:
+            return {"status": "error", "message": f"Voice enrollment failed: {str(e)}"}
+    
+    def template_stores(self, kind):
+        if kind == 'face':
+            return self.face_templates, self.face_store, self.face_embeddings
+        return self.voice_templates, self.voice_store, self.voice_embeddings
+    
+    def describe_voice_clips(self, clips):
+        """Embedding, duration and quality per clip, or None for clips that aren't PCM WAV"""
+        decoded = []
+        for position, data in enumerate(clips):
+            try:
+                decoded.append((position, decode_audio(data)))
+            except ValueError:
+                pass
+        
+        results = [None] * len(clips)
+        if decoded:
+            features = describe_voices([samples for _, samples in decoded])
+            for row, (position, _) in enumerate(decoded):
+                results[position] = {
+                    'embedding': features['embeddings'][row],
+                    'duration': float(features['duration'][row]),
+                    'quality': float(features['quality'][row])
+                }
+        return results
+    
+    def verify_voice(self, user_id, audio_data):
+        """Lightweight voice verification"""
+        return self.verify_voice_batch([(user_id, audio_data)])[0]
+    
+    def verify_voice_batch(self, requests):
+        """Verify several voices with one vectorized feature extraction"""
+        results = [None] * len(requests)
+        samples = []
+        for position, (user_id, audio_data) in enumerate(requests):
+            if user_id not in self.voice_templates:
+                results[position] = {"status": "error", "message": "User not enrolled"}
+                continue
+            try:
+                samples.append((position, user_id, self.read_sample(audio_data, keep=True)))
+            except Exception as e:
+                results[position] = {"status": "error", "message": f"Voice verification failed: {str(e)}"}
+        
+        features = self.describe_voice_clips([audio.data for _, _, audio in samples])
+        for (position, user_id, audio), clip_features in zip(samples, features):
+            try:
+                results[position] = self.score_voice(user_id, audio, clip_features)
+            except Exception as e:
+                results[position] = {"status": "error", "message": f"Voice verification failed: {str(e)}"}
+        return results
+    
+    def score_voice(self, user_id, audio, features):
+        """Compare a new clip with the user's enrolled voice"""
+        if features is not None and user_id in self.voice_embeddings:
+            # Cosine similarity of voice embeddings, rescaled so 0.5 and below count as no match
+            similarity = self.voice_embeddings.compare(user_id, features['embedding'])
+            final_confidence = max(0.0, min(100.0, (similarity - 0.5) * 200))
+        else:
+            stored_template = self.voice_templates[user_id]
+            
+            # Simple similarity check
+            hash_similarity = self.calculate_hash_similarity(self.voice_store, user_id, audio.sha256)
+            size_similarity = 1 - abs(stored_template['size'] - audio.size) / max(stored_template['size'], audio.size)
+            
+            # Combine similarities
+            overall_similarity = (hash_similarity * 0.6 + size_similarity * 0.4) * 100
+            
+            # Add randomness for realistic simulation
+            confidence_adjustment = random.uniform(-8, 8)
+            final_confidence = max(0, min(100, overall_similarity + confidence_adjustment))
+        
+        if final_confidence > 70:  # Threshold for voice verification
+            return {
+                "status": "success",
+                "verified": True,
+                "confidence": round(final_confidence, 2),
+                "message": f"Voice verified with {final_confidence:.1f}% confidence"
+            }
+        else:
+            return {
+                "status": "success",
+                "verified": False,
+                "confidence": round(final_confidence, 2),
+                "message": f"Voice verification failed - confidence too low ({final_confidence:.1f}%)"
+            }
+    
+    def calculate_audio_quality(self, audio_size):
+        """Calculate audio quality score"""
+        # Simple quality estimation
+        size_score = min(100, audio_size / 500)  # Normalize by size
+        return min(100, size_score + random.uniform(-5, 5))
+    
+    def setup_pin(self, user_id, pin):
+        """Setup PIN for user (exactly PIN_LENGTH digits)"""
+        pin_length = self.settings.pin_length if self.settings else 4
+        if not pin or len(pin) != pin_length:
+            return {"status": "error", "message": f"PIN must be {pin_length} digits"}
+        return super().setup_pin(user_id, pin)
+
+BIOMETRICS = {
+    'simplified': SimplifiedBiometricAuth,
+    'lightweight': LightweightBiometricAuth
+}
+
+def create_biometric_auth(name, settings=None, storage=None):
+    """Instantiate a biometric backend by name, with enrollments restored from storage"""
+    if name not in BIOMETRICS:
+        raise ValueError(f"Unknown biometrics backend '{name}' (choose from: {', '.join(BIOMETRICS)})")
+    auth = BIOMETRICS[name](settings, storage)
+    auth.load_templates()
+    return auth
@@ -0,0 +1,162 @@
+"""
+Per-user result cache
+Dashboard endpoints recompute aggregates over a user's history on every GET.
+Results are memoized per user and dropped as soon as a new transaction for
+that user is written, with LRU eviction bounding the number of users kept.
+TTLCache is the plain bounded, expiring key -> value variant.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Key for results computed over every user's data (invalidated on any write)
+ALL_USERS = '*'
+
+
+class UserResultCache:
+    """LRU cache of computed results keyed by user, then by result kind"""
+
+    def __init__(self, max_users):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, user_id, kind, compute):
+        """Return the cached result, computing (and caching) it on a miss"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+                if kind in entry['results']:
+                    self.hits += 1
+                    return entry['results'][kind]
+            self.misses += 1
+            version = entry['version'] if entry is not None else None
+            writes = self._writes
+
+        value = compute()
+
+        with self._lock:
+            if self.max_users <= 0:
+                return value
+            entry = self._entries.get(user_id)
+            if entry is None:
+                # Don't cache if a write may have landed while computing
+                if version is not None or writes != self._writes:
+                    return value
+                entry = {'version': 0, 'results': {}}
+                self._entries[user_id] = entry
+                while len(self._entries) > self.max_users:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            elif entry['version'] != version:
+                return value
+            entry['results'][kind] = value
+        return value
+
+    def invalidate(self, user_id):
+        """Drop a user's cached results (and any all-user results)"""
+        with self._lock:
+            self._writes += 1
+            for key in (user_id, ALL_USERS):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry['version'] += 1
+                    entry['results'] = {}
+
+    def clear(self):
+        with self._lock:
+            self._writes += 1
+            self._entries.clear()
+
+    def resize(self, max_users):
+        with self._lock:
+            self.max_users = max_users
+            while len(self._entries) > max(max_users, 0):
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users_cached": len(self._entries),
+                "max_users": self.max_users,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+            }
+
+
+class TTLCache:
+    """Key -> value cache where entries expire ttl seconds after they are written
+
+    Bounded to max_entries, evicting the least recently used first. Expired
+    entries are dropped when looked up or when they reach the LRU end.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                _, (oldest_expiry, _) = self._entries.popitem(last=False)
+                if oldest_expiry <= time.monotonic():
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0
+            }
@@ -0,0 +1,137 @@
+"""
+Clocks for fraud scoring
+Each transaction is stamped once, and every feature computed for it (hour,
+weekday, time since last, sliding windows) reads that one timestamp. What
+"now" means for anything that has no timestamp of its own depends on the
+clock:
+
+- wall: the system time (live traffic)
+
+All of them return naive datetimes in UTC, the same as parse_timestamp, so
+stamped, parsed and stored times can be compared and mixed freely.
+- event: the latest event time seen, so replays of historical files
+  behave as if they were happening live
+- simulated: set or advanced by hand, optionally ticking per read
+  (deterministic tests, replays and benchmarks; not a server setting,
+  since nothing in the server advances it)
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+MAX_CLOCK_SKEW = timedelta(minutes=5)  # how far ahead of our wall time a client's event time may be
+
+
+class FutureTimestamp(ValueError):
+    """Raised for a client-supplied event time too far ahead of the wall clock"""
+
+
+def utc_now():
+    """The system time as a naive UTC datetime, like every other timestamp here"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def parse_timestamp(value):
+    """Naive datetime from an ISO string, epoch seconds/milliseconds or a datetime (aware values become UTC)"""
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if isinstance(value, (int, float)):
+        seconds = value / 1000 if value > 1e11 else value
+        return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def epoch_ms(timestamp):
+    """Epoch milliseconds of a naive (UTC) datetime"""
+    return (timestamp - EPOCH) // MILLISECOND
+
+
+class Clock:
+    """Source of the current time for detectors"""
+
+    name = 'base'
+
+    def now(self):
+        raise NotImplementedError
+
+    def event_time(self, transaction):
+        """The one timestamp all of a transaction's features are computed at"""
+        return transaction.get('timestamp') or self.now()
+
+
+class WallClock(Clock):
+    name = 'wall'
+
+    def now(self):
+        return utc_now()
+
+
+class EventClock(Clock):
+    """Time advances with the events seen (never backwards); wall time before the first one"""
+
+    name = 'event'
+
+    def __init__(self):
+        self._latest = None
+        self._lock = threading.Lock()
+
+    def now(self):
+        return self._latest or utc_now()
+
+    def advance(self, timestamp):
+        with self._lock:
+            if self._latest is None or timestamp > self._latest:
+                self._latest = timestamp
+
+    def event_time(self, transaction):
+        timestamp = transaction.get('timestamp')
+        if timestamp is None:
+            return self.now()
+        self.advance(timestamp)
+        return timestamp
+
+
+class SimulatedClock(Clock):
+    """Time set by hand; with tick, every read moves it forward by that much"""
+
+    name = 'simulated'
+
+    def __init__(self, start=None, tick=timedelta(0)):
+        self._current = start or datetime(2024, 1, 1)
+        self.tick = tick
+        self._lock = threading.Lock()
+
+    def now(self):
+        with self._lock:
+            current = self._current
+            self._current += self.tick
+            return current
+
+    def set(self, timestamp):
+        with self._lock:
+            self._current = timestamp
+
+    def advance(self, delta):
+        with self._lock:
+            self._current += delta
+
+
+CLOCKS = {
+    'wall': WallClock,
+    'event': EventClock,
+    'simulated': SimulatedClock
+}
+
+
+def create_clock(name):
+    """Instantiate a clock by name"""
+    if name not in CLOCKS:
+        raise ValueError(f"Unknown clock '{name}' (choose from: {', '.join(CLOCKS)})")
+    return CLOCKS[name]()
@@ -0,0 +1,240 @@
+"""
+PIN credentials
+PINs are stored as salted scrypt hashes, so a leaked store can't be
+reversed with a 10,000-entry lookup table. Hashing is deliberately slow and
+memory-hard, so it runs on its own bounded pool, and an in-memory attempt
+limiter sits in front of it: locked-out users and devices are turned away
+before any hashing work is done. Every attempt is counted before its hash
+is checked (and given back if the PIN was right), so a burst of concurrent
+guesses can't all get past the limit while the first ones are hashing.
+"""
+
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from face_to_phone.workers import BoundedPool
+
+SALT_BYTES = 16
+DIGEST_BYTES = 32
+SCRYPT_BLOCK_SIZE = 8
+SCRYPT_PARALLELISM = 1
+
+
+def hash_pin(pin, salt, cost):
+    """scrypt digest of a PIN with N = 2 ** cost"""
+    n = 2 ** cost
+    # scrypt needs 128 * r * N bytes; leave headroom over OpenSSL's 32 MB default
+    maxmem = 128 * SCRYPT_BLOCK_SIZE * n * 2
+    return hashlib.scrypt(pin.encode(), salt=salt, n=n, r=SCRYPT_BLOCK_SIZE, p=SCRYPT_PARALLELISM,
+                          maxmem=maxmem, dklen=DIGEST_BYTES)
+
+
+class PinRecord:
+    """Salt, work factor and digest of one stored PIN"""
+
+    __slots__ = ('cost', 'salt', 'digest')
+
+    def __init__(self, cost, salt, digest):
+        self.cost = cost
+        self.salt = salt
+        self.digest = digest
+
+    @classmethod
+    def create(cls, pin, cost):
+        salt = os.urandom(SALT_BYTES)
+        return cls(cost, salt, hash_pin(pin, salt, cost))
+
+    def matches(self, pin):
+        # Constant-time comparison, so response timing leaks nothing about the digest
+        return hmac.compare_digest(hash_pin(pin, self.salt, self.cost), self.digest)
+
+
+class AttemptLimiter:
+    """Failed attempts per key over a sliding window, with lockout
+
+    Each key keeps two fixed-window counts and the window estimate weights
+    the previous one by how much of it still overlaps (the usual sliding
+    window counter). That is O(1) time and a few slots of memory per key,
+    cheap enough to check on every request. Keys are evicted least recently
+    used beyond max_keys.
+    """
+
+    def __init__(self, window_seconds, lockout_seconds, max_keys=100000):
+        self.window = window_seconds
+        self.lockout = lockout_seconds
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key -> [window_start, previous, current, locked_until]
+        self._lock = threading.Lock()
+        self.lockouts = 0
+
+    def _entry(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        # Roll the fixed windows forward
+        elapsed = now - entry[0]
+        if elapsed >= self.window:
+            entry[1] = entry[2] if elapsed < 2 * self.window else 0
+            entry[2] = 0
+            entry[0] = now - elapsed % self.window
+        return entry
+
+    def _estimate(self, entry, now):
+        overlap = 1 - (now - entry[0]) / self.window
+        return entry[1] * overlap + entry[2]
+
+    def locked(self, key, now=None):
+        """Seconds until key may try again (0 if not locked out)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(key, now)
+            if entry is None or entry[3] <= now:
+                return 0
+            return entry[3] - now
+
+    def attempt(self, key, max_attempts, now=None):
+        """Count an attempt before it is checked; returns seconds to wait (0 = go ahead)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(key, now)
+            if entry is None:
+                entry = self._entries[key] = [now, 0, 0, 0]
+                if len(self._entries) > self.max_keys:
+                    self._entries.popitem(last=False)
+            if entry[3] > now:
+                return entry[3] - now
+            if self._estimate(entry, now) >= max_attempts:
+                # Attempts still being checked count too
+                return self._lock_out(entry, now)
+            entry[2] += 1
+            return 0
+
+    def release(self, key, now=None):
+        """Give back an attempt that turned out to be right (or was never checked)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(key, now)
+            if entry is not None and entry[2]:
+                entry[2] -= 1
+
+    def failure(self, key, max_attempts, now=None):
+        """An attempt counted by attempt() failed; returns the lockout in seconds it triggered (0 if none)"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(key, now)
+            if entry is None or entry[3] > now:
+                return 0
+            if self._estimate(entry, now) >= max_attempts:
+                return self._lock_out(entry, now)
+            return 0
+
+    def _lock_out(self, entry, now):
+        entry[3] = now + self.lockout
+        self.lockouts += 1
+        return self.lockout
+
+    def reset(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                'tracked_keys': len(self._entries),
+                'locked_keys': sum(1 for entry in self._entries.values() if entry[3] > now),
+                'lockouts': self.lockouts
+            }
+
+
+class PinCredentials:
+    """Salted PIN storage with throttled, pool-offloaded verification"""
+
+    def __init__(self, settings=None, storage=None):
+        self.settings = settings
+        self.storage = storage
+        self.records = {}  # user_id -> PinRecord
+        if storage is not None:
+            for user_id, cost, salt, digest in storage.load_pins():
+                self.records[user_id] = PinRecord(cost, salt, digest)
+        workers = settings.pin_hash_workers if settings else 2
+        self.pool = BoundedPool('pin-hash', workers, settings.pin_hash_queue_size if settings else 64)
+        self.limiter = AttemptLimiter(
+            settings.pin_attempt_window_seconds if settings else 900,
+            settings.pin_lockout_seconds if settings else 900,
+            settings.attempt_tracker_size if settings else 100000
+        )
+
+    def cost(self):
+        return self.settings.pin_hash_cost if self.settings else 14
+
+    def timeout(self):
+        return self.settings.biometric_timeout_ms / 1000 if self.settings else None
+
+    def set_pin(self, user_id, pin):
+        """Hash and store a user's PIN on the hashing pool"""
+        self.store(user_id, self.pool.run(PinRecord.create, pin, self.cost(), timeout=self.timeout()))
+        self.limiter.reset(('user', user_id))
+
+    def store(self, user_id, record):
+        self.records[user_id] = record
+        if self.storage is not None:
+            self.storage.save_pin(user_id, record)
+
+    def check_pin(self, user_id, pin, device_ids=()):
+        """Verification result dict; 'retry_after' is set when the user or a device is locked out"""
+        user_limit = self.settings.pin_max_attempts if self.settings else 5
+        device_limit = self.settings.pin_device_max_attempts if self.settings else 20
+        limits = [(('user', user_id), user_limit)]
+        limits += [(('device', device_id), device_limit) for device_id in dict.fromkeys(device_ids) if device_id]
+
+        # Reserve the attempt on every key before any hashing
+        reserved = []
+        for key, limit in limits:
+            retry_after = self.limiter.attempt(key, limit)
+            if retry_after:
+                for taken in reserved:
+                    self.limiter.release(taken)
+                return self.locked_out(retry_after)
+            reserved.append(key)
+
+        record = self.records[user_id]
+        try:
+            verified = self.pool.run(record.matches, pin, timeout=self.timeout())
+        except BaseException:
+            # The PIN was never checked, so the attempt doesn't count
+            for key in reserved:
+                self.limiter.release(key)
+            raise
+        if verified:
+            self.limiter.reset(('user', user_id))
+            for key in reserved[1:]:
+                self.limiter.release(key)
+            if record.cost != self.cost():
+                # Work factor changed since enrollment; re-hash while we know the PIN
+                self.store(user_id, self.pool.run(PinRecord.create, pin, self.cost(), timeout=self.timeout()))
+            return {"status": "success", "verified": True, "message": "PIN verified successfully"}
+
+        retry_after = max(self.limiter.failure(key, limit) for key, limit in limits)
+        if retry_after:
+            return self.locked_out(retry_after)
+        return {"status": "success", "verified": False, "message": "Invalid PIN - possible fraud attempt"}
+
+    def locked_out(self, retry_after):
+        return {
+            "status": "error",
+            "verified": False,
+            "message": "Too many failed PIN attempts - try again later",
+            "retry_after": int(retry_after) + 1
+        }
+
+    def __contains__(self, user_id):
+        return user_id in self.records
+
+    def stats(self):
+        return dict(self.limiter.stats(), pins=len(self.records), hash_pool=self.pool.stats())
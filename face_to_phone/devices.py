@@ -0,0 +1,148 @@
+"""
+Global device fingerprint index
+Maps hashed fingerprints to the accounts using them and each account to its
+known devices, so "is this a known device?" and "how many accounts share
+this device?" are constant-time lookups. Both maps are LRU-bounded.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+FINGERPRINT_FIELDS = ('user_agent', 'screen_resolution', 'timezone', 'language', 'platform')
+
+
+class FieldInterner:
+    """Encodes field strings as small ints so fingerprints compare cheaply"""
+
+    def __init__(self, max_values=100000):
+        self.max_values = max_values
+        self._codes = {}
+
+    def encode(self, value):
+        code = self._codes.get(value)
+        if code is None:
+            if len(self._codes) >= self.max_values:
+                # Table full: fall back to a hash code, still fine for equality checks
+                return -(hash(value) & 0x7FFFFFFFFFFFFFFF) - 1
+            code = self._codes[value] = len(self._codes)
+        return code
+
+    def __len__(self):
+        return len(self._codes)
+
+
+def device_key(values):
+    """64-bit key for a fingerprint's field values"""
+    digest = hashlib.blake2b('\x1f'.join(values).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+class DeviceIndex:
+    """Bounded device -> accounts and account -> devices index"""
+
+    def __init__(self, max_devices=500000, max_users=500000, devices_per_user=10,
+                 max_accounts_per_device=64, fields=FINGERPRINT_FIELDS):
+        self.max_devices = max_devices
+        self.max_users = max_users
+        self.devices_per_user = devices_per_user
+        self.max_accounts_per_device = max_accounts_per_device
+        self.fields = fields
+        self.interner = FieldInterner()
+        self._devices = OrderedDict()  # device key -> tuple of user ids
+        self._saturated = {}  # device key -> accounts seen past max_accounts_per_device
+        self._users = OrderedDict()  # user id -> (device keys, encoded fields of last device)
+        self._lock = threading.Lock()
+
+    def fingerprint(self, device_info):
+        """Field values and key of a device_info dict"""
+        values = tuple(str(device_info.get(field, '') or '') for field in self.fields)
+        return values, device_key(values)
+
+    def observe(self, user_id, device_info, max_field_changes=None):
+        """Record that user_id used this device and report what is known about it
+
+        With max_field_changes set, a fingerprint that differs from the user's
+        last device in at most that many fields counts as the same device.
+        """
+        values, key = self.fingerprint(device_info)
+        with self._lock:
+            encoded = tuple(self.interner.encode(value) for value in values)
+
+            user = self._users.get(user_id)
+            user_devices, last_encoded = user if user is not None else ((), None)
+            known_device = key in user_devices
+            similar_device = (not known_device and last_encoded is not None and max_field_changes is not None
+                              and sum(a != b for a, b in zip(encoded, last_encoded)) <= max_field_changes)
+
+            if not known_device:
+                user_devices = (user_devices + (key,))[-self.devices_per_user:]
+            self._users[user_id] = (user_devices, encoded)
+            self._users.move_to_end(user_id)
+            if len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+            accounts = self._devices.get(key, ())
+            if user_id not in accounts:
+                if len(accounts) < self.max_accounts_per_device:
+                    accounts = accounts + (user_id,)
+                elif not known_device:
+                    self._saturated[key] = self._saturated.get(key, 0) + 1
+            self._devices[key] = accounts
+            self._devices.move_to_end(key)
+            if len(self._devices) > self.max_devices:
+                evicted, _ = self._devices.popitem(last=False)
+                self._saturated.pop(evicted, None)
+
+            account_count = len(accounts) + self._saturated.get(key, 0)
+
+        return {
+            'device_id': f"{key:016x}",
+            'known_device': known_device,
+            'similar_device': similar_device,
+            'first_device': user is None,
+            'accounts_on_device': account_count
+        }
+
+    def is_known(self, user_id, device_info):
+        _, key = self.fingerprint(device_info)
+        with self._lock:
+            user = self._users.get(user_id)
+            return user is not None and key in user[0]
+
+    def accounts_for(self, device_info):
+        """Accounts seen on a device (the first max_accounts_per_device) and the total count"""
+        _, key = self.fingerprint(device_info)
+        with self._lock:
+            accounts = self._devices.get(key, ())
+            return list(accounts), len(accounts) + self._saturated.get(key, 0)
+
+    def apply_settings(self, settings):
+        with self._lock:
+            self.devices_per_user = settings.device_fingerprint_window
+            self.max_devices = settings.device_index_size
+            self.max_users = settings.device_index_size
+            while len(self._devices) > self.max_devices:
+                evicted, _ = self._devices.popitem(last=False)
+                self._saturated.pop(evicted, None)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'devices': len(self._devices),
+                'users': len(self._users),
+                'interned_values': len(self.interner),
+                'max_devices': self.max_devices,
+                'max_users': self.max_users
+            }
+
+
+def create_device_index(settings):
+    """DeviceIndex sized from settings"""
+    return DeviceIndex(
+        max_devices=settings.device_index_size,
+        max_users=settings.device_index_size,
+        devices_per_user=settings.device_fingerprint_window
+    )
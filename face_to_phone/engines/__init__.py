@@ -0,0 +1,20 @@
+"""
+Pluggable fraud detector engines
+Only the selected engine's module is imported.
+"""
+
+import importlib
+
+ENGINES = {
+    'enhanced': 'face_to_phone.engines.enhanced',
+    'advanced': 'face_to_phone.engines.advanced',
+    'simple': 'face_to_phone.engines.simple',
+    'demo': 'face_to_phone.engines.demo'
+}
+
+
+def load_engine_module(name):
+    """Import the module for an engine name"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown fraud engine '{name}' (choose from: {', '.join(ENGINES)})")
+    return importlib.import_module(ENGINES[name])
@@ -0,0 +1,43 @@
+"""
+Interface shared by all fraud detector engines
+"""
+
+
+class FraudEngine:
+    """Base class for pluggable fraud detector engines"""
+    name = 'base'
+    ai_features = None
+    
+    def analyze_transaction(self, transaction_data):
+        """Score a transaction and return the fraud analysis dict"""
+        raise NotImplementedError
+    
+    def record_transaction(self, transaction):
+        """Called after a scored transaction is added to the shared history"""
+    
+    def enrich_enrollment(self, user_id, data, result):
+        """Add engine-specific data to a biometric enrollment response"""
+        return result
+    
+    def enrich_verification(self, user_id, data, result):
+        """Add engine-specific data to a biometric verification response"""
+        return result
+    
+    def learn(self, transaction_id, is_fraud):
+        """Update online models with a ground-truth label; False if nothing was learned"""
+        return False
+    
+    def model_stats(self):
+        """State of the engine's online models (None if it has none)"""
+        return None
+    
+    def apply_settings(self):
+        """Called after settings were reloaded, to resize bounded structures"""
+    
+    def loaded_components(self):
+        """Which lazily loaded components are in memory"""
+        return {}
+    
+    def warm_up(self):
+        """Start loading heavy components in the background"""
+        return None
@@ -0,0 +1,83 @@
+"""
+Demo engine
+Rule-based detection against the shared transaction history
+"""
+
+
+from face_to_phone.clock import WallClock
+from face_to_phone.engines.base import FraudEngine
+
+class DemoFraudDetector(FraudEngine):
+    name = 'demo'
+    
+    def __init__(self, transaction_history, clock=None):
+        self.clock = clock or WallClock()
+        self.transaction_patterns = []
+        self.transaction_history = transaction_history
+        
+    def analyze_transaction(self, transaction_data):
+        """Simple rule-based fraud detection"""
+        try:
+            transaction_history = self.transaction_history
+            amount = transaction_data.get('amount', 0)
+            current_time = self.clock.event_time(transaction_data)
+            time_hour = current_time.hour
+            day_of_week = current_time.weekday()
+            
+            # Calculate time since last transaction
+            if transaction_history:
+                last_transaction_time = transaction_history[-1].get('timestamp', current_time)
+                time_diff = (current_time - last_transaction_time).total_seconds() / 3600  # hours
+            else:
+                time_diff = 24  # Default if no history
+            
+            # Calculate amount ratio to average
+            if len(transaction_history) > 0:
+                avg_amount = sum(t.get('amount', 0) for t in transaction_history[-10:]) / min(10, len(transaction_history))
+                amount_ratio = amount / avg_amount if avg_amount > 0 else 1
+            else:
+                amount_ratio = 1
+            
+            fraud_reasons = []
+            risk_score = 0
+            
+            # Large amount check
+            if amount > 10000:
+                fraud_reasons.append("Unusually large transaction amount")
+                risk_score += 0.3
+            
+            # Unusual time check
+            if time_hour < 6 or time_hour > 22:
+                fraud_reasons.append("Transaction at unusual time")
+                risk_score += 0.2
+            
+            # Weekend check
+            if day_of_week >= 5:  # Saturday or Sunday
+                fraud_reasons.append("Weekend transaction")
+                risk_score += 0.1
+            
+            # Rapid succession check
+            if time_diff < 0.1:  # Less than 6 minutes
+                fraud_reasons.append("Rapid succession of transactions")
+                risk_score += 0.4
+            
+            # Amount spike check
+            if amount_ratio > 5:
+                fraud_reasons.append("Amount significantly higher than average")
+                risk_score += 0.3
+            
+            is_fraud = risk_score > 0.5
+            risk_level = "high" if risk_score > 0.7 else "medium" if risk_score > 0.3 else "low"
+            
+            return {
+                "is_fraud": is_fraud,
+                "anomaly_score": -risk_score,
+                "risk_level": risk_level,
+                "reason": "; ".join(fraud_reasons) if fraud_reasons else "No suspicious patterns detected"
+            }
+                
+        except Exception as e:
+            return {"is_fraud": False, "anomaly_score": 0, "risk_level": "low", "reason": "Analysis error"}
+
+def create_engine(state):
+    return DemoFraudDetector(state.transaction_history, state.clock)
@@ -0,0 +1,621 @@
+"""
+Enhanced engine
+Rule-based scoring combined with behavioral and transaction-graph analysis
+(NumPy/scikit-learn based, loaded lazily)
+"""
+
+import math
+from collections import Counter
+
+from flask import Blueprint, request, jsonify
+
+from face_to_phone.devices import create_device_index
+from face_to_phone.clock import WallClock
+from face_to_phone.engines.base import FraudEngine
+from face_to_phone.lazy import LazyComponent, lazy_import, warm_up
+from face_to_phone.online import OnlineFraudModel
+from face_to_phone.settings import Settings
+from face_to_phone.sketches import HyperLogLog, create_fraud_sketches
+
+# NumPy and scikit-learn are imported on first use to keep startup fast
+np = lazy_import('numpy')
+
+# Inputs of the online fraud model, in vector order
+MODEL_FEATURES = [
+    'log_amount', 'hour_sin', 'hour_cos', 'weekend', 'log_amount_ratio', 'hours_since_last',
+    'behavioral_anomaly', 'graph_high_risk', 'rule_score',
+    'type_transfer', 'type_payment', 'type_withdrawal', 'type_deposit', 'type_investment'
+]
+
+def build_anomaly_detector():
+    from sklearn.ensemble import IsolationForest
+    return IsolationForest(contamination=0.1, random_state=42)
+
+def build_behavior_classifier():
+    from sklearn.ensemble import RandomForestClassifier
+    return RandomForestClassifier(n_estimators=100, random_state=42)
+
+def build_scaler():
+    from sklearn.preprocessing import StandardScaler
+    return StandardScaler()
+
+# Advanced AI Features without GPU
+class AdvancedAIFeatures:
+    def __init__(self, settings=None, device_index=None, sketches=None, clock=None):
+        self.settings = settings or Settings()
+        self.clock = clock or WallClock()
+        self.behavioral_patterns = {}
+        self.device_index = device_index or create_device_index(self.settings)
+        self.sketches = sketches or create_fraud_sketches(self.settings)
+        self.transaction_graph = {}
+        self.risk_models = {}
+        # Models are only built when something actually uses them
+        self.lazy_models = {
+            'anomaly_detector': LazyComponent('anomaly_detector', build_anomaly_detector),
+            'behavior_classifier': LazyComponent('behavior_classifier', build_behavior_classifier),
+            'scaler': LazyComponent('scaler', build_scaler)
+        }
+    
+    @property
+    def anomaly_detector(self):
+        return self.lazy_models['anomaly_detector'].get()
+    
+    @property
+    def behavior_classifier(self):
+        return self.lazy_models['behavior_classifier'].get()
+    
+    @property
+    def scaler(self):
+        return self.lazy_models['scaler'].get()
+        
+    def analyze_behavioral_patterns(self, user_id, transaction_data, now=None):
+        """Advanced behavioral analysis using machine learning"""
+        if user_id not in self.behavioral_patterns:
+            self.behavioral_patterns[user_id] = {
+                'transaction_times': [],
+                'amounts': [],
+                'locations': [],
+                'device_types': [],
+                'session_patterns': []
+            }
+        
+        # Extract behavioral features
+        current_time = now or self.clock.event_time(transaction_data)
+        features = {
+            'hour_of_day': current_time.hour,
+            'day_of_week': current_time.weekday(),
+            'amount': transaction_data.get('amount', 0),
+            'transaction_type': self.encode_transaction_type(transaction_data.get('type', 'transfer')),
+            'time_since_last': self.get_time_since_last_transaction(user_id, current_time),
+            'amount_deviation': self.calculate_amount_deviation(user_id, transaction_data.get('amount', 0)),
+            'frequency_score': self.calculate_frequency_score(user_id),
+            'session_duration': self.calculate_session_duration(user_id)
+        }
+        
+        # Update patterns
+        self.behavioral_patterns[user_id]['transaction_times'].append(current_time)
+        self.behavioral_patterns[user_id]['amounts'].append(transaction_data.get('amount', 0))
+        
+        # Keep only the last BEHAVIOR_WINDOW transactions per user
+        window = self.settings.behavior_window
+        for key in self.behavioral_patterns[user_id]:
+            if len(self.behavioral_patterns[user_id][key]) > window:
+                self.behavioral_patterns[user_id][key] = self.behavioral_patterns[user_id][key][-window:]
+        
+        return self.predict_behavioral_anomaly(user_id, features)
+    
+    def encode_transaction_type(self, transaction_type):
+        """Encode transaction type as numerical feature"""
+        type_mapping = {
+            'transfer': 1,
+            'payment': 2,
+            'withdrawal': 3,
+            'deposit': 4,
+            'investment': 5
+        }
+        return type_mapping.get(transaction_type, 1)
+    
+    def get_time_since_last_transaction(self, user_id, now=None):
+        """Calculate time since last transaction in hours"""
+        if user_id not in self.behavioral_patterns or not self.behavioral_patterns[user_id]['transaction_times']:
+            return 24  # Default 24 hours
+        
+        last_transaction = self.behavioral_patterns[user_id]['transaction_times'][-1]
+        time_diff = ((now or self.clock.now()) - last_transaction).total_seconds() / 3600
+        return time_diff
+    
+    def calculate_amount_deviation(self, user_id, current_amount):
+        """Calculate how much current amount deviates from user's typical amounts"""
+        if user_id not in self.behavioral_patterns or len(self.behavioral_patterns[user_id]['amounts']) < 3:
+            return 1.0
+        
+        amounts = self.behavioral_patterns[user_id]['amounts']
+        mean_amount = np.mean(amounts)
+        std_amount = np.std(amounts)
+        
+        if std_amount == 0:
+            return 1.0
+        
+        deviation = abs(current_amount - mean_amount) / std_amount
+        return min(deviation, 10.0)  # Cap at 10 standard deviations
+    
+    def calculate_frequency_score(self, user_id):
+        """Calculate transaction frequency score"""
+        if user_id not in self.behavioral_patterns or len(self.behavioral_patterns[user_id]['transaction_times']) < 2:
+            return 0.5
+        
+        times = self.behavioral_patterns[user_id]['transaction_times']
+        if len(times) < 2:
+            return 0.5
+        
+        # Calculate average time between transactions
+        intervals = []
+        for i in range(1, len(times)):
+            interval = (times[i] - times[i-1]).total_seconds() / 3600  # hours
+            intervals.append(interval)
+        
+        avg_interval = np.mean(intervals)
+        
+        # Normalize to 0-1 scale (higher = more frequent)
+        frequency_score = 1 / (1 + avg_interval / 24)  # Normalize by 24 hours
+        return min(frequency_score, 1.0)
+    
+    def calculate_session_duration(self, user_id):
+        """Calculate current session duration"""
+        # This would typically track actual session data
+        # For demo, we'll simulate based on transaction patterns
+        if user_id not in self.behavioral_patterns:
+            return 0
+        
+        times = self.behavioral_patterns[user_id]['transaction_times']
+        if len(times) < 2:
+            return 0
+        
+        # Calculate session duration based on recent activity
+        recent_times = times[-5:] if len(times) >= 5 else times
+        session_duration = (recent_times[-1] - recent_times[0]).total_seconds() / 3600
+        return min(session_duration, 8.0)  # Cap at 8 hours
+    
+    def predict_behavioral_anomaly(self, user_id, features):
+        """Predict if behavior is anomalous using ML"""
+        feature_vector = np.array([
+            features['hour_of_day'],
+            features['day_of_week'],
+            features['amount'],
+            features['transaction_type'],
+            features['time_since_last'],
+            features['amount_deviation'],
+            features['frequency_score'],
+            features['session_duration']
+        ]).reshape(1, -1)
+        
+        # Simple anomaly detection based on feature thresholds
+        anomaly_score = 0
+        
+        # Unusual time patterns
+        if features['hour_of_day'] < 6 or features['hour_of_day'] > 22:
+            anomaly_score += 0.3
+        
+        # High amount deviation
+        if features['amount_deviation'] > 3:
+            anomaly_score += 0.4
+        
+        # Very frequent transactions
+        if features['frequency_score'] > 0.8:
+            anomaly_score += 0.2
+        
+        # Very short time between transactions
+        if features['time_since_last'] < 0.1:  # Less than 6 minutes
+            anomaly_score += 0.5
+        
+        # Long session duration
+        if features['session_duration'] > 6:
+            anomaly_score += 0.2
+        
+        is_anomalous = anomaly_score > 0.6
+        risk_level = "high" if anomaly_score > 0.8 else "medium" if anomaly_score > 0.4 else "low"
+        
+        return {
+            "is_anomalous": is_anomalous,
+            "anomaly_score": anomaly_score,
+            "risk_level": risk_level,
+            "behavioral_features": features
+        }
+    
+    def analyze_device_fingerprint(self, user_id, device_info):
+        """Analyze device fingerprint for fraud detection"""
+        # Up to 2 changed fields from the last device still counts as the same device
+        device = self.device_index.observe(user_id, device_info, max_field_changes=2)
+        now = self.clock.event_time(device_info)
+        activity = self.sketches.observe_device(device['device_id'], device_info.get('user_agent', ''), now)
+        
+        recognized = device['known_device'] or device['similar_device'] or device['first_device']
+        result = {
+            "device_id": device['device_id'],
+            "accounts_on_device": device['accounts_on_device'],
+            "device_activity": activity
+        }
+        
+        if device['accounts_on_device'] >= self.settings.shared_device_threshold:
+            result.update({
+                "device_changed": not recognized,
+                "risk_level": "high",
+                "message": f"Device shared by {device['accounts_on_device']} accounts"
+            })
+        elif recognized:
+            result.update({
+                "device_changed": False,
+                "risk_level": "low",
+                "message": "Device recognized"
+            })
+        else:
+            result.update({
+                "device_changed": True,
+                "risk_level": "medium",
+                "message": "New device detected"
+            })
+        
+        return result
+    
+    def analyze_transaction_graph(self, user_id, transaction_data, now=None):
+        """Analyze transaction graph for network effects"""
+        if user_id not in self.transaction_graph:
+            self.transaction_graph[user_id] = {
+                'nodes': HyperLogLog(self.settings.hll_precision),  # distinct recipients, fixed size
+                'edges': [],
+                'amounts': [],
+                'timestamps': [],
+                'transaction_count': 0
+            }
+        
+        graph = self.transaction_graph[user_id]
+        
+        # Add transaction to graph
+        recipient = transaction_data.get('recipient', 'unknown')
+        amount = transaction_data.get('amount', 0)
+        timestamp = now or self.clock.event_time(transaction_data)
+        
+        graph['nodes'].add(recipient)
+        payment = self.sketches.observe_payment(user_id, recipient, timestamp)
+        graph['edges'].append({
+            'from': user_id,
+            'to': recipient,
+            'amount': amount,
+            'timestamp': timestamp
+        })
+        graph['amounts'].append(amount)
+        graph['timestamps'].append(timestamp)
+        graph['transaction_count'] += 1
+        
+        # Only the most recent GRAPH_WINDOW edges are needed for pattern checks
+        window = self.settings.graph_window
+        if len(graph['edges']) > window:
+            for key in ('edges', 'amounts', 'timestamps'):
+                graph[key] = graph[key][-window:]
+        
+        # Analyze graph patterns
+        return self.detect_graph_anomalies(graph, amount, timestamp, payment)
+    
+    def detect_graph_anomalies(self, graph, current_amount, timestamp, payment=None):
+        """Detect anomalies in transaction graph"""
+        anomalies = []
+        payment = payment or {}
+        
+        # Check for fan-out to many distinct recipients
+        if payment.get('distinct_recipients_24h', 0) > self.settings.recipient_fanout_threshold:
+            anomalies.append("Payments to unusually many distinct recipients in 24h")
+        
+        # Check for circular transactions
+        if len(graph['edges']) > 3:
+            recent_edges = graph['edges'][-5:]
+            recipients = [edge['to'] for edge in recent_edges]
+            if len(set(recipients)) < len(recipients) * 0.6:  # Too many repeated recipients
+                anomalies.append("Circular transaction pattern detected")
+        
+        # Check for amount clustering
+        if len(graph['amounts']) > 5:
+            amounts = np.array(graph['amounts'][-10:])
+            if np.std(amounts) < np.mean(amounts) * 0.1:  # Very low variance
+                anomalies.append("Suspiciously uniform transaction amounts")
+        
+        # Check for time clustering
+        if len(graph['timestamps']) > 3:
+            recent_times = graph['timestamps'][-5:]
+            intervals = [(recent_times[i] - recent_times[i-1]).total_seconds() for i in range(1, len(recent_times))]
+            if len(set([round(t, -1) for t in intervals])) < len(intervals) * 0.5:  # Too regular intervals
+                anomalies.append("Suspiciously regular transaction timing")
+        
+        risk_level = "high" if len(anomalies) > 1 else "medium" if len(anomalies) == 1 else "low"
+        
+        return {
+            "anomalies": anomalies,
+            "risk_level": risk_level,
+            "graph_size": graph['nodes'].count(),
+            "transaction_count": graph['transaction_count'],
+            "first_time_recipient": payment.get('first_time_recipient', False),
+            "distinct_recipients_24h": payment.get('distinct_recipients_24h', 0),
+            "recipient_payments_24h": payment.get('recipient_payments_24h', 0)
+        }
+
+# Enhanced Fraud Detection with Advanced AI
+class EnhancedFraudDetector(FraudEngine):
+    name = 'enhanced'
+    
+    def __init__(self, settings=None, ai_features=None, clock=None):
+        self.settings = settings or Settings()
+        self.clock = clock or WallClock()
+        self.transaction_patterns = []
+        self.anomaly_threshold = 0.3
+        self.ai_features = ai_features or AdvancedAIFeatures(self.settings, clock=self.clock)
+        self.online_model = OnlineFraudModel(MODEL_FEATURES, self.settings)
+        
+    def analyze_transaction(self, transaction_data):
+        """Enhanced fraud analysis with multiple AI techniques"""
+        try:
+            user_id = transaction_data.get('user_id', 'default_user')
+            # One timestamp for every feature of this transaction
+            now = self.clock.event_time(transaction_data)
+            
+            # Extract basic features
+            features = self.extract_features(transaction_data, now)
+            
+            # Add to history
+            self.transaction_patterns.append(features)
+            
+            # Keep only the last DETECTOR_HISTORY_SIZE transactions for efficiency
+            history_size = self.settings.detector_history_size
+            if len(self.transaction_patterns) > history_size:
+                self.transaction_patterns = self.transaction_patterns[-history_size:]
+            
+            # Multiple AI analysis techniques
+            behavioral_analysis = self.ai_features.analyze_behavioral_patterns(user_id, transaction_data, now)
+            graph_analysis = self.ai_features.analyze_transaction_graph(user_id, transaction_data, now)
+            
+            # Combine results
+            combined_risk_score = self.combine_risk_scores(features, behavioral_analysis, graph_analysis)
+            
+            # Online model stage, learning from labels alongside the rules
+            vector = self.model_features(transaction_data, features, behavioral_analysis, graph_analysis,
+                                         -combined_risk_score['anomaly_score'])
+            model_probability = self.online_model.score(transaction_data.get('id'), vector)
+            self.apply_model_verdict(combined_risk_score, model_probability)
+            
+            is_fraud = combined_risk_score['is_fraud']
+            risk_level = combined_risk_score['risk_level']
+            reason = combined_risk_score['reason']
+            
+            return {
+                "is_fraud": is_fraud,
+                "anomaly_score": combined_risk_score['anomaly_score'],
+                "risk_level": risk_level,
+                "reason": reason,
+                "behavioral_analysis": behavioral_analysis,
+                "graph_analysis": graph_analysis,
+                "ai_confidence": combined_risk_score['confidence'],
+                "model_probability": round(model_probability, 4)
+            }
+                
+        except Exception as e:
+            return {"is_fraud": False, "anomaly_score": 0, "risk_level": "low", "reason": "Analysis error"}
+    
+    def extract_features(self, transaction, now=None):
+        """Extract features from transaction data"""
+        amount = transaction.get('amount', 0)
+        current_time = now or self.clock.event_time(transaction)
+        time_hour = current_time.hour
+        day_of_week = current_time.weekday()
+        
+        # Calculate time since last transaction
+        if self.transaction_patterns:
+            last_transaction_time = current_time  # Simplified
+            time_diff = 1  # Default 1 hour
+        else:
+            time_diff = 24  # Default if no history
+        
+        # Calculate amount ratio to average
+        if len(self.transaction_patterns) > 0:
+            avg_amount = sum(t[0] for t in self.transaction_patterns[-10:]) / min(10, len(self.transaction_patterns))
+            amount_ratio = amount / avg_amount if avg_amount > 0 else 1
+        else:
+            amount_ratio = 1
+        
+        return [
+            amount,
+            time_hour,
+            day_of_week,
+            time_diff,
+            amount_ratio,
+            len(self.transaction_patterns)  # Transaction frequency
+        ]
+    
+    def combine_risk_scores(self, features, behavioral_analysis, graph_analysis):
+        """Combine multiple risk scores into final decision"""
+        amount, time_hour, day_of_week, time_diff, amount_ratio, freq = features
+        
+        # Base fraud score
+        fraud_score = 0
+        reasons = []
+        
+        # Amount-based checks
+        if amount > 10000:
+            fraud_score += 0.3
+            reasons.append("Unusually large transaction amount")
+        
+        if amount_ratio > 5:
+            fraud_score += 0.3
+            reasons.append("Amount significantly higher than average")
+        
+        # Time-based checks
+        if time_hour < 6 or time_hour > 22:
+            fraud_score += 0.2
+            reasons.append("Transaction at unusual time")
+        
+        if day_of_week >= 5:  # Weekend
+            fraud_score += 0.1
+            reasons.append("Weekend transaction")
+        
+        # Frequency checks
+        if time_diff < 0.1:  # Less than 6 minutes
+            fraud_score += 0.4
+            reasons.append("Rapid succession of transactions")
+        
+        # Add behavioral analysis
+        if behavioral_analysis['is_anomalous']:
+            fraud_score += behavioral_analysis['anomaly_score'] * 0.5
+            reasons.append("Behavioral anomaly detected")
+        
+        # Add graph analysis
+        if graph_analysis['risk_level'] == 'high':
+            fraud_score += 0.3
+            reasons.extend(graph_analysis['anomalies'])
+        
+        # Determine final risk level
+        is_fraud = fraud_score > 0.6
+        risk_level = "high" if fraud_score > 0.8 else "medium" if fraud_score > 0.4 else "low"
+        
+        return {
+            "is_fraud": is_fraud,
+            "anomaly_score": -fraud_score,
+            "risk_level": risk_level,
+            "reason": "; ".join(reasons) if reasons else "No suspicious patterns detected",
+            "confidence": min(fraud_score * 100, 100)
+        }
+    
+    def model_features(self, transaction_data, features, behavioral_analysis, graph_analysis, rule_score):
+        """Online model input vector (see MODEL_FEATURES)"""
+        amount, time_hour, day_of_week, time_diff, amount_ratio, freq = features
+        angle = 2 * math.pi * time_hour / 24
+        type_code = self.ai_features.encode_transaction_type(transaction_data.get('type', 'transfer'))
+        vector = [
+            math.log1p(max(float(amount), 0.0)),
+            math.sin(angle),
+            math.cos(angle),
+            1.0 if day_of_week >= 5 else 0.0,
+            math.log1p(max(float(amount_ratio), 0.0)),
+            min(time_diff, 24) / 24,
+            float(behavioral_analysis['anomaly_score']),
+            1.0 if graph_analysis['risk_level'] == 'high' else 0.0,
+            rule_score
+        ]
+        vector.extend(1.0 if code == type_code else 0.0 for code in range(1, 6))
+        return vector
+    
+    def apply_model_verdict(self, combined_risk_score, model_probability):
+        """Let a trained online model flag what the rules let through"""
+        model = self.online_model
+        if combined_risk_score['is_fraud'] or not model.ready or model_probability < model.threshold:
+            return
+        combined_risk_score['is_fraud'] = True
+        combined_risk_score['risk_level'] = 'high'
+        reason = f"Online model fraud probability {model_probability:.0%}"
+        if combined_risk_score['reason'] == "No suspicious patterns detected":
+            combined_risk_score['reason'] = reason
+        else:
+            combined_risk_score['reason'] += "; " + reason
+        combined_risk_score['confidence'] = max(combined_risk_score['confidence'], model_probability * 100)
+    
+    def learn(self, transaction_id, is_fraud):
+        return self.online_model.learn(transaction_id, is_fraud)
+    
+    def model_stats(self):
+        return self.online_model.stats()
+    
+    def loaded_components(self):
+        return {name: model.loaded for name, model in self.ai_features.lazy_models.items()}
+    
+    def warm_up(self):
+        return warm_up(np, *self.ai_features.lazy_models.values())
+
+def create_engine(state):
+    ai_features = AdvancedAIFeatures(state.settings, state.device_index, state.sketches, state.clock)
+    return EnhancedFraudDetector(state.settings, ai_features, state.clock)
+
+def create_blueprint(engine, state):
+    """Routes that need the enhanced engine's behavioral data"""
+    bp = Blueprint('enhanced', __name__)
+    ai_features = engine.ai_features
+    result_cache = state.result_cache
+    
+    def compute_behavioral_insights(user_id):
+        patterns = ai_features.behavioral_patterns[user_id]
+        
+        insights = []
+        
+        # Analyze transaction times
+        if patterns['transaction_times']:
+            hour_counts = Counter(t.hour for t in patterns['transaction_times'])
+            most_common_hour = hour_counts.most_common(1)[0][0]
+            insights.append(f"Most active during hour {most_common_hour}")
+        
+        # Analyze amounts
+        if patterns['amounts']:
+            avg_amount = sum(patterns['amounts']) / len(patterns['amounts'])
+            max_amount = max(patterns['amounts'])
+            insights.append(f"Average transaction: ${avg_amount:.2f}")
+            insights.append(f"Highest transaction: ${max_amount:.2f}")
+        
+        return {
+            "user_id": user_id,
+            "insights": insights,
+            "transaction_count": len(patterns['transaction_times'])
+        }
+    
+    def compute_fraud_predictions():
+        # Baselines and alarms of the global traffic monitor, kept up to date per event
+        now = state.clock.now()
+        predictions = []
+        for alarm in state.traffic.recent_alarms(now):
+            predictions.append({
+                "type": alarm['metric'],
+                "resolution": alarm['resolution'],
+                "score": alarm['score'],
+                "description": (f"{alarm['observed']} against {alarm['expected']} expected per "
+                                f"{alarm['resolution']} since {alarm['bucket_start']}")
+            })
+        
+        next_hour = state.traffic.forecast(now)
+        predictions.append({
+            "type": "fraud_next_hour",
+            "probability": next_hour['fraud_probability'],
+            "description": (f"{next_hour['expected_frauds']} fraud(s) expected in "
+                            f"{next_hour['expected_volume']} transactions this hour")
+        })
+        
+        return {
+            "predictions": predictions,
+            "total_transactions": state.transaction_count(),
+            "fraud_alerts": state.alert_count()
+        }
+    
+    @bp.route('/api/analyze-device-fingerprint', methods=['POST'])
+    def analyze_device_fingerprint():
+        """Analyze device fingerprint for fraud detection"""
+        data = request.json
+        user_id = data.get('user_id', 'demo_user')
+        device_info = data.get('device_info', {})
+        
+        result = ai_features.analyze_device_fingerprint(user_id, device_info)
+        return jsonify(result)
+    
+    @bp.route('/api/get-behavioral-insights', methods=['GET'])
+    def get_behavioral_insights():
+        """Get behavioral insights for user"""
+        user_id = request.args.get('user_id', 'demo_user')
+        
+        if user_id not in ai_features.behavioral_patterns:
+            return jsonify({
+                "message": "No behavioral data available",
+                "insights": []
+            })
+        
+        result = result_cache.get_or_compute(user_id, 'behavioral_insights',
+                                             lambda: compute_behavioral_insights(user_id))
+        return jsonify(result)
+    
+    @bp.route('/api/get-fraud-predictions', methods=['GET'])
+    def get_fraud_predictions():
+        """Get fraud predictions based on current patterns"""
+        # Constant time, and changes as the clock moves, so not cached
+        return jsonify(compute_fraud_predictions())
+    
+    return bp
@@ -0,0 +1,84 @@
+"""
+Simple engine
+Basic rules over a bounded in-memory history, no heavy dependencies
+"""
+
+from collections import deque
+
+from face_to_phone.clock import WallClock
+from face_to_phone.engines.base import FraudEngine
+from face_to_phone.settings import Settings
+
+# Simplified Fraud Detection
+class SimpleFraudDetector(FraudEngine):
+    name = 'simple'
+    
+    def __init__(self, settings=None, clock=None):
+        self.settings = settings or Settings()
+        self.clock = clock or WallClock()
+        self.transaction_history = deque(maxlen=self.settings.detector_history_size)
+        
+    def analyze_transaction(self, transaction_data):
+        """Simple fraud detection using basic rules"""
+        try:
+            amount = transaction_data.get('amount', 0)
+            current_time = self.clock.event_time(transaction_data)
+            
+            # Basic fraud detection rules
+            fraud_score = 0
+            reasons = []
+            
+            # Large amount check
+            if amount > 10000:
+                fraud_score += 0.3
+                reasons.append("Unusually large transaction amount")
+            
+            # Unusual time check
+            if current_time.hour < 6 or current_time.hour > 22:
+                fraud_score += 0.2
+                reasons.append("Transaction at unusual time")
+            
+            # Weekend check
+            if current_time.weekday() >= 5:  # Weekend
+                fraud_score += 0.1
+                reasons.append("Weekend transaction")
+            
+            # Frequency check
+            recent_transactions = [t for t in self.transaction_history if 
+                                 (current_time - t.get('timestamp', current_time)).total_seconds() < self.settings.recent_window_seconds]
+            
+            if len(recent_transactions) > 5:
+                fraud_score += 0.3
+                reasons.append("High transaction frequency")
+            
+            # Rapid succession check
+            if len(recent_transactions) > 0:
+                last_transaction = recent_transactions[-1]
+                time_diff = (current_time - last_transaction.get('timestamp', current_time)).total_seconds()
+                if time_diff < 60:  # Less than 1 minute
+                    fraud_score += 0.4
+                    reasons.append("Rapid succession of transactions")
+            
+            # Determine fraud status
+            is_fraud = fraud_score > 0.6
+            risk_level = "high" if fraud_score > 0.8 else "medium" if fraud_score > 0.4 else "low"
+            
+            return {
+                "is_fraud": is_fraud,
+                "anomaly_score": -fraud_score,
+                "risk_level": risk_level,
+                "reason": "; ".join(reasons) if reasons else "No suspicious patterns detected"
+            }
+                
+        except Exception as e:
+            return {"is_fraud": False, "anomaly_score": 0, "risk_level": "low", "reason": "Analysis error"}
+    
+    def record_transaction(self, transaction):
+        self.transaction_history.append(transaction)
+    
+    def apply_settings(self):
+        if self.transaction_history.maxlen != self.settings.detector_history_size:
+            self.transaction_history = deque(self.transaction_history, maxlen=self.settings.detector_history_size)
+
+def create_engine(state):
+    return SimpleFraudDetector(state.settings, state.clock)
@@ -0,0 +1,52 @@
+"""
+Application factory
+The detector engine and biometric backend are chosen by the [ENGINE]
+section of config.ini, overridable with FRAUD_ENGINE / BIOMETRICS_BACKEND.
+"""
+
+import os
+
+from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+try:
+    from flask_cors import CORS
+except ImportError:  # requirements-minimal.txt ships Flask only
+    CORS = None
+
+from face_to_phone.admin import register_admin_routes
+from face_to_phone.lazy import mark_ready
+from face_to_phone.routes import register_routes
+from face_to_phone.settings import ROOT_DIR, Settings
+from face_to_phone.state import AppState
+
+
+def create_app(engine=None, biometrics=None, config_path=None, settings=None):
+    """Build a Flask app wired to one fraud detector engine"""
+    settings = settings or Settings(config_path, overrides={'detector': engine, 'biometrics': biometrics})
+    
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(ROOT_DIR, 'templates'),
+        static_folder=os.path.join(ROOT_DIR, 'static')
+    )
+    if CORS is not None and settings.cors_enabled:
+        CORS(app)
+    if settings.proxy_hops:
+        # remote_addr becomes the client address as seen by the outermost trusted proxy
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=settings.proxy_hops, x_proto=settings.proxy_hops)
+    
+    state = AppState(settings)
+    app.extensions['face_to_phone'] = state
+    
+    register_routes(app, state)
+    register_admin_routes(app, state)
+    if hasattr(state.engine_module, 'create_blueprint'):
+        app.register_blueprint(state.engine_module.create_blueprint(state.engine, state))
+    
+    # Optionally load heavy components in the background instead of on first request
+    if settings.warmup_models:
+        state.engine.warm_up()
+    
+    mark_ready()
+    return app
@@ -0,0 +1,133 @@
+"""
+Idempotency keys for transaction ingestion
+Clients (the payment switch) retry on timeouts with the same Idempotency-Key.
+The first request with a key is processed; retries within the window get the
+stored verdict back without being rescored, stored or alerted on again.
+
+Keys live in a dict, and a timing wheel of one-second slots expires them:
+each slot holds the keys written in that second, and advancing the wheel
+drops whole slots at once. Memory stays proportional to the keys seen
+within the retry window, capped at max_keys.
+"""
+
+import threading
+import time
+
+
+class IdempotencyConflict(ValueError):
+    """Raised when a key is reused with a different request, or its first request is still running"""
+
+
+class IdempotentRequest:
+    """Fingerprint and (once finished) stored response of one idempotency key"""
+
+    __slots__ = ('fingerprint', 'response', 'done', 'slot')
+
+    def __init__(self, fingerprint, slot):
+        self.fingerprint = fingerprint
+        self.response = None
+        self.done = threading.Event()
+        self.slot = slot
+
+
+class IdempotencyIndex:
+    """Time-bounded key -> response index with timing-wheel expiry"""
+
+    def __init__(self, window_seconds, max_keys=1000000):
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._entries = {}
+        self._wheel = [set() for _ in range(window_seconds + 1)]
+        self._tick = int(time.monotonic())
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def _advance(self, now):
+        """Expire every slot the wheel has moved past since the last call"""
+        tick = int(now)
+        # After a whole idle window every slot is due, each only once
+        for elapsed in range(max(self._tick + 1, tick + 1 - len(self._wheel)), tick + 1):
+            self.expired += self._expire_slot(elapsed % len(self._wheel))
+        self._tick = max(self._tick, tick)
+
+    def _expire_slot(self, index):
+        """Drop the keys filed in one slot; returns how many were dropped"""
+        slot = self._wheel[index]
+        dropped = 0
+        for key in slot:
+            entry = self._entries.get(key)
+            # Keys still being processed are kept until they finish
+            if entry is not None and entry.slot == index and entry.done.is_set():
+                del self._entries[key]
+                dropped += 1
+        slot.clear()
+        return dropped
+
+    def _evict_oldest(self):
+        """Drop the next slots to expire until there is room (only under a flood of new keys)"""
+        for step in range(1, len(self._wheel) + 1):
+            self.evicted += self._expire_slot((self._tick + step) % len(self._wheel))
+            if len(self._entries) < self.max_keys:
+                return
+
+    def claim(self, key, fingerprint, wait=None):
+        """None if the caller should process the request, else the stored response
+
+        A retry that arrives while the first request is still running waits
+        up to wait seconds for it. Raises IdempotencyConflict when the key
+        was used for a different request or the first one doesn't finish.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_keys:
+                    self._evict_oldest()
+                index = self._tick % len(self._wheel)
+                self._entries[key] = IdempotentRequest(fingerprint, index)
+                self._wheel[index].add(key)
+                return None
+
+        if entry.fingerprint != fingerprint:
+            raise IdempotencyConflict("Idempotency key was already used for a different request")
+        if not entry.done.wait(wait) or entry.response is None:
+            raise IdempotencyConflict("A request with this idempotency key is still being processed")
+        with self._lock:
+            self.replays += 1
+        return entry.response
+
+    def complete(self, key, response):
+        """Store the response of a claimed key (its window starts now)"""
+        with self._lock:
+            self._advance(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.response = response
+            # Re-file under the current second, so retries are honoured for a full window
+            self._wheel[entry.slot].discard(key)
+            entry.slot = self._tick % len(self._wheel)
+            self._wheel[entry.slot].add(key)
+            entry.done.set()
+
+    def release(self, key):
+        """Forget a claimed key whose request failed, so a retry is processed afresh"""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._wheel[entry.slot].discard(key)
+                entry.done.set()
+
+    def stats(self):
+        with self._lock:
+            self._advance(time.monotonic())
+            return {
+                'keys': len(self._entries),
+                'max_keys': self.max_keys,
+                'window_seconds': self.window,
+                'replays': self.replays,
+                'expired': self.expired,
+                'evicted': self.evicted
+            }
@@ -0,0 +1,200 @@
+"""
+Ground-truth labels and detection quality
+Analysts confirm or dismiss alerts and label transactions; each label is
+indexed by transaction id next to the verdict the engine gave at scoring
+time. Confusion counts (per engine) are adjusted as labels arrive or
+change, so precision and recall are read from counters instead of a scan.
+
+With the transaction archive on, labels are also appended to
+<archive dir>/labels.ndjson, reloaded at startup, and can be joined to the
+archive's id column (TransactionArchive.scan_labelled). Lines that can't be
+read back (a torn append after a crash) are skipped and counted, and a torn
+tail is cut off so the next append starts on a fresh line.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from face_to_phone.cache import TTLCache
+from face_to_phone.ids import decode_id
+from face_to_phone.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+
+class LabelRecord:
+    """A transaction's label and the verdict it was scored with"""
+
+    __slots__ = ('transaction_id', 'user_id', 'is_fraud', 'flagged', 'engine', 'source', 'analyst', 'labelled_at')
+
+    def __init__(self, transaction_id, user_id, is_fraud, flagged, engine, source, analyst, labelled_at):
+        self.transaction_id = transaction_id
+        self.user_id = user_id
+        self.is_fraud = is_fraud
+        self.flagged = flagged  # None when the verdict was no longer known
+        self.engine = engine
+        self.source = source
+        self.analyst = analyst
+        self.labelled_at = labelled_at
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ConfusionCounts:
+    """True/false positives/negatives with derived precision and recall"""
+
+    __slots__ = ('tp', 'fp', 'fn', 'tn')
+
+    def __init__(self):
+        self.tp = self.fp = self.fn = self.tn = 0
+
+    def add(self, flagged, is_fraud, amount=1):
+        if flagged and is_fraud:
+            self.tp += amount
+        elif flagged:
+            self.fp += amount
+        elif is_fraud:
+            self.fn += amount
+        else:
+            self.tn += amount
+
+    def report(self):
+        precision = self.tp / (self.tp + self.fp) if self.tp + self.fp else None
+        recall = self.tp / (self.tp + self.fn) if self.tp + self.fn else None
+        f1 = 2 * precision * recall / (precision + recall) if precision and recall else None
+        return {
+            'labelled': self.tp + self.fp + self.fn + self.tn,
+            'true_positives': self.tp,
+            'false_positives': self.fp,
+            'false_negatives': self.fn,
+            'true_negatives': self.tn,
+            'precision': round(precision, 4) if precision is not None else None,
+            'recall': round(recall, 4) if recall is not None else None,
+            'f1': round(f1, 4) if f1 is not None else None
+        }
+
+
+class LabelStore:
+    """Labels by transaction id, recent verdicts waiting for a label, and quality counters"""
+
+    def __init__(self, settings, log_path=None):
+        self.max_labels = settings.label_store_size
+        # What each recent transaction was scored as, kept until it is labelled or expires
+        self.verdicts = TTLCache(settings.online_feature_cache, settings.online_label_window_seconds)
+        self._labels = OrderedDict()  # transaction id -> LabelRecord
+        self._counts = {}  # engine -> ConfusionCounts
+        self.unmatched = 0  # labels whose verdict was no longer known
+        self.evicted = 0
+        self.skipped_lines = 0  # unreadable lines in the label log
+        self._lock = threading.Lock()
+        self.log_path = log_path
+        if log_path and os.path.exists(log_path):
+            self._load(log_path)
+
+    def _load(self, path):
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            # Drop a torn tail so the next append starts on a line boundary
+            self.skipped_lines += 1
+            with open(path, 'r+b') as handle:
+                handle.truncate(complete)
+        for line in data[:complete].splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = LabelRecord(**json.loads(line))
+            except (TypeError, ValueError):
+                self.skipped_lines += 1
+                continue
+            self._store(record)
+
+    def record_verdict(self, transaction, flagged, engine):
+        """Remember how a transaction was scored, for when its label comes in"""
+        self.verdicts.put(transaction['id'], (transaction['user_id'], bool(flagged), engine))
+
+    def label(self, transaction_id, is_fraud, source, analyst=None, now=None):
+        """Store a label; returns (record, changed), changed False when it repeats the current label"""
+        with self._lock:
+            current = self._labels.get(transaction_id)
+        if current is not None and current.is_fraud == is_fraud:
+            return current, False
+
+        if current is not None:
+            user_id, flagged, engine = current.user_id, current.flagged, current.engine
+        else:
+            user_id, flagged, engine = self.verdicts.get(transaction_id, (None, None, None))
+        record = LabelRecord(transaction_id, user_id, is_fraud, flagged, engine, source, analyst,
+                             now.isoformat() if now else None)
+        self._store(record)
+        if self.log_path:
+            with self._lock, open(self.log_path, 'a') as handle:
+                handle.write(json.dumps(record.as_dict()) + '\n')
+        return record, True
+
+    def _store(self, record):
+        with self._lock:
+            previous = self._labels.pop(record.transaction_id, None)
+            if previous is not None:
+                self._count(previous, -1)
+            self._labels[record.transaction_id] = record
+            self._count(record, 1)
+            while len(self._labels) > self.max_labels:
+                # Counters keep the evicted labels' contribution
+                self._labels.popitem(last=False)
+                self.evicted += 1
+
+    def _count(self, record, amount):
+        if record.flagged is None:
+            self.unmatched += amount
+            return
+        counts = self._counts.get(record.engine)
+        if counts is None:
+            counts = self._counts[record.engine] = ConfusionCounts()
+        counts.add(record.flagged, record.is_fraud, amount)
+
+    def get(self, transaction_id):
+        with self._lock:
+            return self._labels.get(transaction_id)
+
+    def quality(self):
+        """Precision/recall overall and per engine"""
+        with self._lock:
+            overall = ConfusionCounts()
+            by_engine = {}
+            for engine, counts in self._counts.items():
+                for name in ConfusionCounts.__slots__:
+                    setattr(overall, name, getattr(overall, name) + getattr(counts, name))
+                by_engine[engine] = counts.report()
+            return dict(overall.report(), by_engine=by_engine, unmatched_labels=self.unmatched)
+
+    def arrays(self):
+        """(sorted uint64 ids, uint8 labels) of labelled generated ids, for joining to the archive"""
+        with self._lock:
+            pairs = []
+            for transaction_id, record in self._labels.items():
+                try:
+                    pairs.append((decode_id(str(transaction_id)), 1 if record.is_fraud else 0))
+                except ValueError:
+                    continue
+        pairs = [(number, label) for number, label in pairs if 0 < number < 1 << 64]
+        pairs.sort()
+        ids = np.array([number for number, _ in pairs], dtype=np.uint64)
+        labels = np.array([label for _, label in pairs], dtype=np.uint8)
+        return ids, labels
+
+    def stats(self):
+        with self._lock:
+            return {
+                'labels': len(self._labels),
+                'max_labels': self.max_labels,
+                'evicted': self.evicted,
+                'unmatched': self.unmatched,
+                'skipped_lines': self.skipped_lines,
+                'pending_verdicts': len(self.verdicts),
+                'log_path': self.log_path
+            }
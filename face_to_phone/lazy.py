@@ -0,0 +1,116 @@
+"""
+Lazy loading for heavy components
+NumPy, scikit-learn and model construction are deferred until first use
+so that the web process becomes ready as soon as Flask is imported.
+"""
+
+import importlib
+import threading
+import time
+
+_process_started = time.perf_counter()
+_timings = {}
+_timings_lock = threading.Lock()
+_failures = {}
+_modules = {}
+_modules_lock = threading.Lock()
+
+
+def record_timing(name, seconds):
+    """Record how long loading a component took"""
+    with _timings_lock:
+        _timings[name] = round(seconds * 1000, 2)
+
+
+class LazyModule:
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    started = time.perf_counter()
+                    module = importlib.import_module(self._name)
+                    record_timing(f"import {self._name}", time.perf_counter() - started)
+                    self._module = module
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+
+class LazyComponent:
+    """Builds an expensive object once, on first use"""
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    instance = self._factory()
+                    record_timing(f"build {self.name}", time.perf_counter() - started)
+                    self._instance = instance
+        return self._instance
+
+    @property
+    def loaded(self):
+        return self._instance is not None
+
+
+def lazy_import(name):
+    """Return a shared lazy proxy for a module"""
+    with _modules_lock:
+        if name not in _modules:
+            _modules[name] = LazyModule(name)
+        return _modules[name]
+
+
+def warm_up(*components):
+    """Load modules/components in a background thread"""
+    def run():
+        for component in components:
+            is_module = isinstance(component, LazyModule)
+            try:
+                if is_module:
+                    component.load()
+                else:
+                    component.get()
+            except Exception as e:
+                with _timings_lock:
+                    _failures[component._name if is_module else component.name] = str(e)
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def mark_ready(name="app ready"):
+    """Record the time since this module was first imported"""
+    record_timing(name, time.perf_counter() - _process_started)
+
+
+def import_report():
+    """Import-time breakdown in milliseconds, slowest first"""
+    with _timings_lock:
+        timings = dict(sorted(_timings.items(), key=lambda item: item[1], reverse=True))
+    return {
+        "timings_ms": timings,
+        "failures": dict(_failures),
+        "lazy_modules": {name: module.loaded for name, module in _modules.items()},
+        "uptime_seconds": round(time.perf_counter() - _process_started, 2)
+    }
@@ -0,0 +1,129 @@
+"""
+Online fraud model
+A logistic regression trained one labelled transaction at a time, so the
+model follows fraud patterns as they shift instead of waiting for a batch
+retrain. Weights are a fixed-size list updated with per-coordinate
+(AdaGrad) step sizes: an update is a few microseconds of plain Python and
+memory never grows with the number of labels.
+
+Labels usually arrive after scoring (a label sent with the transaction,
+analyst feedback, chargebacks), so the feature vector a transaction was
+scored with is kept for a while under its id and the update reuses it.
+"""
+
+import math
+import threading
+
+from face_to_phone.cache import TTLCache
+
+LABELS = {
+    'fraud': True, 'fraudulent': True, 'true': True, '1': True,
+    'legitimate': False, 'legit': False, 'genuine': False, 'false': False, '0': False
+}
+
+
+def parse_label(value):
+    """True (fraud) / False (legitimate) from a bool, 0/1 or a label name; raises ValueError"""
+    if isinstance(value, bool):
+        return value
+    label = LABELS.get(str(value).strip().lower())
+    if label is None:
+        raise ValueError(f"Label must be fraud or legitimate, got '{value}'")
+    return label
+
+
+class OnlineLogisticRegression:
+    """Logistic regression updated per example (AdaGrad SGD with L2)"""
+
+    def __init__(self, features, learning_rate=0.1, l2=0.0001):
+        self.features = features
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.weights = [0.0] * (features + 1)  # last one is the bias
+        self._squared = [0.0] * (features + 1)
+        self._lock = threading.Lock()
+        self.updates = 0
+        self.positives = 0
+
+    def probability(self, vector):
+        weights = self.weights
+        z = weights[-1]
+        for weight, value in zip(weights, vector):
+            z += weight * value
+        # Clamp so exp() can't overflow on extreme inputs
+        return 1 / (1 + math.exp(-max(-30.0, min(30.0, z))))
+
+    def update(self, vector, label, weight=1.0):
+        """One gradient step on a labelled example; returns the probability before it"""
+        target = 1.0 if label else 0.0
+        with self._lock:
+            predicted = self.probability(vector)
+            error = (predicted - target) * weight
+            weights, squared = self.weights, self._squared
+            for index, value in enumerate(vector):
+                gradient = error * value + self.l2 * weights[index]
+                squared[index] += gradient * gradient
+                if squared[index]:
+                    weights[index] -= self.learning_rate * gradient / math.sqrt(squared[index])
+            squared[-1] += error * error
+            if squared[-1]:
+                weights[-1] -= self.learning_rate * error / math.sqrt(squared[-1])
+            self.updates += 1
+            self.positives += target
+        return predicted
+
+    def stats(self):
+        with self._lock:
+            return {
+                'updates': self.updates,
+                'fraud_labels': int(self.positives),
+                'weights': [round(weight, 4) for weight in self.weights]
+            }
+
+
+class OnlineFraudModel:
+    """Online learner plus the scored feature vectors waiting for a label"""
+
+    def __init__(self, feature_names, settings=None):
+        self.settings = settings
+        self.feature_names = feature_names
+        self.model = OnlineLogisticRegression(len(feature_names),
+                                              settings.online_learning_rate if settings else 0.1)
+        self.pending = TTLCache(settings.online_feature_cache if settings else 100000,
+                                settings.online_label_window_seconds if settings else 7 * 86400)
+
+    @property
+    def ready(self):
+        """Whether enough labels came in for the model to take part in decisions"""
+        min_labels = self.settings.online_min_labels if self.settings else 100
+        return self.model.updates >= min_labels
+
+    @property
+    def fraud_weight(self):
+        """Labelled fraud is rare, so it is weighted up to keep the model from settling on 'never fraud'"""
+        return self.settings.online_fraud_weight if self.settings else 5.0
+
+    @property
+    def threshold(self):
+        return self.settings.online_threshold if self.settings else 0.8
+
+    def score(self, transaction_id, vector):
+        """Fraud probability of a transaction, remembering its features for a later label"""
+        if transaction_id is not None:
+            self.pending.put(transaction_id, vector)
+        return self.model.probability(vector)
+
+    def learn(self, transaction_id, is_fraud):
+        """Update from a label; False if the transaction's features are no longer kept"""
+        vector = self.pending.get(transaction_id)
+        if vector is None:
+            return False
+        self.model.update(vector, is_fraud, self.fraud_weight if is_fraud else 1.0)
+        return True
+
+    def stats(self):
+        stats = self.model.stats()
+        stats['weights'] = dict(zip(self.feature_names + ['bias'], stats['weights']))
+        stats['ready'] = self.ready
+        stats['pending_features'] = self.pending.stats()
+        return stats
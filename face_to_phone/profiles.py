@@ -0,0 +1,339 @@
+"""
+User profile store
+Profiles are compact __slots__ records. Hot users are answered from an LRU
+cache (a dict lookup, well under a microsecond); everyone else is a
+user -> file offset index entry and is read from disk on first use.
+
+Saves are write-behind: they update memory at once and are appended to the
+profile log by a background flusher every PROFILE_FLUSH_MS, many records
+per write. The log holds struct-packed records and is compacted at
+startup when superseded versions outweigh live ones. Saves not yet flushed
+when the process is killed are lost (a clean exit flushes them).
+
+With a persistent storage backend (STORAGE = sqlite) the flusher writes to
+it instead of the log, and cold users are read back from it.
+"""
+
+import atexit
+import logging
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+FRAME = struct.Struct('<I')  # record length
+NUMBERS = struct.Struct('<ddd')  # transaction_limit, created_at, updated_at
+STRING = struct.Struct('<H')  # string length
+AUTH_METHODS = ('face', 'voice', 'pin')
+MAX_TEXT = 200
+MAX_USER_ID = 200
+
+logger = logging.getLogger(__name__)
+
+
+def profile_user_id(user_id):
+    """A client-supplied user id as the string profiles are keyed by; raises ValueError"""
+    if isinstance(user_id, bool) or not isinstance(user_id, (str, int)):
+        raise ValueError("user_id must be a string")
+    user_id = str(user_id).strip()
+    if not user_id:
+        raise ValueError("user_id must not be empty")
+    if len(user_id) > MAX_USER_ID:
+        raise ValueError(f"user_id must be at most {MAX_USER_ID} characters")
+    return user_id
+
+
+def pack_strings(*values):
+    parts = []
+    for value in values:
+        encoded = value.encode('utf-8')
+        parts.append(STRING.pack(len(encoded)))
+        parts.append(encoded)
+    return b''.join(parts)
+
+
+def unpack_strings(data, offset, count):
+    values = []
+    for _ in range(count):
+        (length,) = STRING.unpack_from(data, offset)
+        offset += STRING.size
+        values.append(data[offset:offset + length].decode('utf-8'))
+        offset += length
+    return values
+
+
+class ProfileRecord:
+    """One user's profile (immutable once stored: saves build a new record)"""
+
+    __slots__ = ('user_id', 'display_name', 'phone', 'language', 'preferred_auth',
+                 'transaction_limit', 'created_at', 'updated_at')
+
+    # Fields clients may set
+    EDITABLE = ('display_name', 'phone', 'language', 'preferred_auth', 'transaction_limit')
+
+    def __init__(self, user_id, display_name='', phone='', language='', preferred_auth='',
+                 transaction_limit=0.0, created_at=0.0, updated_at=0.0):
+        self.user_id = user_id
+        self.display_name = display_name
+        self.phone = phone
+        self.language = language
+        self.preferred_auth = preferred_auth
+        self.transaction_limit = transaction_limit
+        self.created_at = created_at
+        self.updated_at = updated_at
+
+    def updated(self, changes, now):
+        """New record with validated changes applied; raises ValueError"""
+        values = {name: getattr(self, name) for name in self.__slots__}
+        for name in self.EDITABLE:
+            if name not in changes or changes[name] is None:
+                continue
+            value = changes[name]
+            if name == 'transaction_limit':
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    raise ValueError("transaction_limit must be a number")
+                if value < 0:
+                    raise ValueError("transaction_limit must be >= 0 (0 = no limit)")
+            else:
+                value = str(value).strip()
+                if len(value) > MAX_TEXT:
+                    raise ValueError(f"{name} must be at most {MAX_TEXT} characters")
+                if name == 'preferred_auth' and value and value not in AUTH_METHODS:
+                    raise ValueError(f"preferred_auth must be one of {', '.join(AUTH_METHODS)}")
+            values[name] = value
+        values['created_at'] = self.created_at or now
+        values['updated_at'] = now
+        return ProfileRecord(**values)
+
+    def pack(self):
+        return (NUMBERS.pack(self.transaction_limit, self.created_at, self.updated_at) +
+                pack_strings(self.user_id, self.display_name, self.phone, self.language, self.preferred_auth))
+
+    @classmethod
+    def unpack(cls, data):
+        transaction_limit, created_at, updated_at = NUMBERS.unpack_from(data)
+        user_id, display_name, phone, language, preferred_auth = unpack_strings(data, NUMBERS.size, 5)
+        return cls(user_id, display_name, phone, language, preferred_auth, transaction_limit, created_at, updated_at)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ProfileStore:
+    """LRU-cached profiles over an append-only log with write-behind flushing"""
+
+    def __init__(self, path=None, cache_size=100000, flush_interval=0.2, backend=None):
+        self.path = path if backend is None else None
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # user id -> ProfileRecord (hot users)
+        self._dirty = {}  # user id -> ProfileRecord saved but not yet on disk
+        self._offsets = {}  # user id -> offset of its latest record in the log (None in the backend)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._fd = None
+        self.hits = 0
+        self.disk_reads = 0
+        self.writes = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        if backend is not None:
+            self._offsets = dict.fromkeys(backend.profile_ids())
+        elif path:
+            self._open(path)
+        if self.persistent:
+            self._stop = threading.Event()
+            self._flusher = threading.Thread(target=self._run, args=(flush_interval,),
+                                             name='profile-flush', daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
+
+    @property
+    def persistent(self):
+        return bool(self.path) or self.backend is not None
+
+    def _open(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        live_bytes, total_bytes = self._index(path)
+        if total_bytes > 2 * live_bytes + 65536:
+            self._compact(path)
+            self._index(path)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0), 0o600)
+
+    def _index(self, path):
+        """Rebuild the user -> offset index; returns (live, total) bytes"""
+        self._offsets = {}
+        sizes = {}
+        if not os.path.exists(path):
+            return 0, 0
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        offset = 0
+        while offset + FRAME.size <= len(data):
+            (length,) = FRAME.unpack_from(data, offset)
+            end = offset + FRAME.size + length
+            if end > len(data):
+                break  # torn write at the tail
+            user_id = unpack_strings(data, offset + FRAME.size + NUMBERS.size, 1)[0]
+            self._offsets[user_id] = offset
+            sizes[user_id] = end - offset
+            offset = end
+        total = offset
+        if total < len(data):
+            # Drop a torn tail so the next append starts on a record boundary
+            with open(path, 'r+b') as handle:
+                handle.truncate(total)
+        return sum(sizes.values()), total
+
+    def _compact(self, path):
+        """Rewrite the log with only each user's latest record"""
+        with open(path, 'rb') as handle:
+            data = handle.read()
+        temporary = path + '.compact'
+        with open(temporary, 'wb') as out:
+            for offset in sorted(self._offsets.values()):
+                (length,) = FRAME.unpack_from(data, offset)
+                out.write(data[offset:offset + FRAME.size + length])
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temporary, path)
+
+    def _pread(self, size, offset):
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, size, offset)
+        # No pread (Windows): seek and read under a lock
+        with self._read_lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+    def _read(self, user_id, offset):
+        if self.backend is not None:
+            # The id may be indexed before its write reached the backend (or if the write failed)
+            packed = self.backend.load_profile(user_id)
+            return ProfileRecord.unpack(packed) if packed is not None else None
+        (length,) = FRAME.unpack(self._pread(FRAME.size, offset))
+        return ProfileRecord.unpack(self._pread(length, offset + FRAME.size))
+
+    def _remember(self, record):
+        """Put a record in the LRU (caller holds the lock)"""
+        self._cache[record.user_id] = record
+        self._cache.move_to_end(record.user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def get(self, user_id):
+        """A user's ProfileRecord, or None if they never saved one"""
+        with self._lock:
+            record = self._cache.get(user_id)
+            if record is not None:
+                self._cache.move_to_end(user_id)
+                self.hits += 1
+                return record
+            record = self._dirty.get(user_id)
+            if record is None and user_id not in self._offsets:
+                return None
+            offset = self._offsets.get(user_id)
+        if record is None:
+            # Cold user: load lazily, outside the cache lock
+            record = self._read(user_id, offset)
+            self.disk_reads += 1
+            if record is None:
+                return None
+        with self._lock:
+            # A save may have landed meanwhile; it wins
+            current = self._cache.get(user_id) or self._dirty.get(user_id)
+            if current is not None:
+                return current
+            self._remember(record)
+        return record
+
+    def save(self, user_id, changes):
+        """Create or update a profile; returns the new record (raises ValueError on bad fields)"""
+        user_id = profile_user_id(user_id)
+        record = (self.get(user_id) or ProfileRecord(user_id)).updated(changes, time.time())
+        with self._lock:
+            self._remember(record)
+            if self.persistent:
+                self._dirty[user_id] = record
+            self.writes += 1
+        return record
+
+    def flush(self):
+        """Write every pending save out in one batch (one log append + fsync, or one storage commit)"""
+        if not self.persistent:
+            return 0
+        with self._write_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, {}
+            if not dirty:
+                return 0
+            try:
+                if self.backend is not None:
+                    self.backend.save_profiles([(user_id, record.pack()) for user_id, record in dirty.items()])
+                    with self._lock:
+                        self._offsets.update(dict.fromkeys(dirty))
+                    self.flushes += 1
+                    return len(dirty)
+                frames = []
+                for record in dirty.values():
+                    packed = record.pack()
+                    frames.append(FRAME.pack(len(packed)) + packed)
+                offset = os.lseek(self._fd, 0, os.SEEK_END)
+                os.write(self._fd, b''.join(frames))
+                os.fsync(self._fd)
+            except Exception:
+                # Keep the batch for the next flush; saves made since then are newer and win
+                with self._lock:
+                    for user_id, record in dirty.items():
+                        self._dirty.setdefault(user_id, record)
+                    self.failed_flushes += 1
+                raise
+            with self._lock:
+                for user_id, frame in zip(dirty, frames):
+                    self._offsets[user_id] = offset
+                    offset += len(frame)
+            self.flushes += 1
+            return len(dirty)
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                # Keep flushing: the batch stays pending and is retried next round
+                logger.exception("Profile flush failed")
+
+    def close(self):
+        if self.persistent and not self._stop.is_set():
+            self._stop.set()
+            self.flush()
+
+    def __contains__(self, user_id):
+        return user_id in self._cache or user_id in self._dirty or user_id in self._offsets
+
+    def stats(self):
+        with self._lock:
+            return {
+                'path': self.path,
+                'backend': self.backend.name if self.backend is not None else None,
+                'cached': len(self._cache),
+                'cache_size': self.cache_size,
+                'on_disk': len(self._offsets),
+                'pending_writes': len(self._dirty),
+                'hits': self.hits,
+                'disk_reads': self.disk_reads,
+                'writes': self.writes,
+                'flushes': self.flushes,
+                'failed_flushes': self.failed_flushes
+            }
+
+
+def create_profile_store(settings, storage=None):
+    """Profiles in the storage backend when it is persistent, else in the PROFILE_STORE log"""
+    return ProfileStore(settings.profile_store or None, settings.profile_cache_size, settings.profile_flush_ms / 1000,
+                        storage if storage is not None and storage.persistent else None)
@@ -0,0 +1,291 @@
+"""
+Offline transaction replay
+Re-scores a historical CSV, NDJSON or Parquet file with a fraud engine, in
+event time (each transaction's own timestamp, never the wall clock), and
+writes one verdict per line to an NDJSON file.
+
+Work is split by a stable hash of user_id: one reader parses the file once
+and fans each row out, in batches, to the worker process that owns its
+user. Each worker scores its rows in file order with its own engine, so a
+user's history is always seen in sequence by one detector, and parsing
+costs the same whatever the worker count. Rows are read lazily and the
+per-worker queues are bounded, so memory stays flat whatever the file
+size. State
+shared across users (e.g. the enhanced engine's global amount history) is
+per worker, so verdicts can differ slightly from a single live process.
+Malformed rows (bad JSON, missing or unparsable amount/timestamp) are
+skipped and counted in the summary instead of stopping the run.
+
+    python -m face_to_phone.replay transactions.csv verdicts.ndjson --engine enhanced --workers 8
+"""
+
+import argparse
+import csv
+import json
+import math
+import multiprocessing
+import os
+import queue
+import shutil
+import time
+import zlib
+
+from face_to_phone.clock import EventClock, parse_timestamp
+from face_to_phone.devices import create_device_index
+from face_to_phone.engines import load_engine_module
+from face_to_phone.lazy import lazy_import
+from face_to_phone.settings import Settings
+from face_to_phone.sketches import create_fraud_sketches
+
+pq = lazy_import('pyarrow.parquet')
+
+PARQUET_BATCH_ROWS = 65536
+FANOUT_BATCH_ROWS = 1024  # rows per message to a worker
+FANOUT_QUEUE_BATCHES = 64  # batches waiting per worker before the reader blocks
+
+
+def read_csv(path):
+    with open(path, newline='') as handle:
+        yield from csv.DictReader(handle)
+
+
+def read_ndjson(path):
+    with open(path) as handle:
+        for line in handle:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None  # counted as a malformed row
+
+
+def read_parquet(path):
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=PARQUET_BATCH_ROWS):
+        yield from batch.to_pylist()
+
+
+READERS = {
+    '.csv': read_csv,
+    '.ndjson': read_ndjson,
+    '.jsonl': read_ndjson,
+    '.parquet': read_parquet
+}
+
+
+def read_rows(path):
+    """Raw rows of a transaction file, one dict at a time"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError(f"Unsupported file type '{extension}' (use {', '.join(READERS)})")
+    return READERS[extension](path)
+
+
+def to_transaction(row, row_number):
+    """Transaction record (as built by /api/process-transaction) from a raw row; ValueError etc. if malformed"""
+    amount = float(row.get('amount') or 0)
+    if not math.isfinite(amount):
+        raise ValueError(f"Row {row_number}: amount must be finite")
+    return {
+        'id': str(row.get('id') or row.get('transaction_id') or f"row-{row_number}"),
+        'user_id': str(row.get('user_id') or 'default_user'),
+        'amount': amount,
+        'type': row.get('type') or 'transfer',
+        'recipient': row.get('recipient') or 'unknown',
+        'timestamp': parse_timestamp(row['timestamp']),
+        'status': 'pending'
+    }
+
+
+def partition_of(user_id, partitions):
+    """Stable partition for a user (the same in every process, unlike hash())"""
+    return zlib.crc32(str(user_id).encode()) % partitions
+
+
+def numbered_rows(rows, counts):
+    """(row_number, row) of every row that is an object; the rest are counted in counts['skipped']"""
+    for row_number, row in enumerate(rows):
+        if not isinstance(row, dict):
+            counts['skipped'] += 1
+            continue
+        yield row_number, row
+
+
+def to_transactions(numbered, counts):
+    """Transactions of (row_number, row) pairs, in order; malformed rows are counted in counts['skipped']"""
+    for row_number, row in numbered:
+        try:
+            transaction = to_transaction(row, row_number)
+        except (AttributeError, KeyError, TypeError, ValueError, OverflowError):
+            counts['skipped'] += 1
+            continue
+        yield transaction
+
+
+class ReplayState:
+    """The slice of AppState that engines are built from, without Flask or biometrics"""
+
+    def __init__(self, settings):
+        self.settings = settings
+        # Time only moves with the transactions being replayed
+        self.clock = EventClock()
+        self.transaction_history = []
+        self.device_index = create_device_index(settings)
+        self.sketches = create_fraud_sketches(settings)
+
+    def add_transaction(self, transaction):
+        self.transaction_history.append(transaction)
+        limit = self.settings.max_transaction_history
+        if len(self.transaction_history) > limit * 2:
+            # Trim in batches rather than on every append
+            del self.transaction_history[:-limit]
+
+
+def verdict(transaction, analysis):
+    return {
+        'transaction_id': transaction['id'],
+        'user_id': transaction['user_id'],
+        'timestamp': transaction['timestamp'].isoformat(),
+        'is_fraud': analysis.get('is_fraud', False),
+        'risk_level': analysis.get('risk_level', 'low'),
+        'score': analysis.get('risk_score', -analysis.get('anomaly_score', 0)),
+        'reason': analysis.get('reason', '')
+    }
+
+
+def score_rows(numbered, output_path, engine_name, config_path):
+    """Score (row_number, row) pairs into a verdict file; returns (transactions, flagged, skipped rows)"""
+    settings = Settings(config_path, overrides={'detector': engine_name})
+    state = ReplayState(settings)
+    engine = load_engine_module(engine_name).create_engine(state)
+
+    transactions = flagged = 0
+    counts = {'skipped': 0}
+    with open(output_path, 'w') as out:
+        for transaction in to_transactions(numbered, counts):
+            analysis = engine.analyze_transaction(transaction)
+            # Same bookkeeping as a live request
+            state.add_transaction(transaction)
+            engine.record_transaction(transaction)
+            out.write(json.dumps(verdict(transaction, analysis)) + '\n')
+            transactions += 1
+            flagged += bool(analysis.get('is_fraud'))
+    return transactions, flagged, counts['skipped']
+
+
+def queued_rows(rows_queue):
+    """(row_number, row) pairs from the reader's batches until its end marker"""
+    while True:
+        batch = rows_queue.get()
+        if batch is None:
+            return
+        yield from batch
+
+
+def replay_worker(rows_queue, results, partition, output_path, engine_name, config_path):
+    """Worker process: score the rows the reader sends for one partition"""
+    results.put((partition, score_rows(queued_rows(rows_queue), output_path, engine_name, config_path)))
+
+
+def put(rows_queue, item, processes):
+    """Queue a batch for a worker, failing instead of blocking forever if a worker died"""
+    while True:
+        try:
+            return rows_queue.put(item, timeout=1)
+        except queue.Full:
+            check_workers(processes)
+
+
+def check_workers(processes):
+    failed = [process.name for process in processes if process.exitcode]
+    if failed:
+        raise RuntimeError(f"Replay worker failed: {', '.join(failed)}")
+
+
+def fan_out(rows, parts, engine_name, config_path, counts):
+    """Score rows across one worker process per part file; returns each worker's statistics"""
+    partitions = len(parts)
+    rows_queues = [multiprocessing.Queue(FANOUT_QUEUE_BATCHES) for _ in parts]
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=replay_worker, name=f"replay-{partition}", daemon=True,
+                                         args=(rows_queues[partition], results, partition, part, engine_name,
+                                               config_path))
+                 for partition, part in enumerate(parts)]
+    for process in processes:
+        process.start()
+    try:
+        batches = [[] for _ in parts]
+        for row_number, row in numbered_rows(rows, counts):
+            partition = partition_of(row.get('user_id') or 'default_user', partitions)
+            batch = batches[partition]
+            batch.append((row_number, row))
+            if len(batch) >= FANOUT_BATCH_ROWS:
+                put(rows_queues[partition], batch, processes)
+                batches[partition] = []
+        for rows_queue, batch in zip(rows_queues, batches):
+            if batch:
+                put(rows_queue, batch, processes)
+            put(rows_queue, None, processes)
+
+        stats = {}
+        while len(stats) < partitions:
+            try:
+                partition, result = results.get(timeout=1)
+            except queue.Empty:
+                check_workers(processes)
+                continue
+            stats[partition] = result
+        for process in processes:
+            process.join()
+        return [stats[partition] for partition in range(partitions)]
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+
+def replay(input_path, output_path, engine_name=None, workers=None, config_path=None):
+    """Replay a transaction file through an engine and write verdicts; returns run statistics"""
+    started = time.perf_counter()
+    engine_name = engine_name or Settings(config_path).detector
+    workers = workers or os.cpu_count() or 1
+
+    rows = read_rows(input_path)
+    counts = {'skipped': 0}  # rows the reader couldn't use; workers count the rest
+    if workers == 1:
+        results = [score_rows(numbered_rows(rows, counts), output_path, engine_name, config_path)]
+    else:
+        parts = [f"{output_path}.part{partition}" for partition in range(workers)]
+        results = fan_out(rows, parts, engine_name, config_path, counts)
+        # Stitch the per-partition files together
+        with open(output_path, 'wb') as out:
+            for part in parts:
+                with open(part, 'rb') as handle:
+                    shutil.copyfileobj(handle, out)
+                os.remove(part)
+
+    elapsed = time.perf_counter() - started
+    transactions = sum(count for count, _, _ in results)
+    return {
+        'engine': engine_name,
+        'workers': workers,
+        'transactions': transactions,
+        'flagged': sum(flagged for _, flagged, _ in results),
+        'skipped_rows': counts['skipped'] + sum(skipped for _, _, skipped in results),
+        'seconds': round(elapsed, 2),
+        'transactions_per_second': round(transactions / elapsed) if elapsed else 0
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score a historical transaction file in event time")
+    parser.add_argument('input', help="CSV, NDJSON (.ndjson/.jsonl) or Parquet file of transactions")
+    parser.add_argument('output', help="NDJSON file to write verdicts to")
+    parser.add_argument('--engine', help="Fraud engine (defaults to DETECTOR in config.ini)")
+    parser.add_argument('--workers', type=int, help="Worker processes (defaults to the CPU count)")
+    parser.add_argument('--config', help="Path to config.ini")
+    args = parser.parse_args(argv)
+    print(json.dumps(replay(args.input, args.output, args.engine, args.workers, args.config)))
+
+
+if __name__ == '__main__':
+    main()
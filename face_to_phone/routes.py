@@ -0,0 +1,597 @@
+"""
+HTTP routes shared by every engine
+"""
+
+import math
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from flask import request, jsonify, render_template
+
+from face_to_phone.admin import is_forwarded
+from face_to_phone.clock import MAX_CLOCK_SKEW, FutureTimestamp, parse_timestamp, utc_now
+from face_to_phone.idempotency import IdempotencyConflict
+from face_to_phone.lazy import import_report
+from face_to_phone.online import parse_label
+from face_to_phone.profiles import profile_user_id
+from face_to_phone.sessions import SessionError
+from face_to_phone.uploads import UploadError, UploadTooLarge, encoded_limit, read_stream
+from face_to_phone.workers import JobTimeout, PoolSaturated
+
+FRAUD_SCENARIOS = {
+    'large_transaction': {
+        'amount': 50000,
+        'type': 'transfer',
+        'description': 'Simulating unusually large transaction'
+    },
+    'rapid_transactions': {
+        'amount': 1000,
+        'type': 'transfer',
+        'description': 'Simulating rapid succession of transactions'
+    },
+    'unusual_time': {
+        'amount': 2000,
+        'type': 'transfer',
+        'description': 'Simulating transaction at unusual time'
+    }
+}
+
+
+
+def parse_amount(value):
+    """A transaction amount as a finite float, or None when it isn't a number"""
+    if isinstance(value, bool):
+        return None
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return amount if math.isfinite(amount) else None
+
+def register_routes(app, state):
+    """Register the core API on a Flask app"""
+    biometric_auth = state.biometric_auth
+    fraud_detector = state.engine
+    settings = state.settings
+    
+    def transaction_time(data):
+        """The one timestamp a transaction is scored at
+
+        With the event clock, a client-supplied timestamp (the payment
+        switch's event time) is used when present. It may not be ahead of
+        our wall time by more than MAX_CLOCK_SKEW, and a transaction without
+        one is stamped with wall time, so a client can neither drag the
+        clock into the future nor freeze it at an old event.
+        """
+        if settings.clock != 'event':
+            return state.clock.now()
+        now = utc_now()
+        if not data.get('timestamp'):
+            state.clock.advance(now)
+            return now
+        timestamp = parse_timestamp(data['timestamp'])
+        if timestamp > now + MAX_CLOCK_SKEW:
+            raise FutureTimestamp(f"timestamp is more than {int(MAX_CLOCK_SKEW.total_seconds())} seconds in the future")
+        state.clock.advance(timestamp)
+        return timestamp
+    
+    def client_ip():
+        """The client's address, or None behind a proxy that PROXY_HOPS doesn't account for"""
+        if not settings.proxy_hops and is_forwarded():
+            # remote_addr is the proxy's, shared by every client
+            return None
+        return request.remote_addr
+    
+    def analyze_with_timeout(transaction):
+        """Run the engine, giving up after DETECTION_TIMEOUT milliseconds (0 = no limit)
+
+        A transaction that couldn't be scored in time is held for manual
+        review rather than approved unchecked.
+        """
+        timeout_ms = settings.detection_timeout
+        if not timeout_ms:
+            return analyze_locked(transaction)
+        
+        future = state.scoring_pool.submit(analyze_locked, transaction)
+        try:
+            return future.result(timeout=timeout_ms / 1000)
+        except FutureTimeoutError:
+            # Drop it if it hasn't started yet. A running analysis can't be interrupted: it still
+            # updates the engine's history under the lock, so drop the user's cached results once it ends
+            if not future.cancel():
+                future.add_done_callback(lambda _: state.result_cache.invalidate(transaction['user_id']))
+            state.scoring_timeouts += 1
+            return {"is_fraud": True, "anomaly_score": 0, "risk_level": "review", "timed_out": True,
+                    "reason": "Analysis timed out - held for manual review"}
+    
+    def analyze_locked(transaction):
+        with state.engine_lock:
+            return fraud_detector.analyze_transaction(transaction)
+    
+    def apply_profile_limit(transaction, fraud_analysis):
+        """Flag amounts above the transaction limit the user set in their profile"""
+        profile = state.profiles.get(transaction['user_id'])
+        if profile is None or not profile.transaction_limit or transaction['amount'] <= profile.transaction_limit:
+            return
+        reason = "Amount above the user's transaction limit"
+        fraud_analysis['is_fraud'] = True
+        fraud_analysis['risk_level'] = 'high'
+        if fraud_analysis.get('reason') in (None, "No suspicious patterns detected"):
+            fraud_analysis['reason'] = reason
+        else:
+            fraud_analysis['reason'] += "; " + reason
+    
+    def score_transaction(transaction):
+        """Run fraud detection, store the transaction and raise an alert if needed"""
+        fraud_analysis = analyze_with_timeout(transaction)
+        apply_profile_limit(transaction, fraud_analysis)
+        
+        # Add to history
+        state.add_transaction(transaction, fraud_analysis['is_fraud'])
+        with state.engine_lock:
+            fraud_detector.record_transaction(transaction)
+        
+        alert = None
+        if fraud_analysis['is_fraud']:
+            alert = {
+                'id': state.ids.new_id(),
+                'transaction_id': transaction['id'],
+                'user_id': transaction['user_id'],
+                'reason': fraud_analysis['reason'],
+                'risk_level': fraud_analysis['risk_level'],
+                'timestamp': transaction['timestamp'],
+                'status': 'active'
+            }
+            if 'confidence' in fraud_analysis:
+                alert['confidence'] = fraud_analysis['confidence']
+            state.add_alert(alert)
+        
+        state.traffic.observe(transaction['timestamp'], transaction['amount'], fraud_analysis['is_fraud'])
+        state.labels.record_verdict(transaction, fraud_analysis['is_fraud'], state.engine_name)
+        if state.archive is not None:
+            state.archive.append(transaction, fraud_analysis['is_fraud'])
+        
+        return fraud_analysis, alert
+    
+    def apply_label(transaction_id, is_fraud, source, analyst=None):
+        """Store a label and train the engine's online model on it; returns (record, model updated)"""
+        record, changed = state.labels.label(transaction_id, is_fraud, source, analyst, state.clock.now())
+        learned = fraud_detector.learn(transaction_id, is_fraud) if changed else False
+        return record, learned
+    
+    def read_biometric_request(field):
+        """Request fields and the biometric sample from a JSON, multipart or raw body
+
+        Raw bodies (image/*, audio/*, application/octet-stream) take user_id
+        from the query string. Binary uploads are hashed as they stream in.
+        """
+        limit = settings.max_upload_bytes
+        keep = biometric_auth.needs_sample_bytes
+        # Reject oversized bodies before reading them (base64 JSON is ~4/3 larger)
+        if request.content_length and request.content_length > encoded_limit(limit) + 64 * 1024:
+            raise UploadTooLarge(limit)
+        
+        if request.mimetype == 'multipart/form-data':
+            data = request.form.to_dict()
+            upload = request.files.get(field)
+            sample = read_stream(upload.stream, limit, settings.upload_chunk_size, keep) if upload else None
+        elif request.is_json:
+            data = request.json
+            sample = data.get(field)
+            if sample is not None and not isinstance(sample, str):
+                raise UploadError(f"{field} must be a base64 string or data URL")
+        else:
+            data = request.args.to_dict()
+            sample = read_stream(request.stream, limit, settings.upload_chunk_size, keep)
+        
+        if sample is not None and not isinstance(sample, str) and not sample.size:
+            sample = None
+        return data, sample
+    
+    def read_frame(image_data):
+        """Decoded face frame, so its digest is known before verification (decoded on the biometric pool)"""
+        return run_biometric(biometric_auth.read_sample, image_data, biometric_auth.needs_sample_bytes)
+    
+    def biometric_timeout():
+        timeout_ms = settings.biometric_timeout_ms
+        return timeout_ms / 1000 if timeout_ms else None
+    
+    def run_biometric(fn, *args):
+        """Run biometric work on the biometric pool within BIOMETRIC_TIMEOUT_MS"""
+        return state.biometric_pool.run(fn, *args, timeout=biometric_timeout())
+    
+    @app.errorhandler(UploadTooLarge)
+    def upload_too_large(e):
+        return jsonify({"status": "error", "message": str(e)}), 413
+    
+    @app.errorhandler(UploadError)
+    def upload_error(e):
+        return jsonify({"status": "error", "message": str(e)}), 400
+    
+    @app.errorhandler(PoolSaturated)
+    def pool_saturated(e):
+        return jsonify({"status": "error", "message": str(e)}), 429, {'Retry-After': '1'}
+    
+    @app.errorhandler(JobTimeout)
+    def job_timeout(e):
+        return jsonify({"status": "error", "message": "Biometric processing timed out"}), 504
+    
+    @app.errorhandler(IdempotencyConflict)
+    def idempotency_conflict(e):
+        return jsonify({"status": "error", "message": str(e)}), 409
+    
+    @app.errorhandler(SessionError)
+    def session_error(e):
+        return jsonify({"status": "error", "message": str(e)}), 401
+    
+    def check_duplicate_enrollment(user_id, modality, result):
+        """Raise an alert when an enrollment matches other accounts"""
+        accounts = result.get('duplicate_accounts')
+        if accounts:
+            state.add_alert({
+                'id': state.ids.new_id(),
+                'transaction_id': None,
+                'user_id': user_id,
+                'reason': f"{modality} already enrolled on {len(accounts)} other account(s)",
+                'risk_level': 'high',
+                'timestamp': state.clock.now(),
+                'status': 'active',
+                'accounts': accounts
+            })
+        return result
+    
+    @app.route('/')
+    def index():
+        return render_template('index.html')
+    
+    @app.route('/api/enroll-face', methods=['POST'])
+    def enroll_face():
+        data, image_data = read_biometric_request('image_data')
+        user_id = data.get('user_id', 'demo_user')
+        
+        if not image_data:
+            return jsonify({"status": "error", "message": "No image data provided"})
+        
+        result = check_duplicate_enrollment(user_id, 'Face', run_biometric(biometric_auth.enroll_face, user_id, image_data))
+        return jsonify(fraud_detector.enrich_enrollment(user_id, data, result))
+    
+    @app.route('/api/verify-face', methods=['POST'])
+    def verify_face():
+        data, image_data = read_biometric_request('image_data')
+        user_id = data.get('user_id', 'demo_user')
+        
+        if not image_data:
+            return jsonify({"status": "error", "message": "No image data provided"})
+        
+        # Concurrent verifications are batched onto the biometric pool
+        image = read_frame(image_data)
+        result = state.face_verifier.run(user_id, image, timeout=biometric_timeout())
+        if result.get('verified'):
+            # Continuous monitoring re-checks against this session via /api/verify-session
+            result['session_token'] = state.sessions.start(user_id, image.sha256, result)
+        return jsonify(fraud_detector.enrich_verification(user_id, data, result))
+    
+    @app.route('/api/verify-session', methods=['POST'])
+    def verify_session():
+        """Continuous face check against a session opened by /api/verify-face"""
+        data, image_data = read_biometric_request('image_data')
+        token = data.get('session_token') or request.headers.get('X-Session-Token')
+        if not token:
+            raise SessionError("No session token provided")
+        session_id, session = state.sessions.lookup(token)
+        
+        if not image_data:
+            return jsonify({"status": "error", "message": "No image data provided"})
+        
+        # An unchanged frame reuses the last verified result
+        image = read_frame(image_data)
+        cached = state.sessions.cached_result(session, image.sha256)
+        if cached is not None:
+            return jsonify(dict(cached, cached=True, session_token=token))
+        
+        result = state.face_verifier.run(session.user_id, image, timeout=biometric_timeout())
+        if result.get('verified'):
+            result['session_token'] = state.sessions.renew(session_id, session, image.sha256, result)
+        else:
+            state.sessions.end(session_id)
+        result['cached'] = False
+        return jsonify(fraud_detector.enrich_verification(session.user_id, data, result))
+    
+    @app.route('/api/enroll-voice', methods=['POST'])
+    def enroll_voice():
+        data, audio_data = read_biometric_request('audio_data')
+        user_id = data.get('user_id', 'demo_user')
+        
+        if not audio_data:
+            return jsonify({"status": "error", "message": "No audio data provided"})
+        
+        result = check_duplicate_enrollment(user_id, 'Voice', run_biometric(biometric_auth.enroll_voice, user_id, audio_data))
+        return jsonify(fraud_detector.enrich_enrollment(user_id, data, result))
+    
+    @app.route('/api/verify-voice', methods=['POST'])
+    def verify_voice():
+        data, audio_data = read_biometric_request('audio_data')
+        user_id = data.get('user_id', 'demo_user')
+        
+        if not audio_data:
+            return jsonify({"status": "error", "message": "No audio data provided"})
+        
+        result = state.voice_verifier.run(user_id, audio_data, timeout=biometric_timeout())
+        return jsonify(fraud_detector.enrich_verification(user_id, data, result))
+    
+    @app.route('/api/get-enrollment-status', methods=['GET'])
+    def get_enrollment_status():
+        user_id = request.args.get('user_id', 'demo_user')
+        result = biometric_auth.get_enrollment_status(user_id)
+        return jsonify(result)
+    
+    @app.route('/api/setup-pin', methods=['POST'])
+    def setup_pin():
+        data = request.json
+        pin = data.get('pin')
+        user_id = data.get('user_id', 'demo_user')
+        
+        result = biometric_auth.setup_pin(user_id, pin)
+        return jsonify(result)
+    
+    @app.route('/api/verify-pin', methods=['POST'])
+    def verify_pin():
+        data = request.json
+        pin = data.get('pin')
+        user_id = data.get('user_id', 'demo_user')
+        
+        if not pin:
+            return jsonify({"status": "error", "message": "No PIN provided"})
+        
+        # Failed attempts are also counted per client IP, and per device_id when one is sent
+        # (the IP is always counted when known, so rotating device ids doesn't escape the device limit)
+        ip = client_ip()
+        device_ids = [f"ip:{ip}" if ip else None, data.get('device_id')]
+        result = biometric_auth.verify_pin(user_id, pin, device_ids)
+        if result.get('retry_after'):
+            return jsonify(result), 429, {'Retry-After': str(result['retry_after'])}
+        return jsonify(result)
+    
+    @app.route('/api/process-transaction', methods=['POST'])
+    def process_transaction():
+        data = request.json
+        user_id = data.get('user_id', 'demo_user')
+        amount = parse_amount(data.get('amount', 0))
+        if amount is None:
+            return jsonify({"status": "error", "message": "amount must be a number"}), 400
+        transaction_type = data.get('type', 'transfer')
+        recipient = data.get('recipient', 'unknown')
+        try:
+            timestamp = transaction_time(data)
+        except FutureTimestamp as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        except (TypeError, ValueError, OverflowError):
+            return jsonify({"status": "error", "message": "timestamp must be ISO 8601 or epoch seconds/milliseconds"}), 400
+        # Ground truth known up front (e.g. a reconciled or test transaction) trains the online model
+        label = data.get('label')
+        if label is not None:
+            try:
+                label = parse_label(label)
+            except ValueError as e:
+                return jsonify({"status": "error", "message": str(e)}), 400
+        
+        # Retries carrying the same Idempotency-Key get the first verdict back, unscored
+        key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+        if key:
+            key = (user_id, key)
+            wait = settings.detection_timeout / 1000 or None
+            stored = state.idempotency.claim(key, (amount, transaction_type, recipient), wait)
+            if stored is not None:
+                return jsonify(stored), 200, {'Idempotent-Replayed': 'true'}
+        
+        try:
+            # Create transaction record
+            transaction = {
+                'id': state.ids.new_id(),
+                'user_id': user_id,
+                'amount': amount,
+                'type': transaction_type,
+                'recipient': recipient,
+                'timestamp': timestamp,
+                'status': 'pending'
+            }
+            
+            fraud_analysis, alert = score_transaction(transaction)
+            
+            # Generate response
+            response = {
+                'transaction_id': transaction['id'],
+                'fraud_analysis': fraud_analysis,
+                'timestamp': transaction['timestamp'].isoformat()
+            }
+            if alert:
+                response['alert'] = alert
+            if label is not None:
+                response['model_updated'] = apply_label(transaction['id'], label, 'ingest')[1]
+        except Exception:
+            if key:
+                state.idempotency.release(key)
+            raise
+        
+        if key:
+            state.idempotency.complete(key, response)
+        return jsonify(response)
+    
+    @app.route('/api/get-alerts', methods=['GET'])
+    def get_alerts():
+        """Latest alerts, optionally for one user_id and/or status"""
+        limit = max(1, min(request.args.get('limit', 10, type=int), 1000))
+        user_id = request.args.get('user_id')
+        return jsonify({
+            'alerts': state.recent_alerts(limit, user_id, request.args.get('status')),
+            'total_count': state.alert_count()
+        })
+    
+    @app.route('/api/update-alert', methods=['POST'])
+    def update_alert():
+        """Analyst review: confirm (fraud) or dismiss (legitimate) an alert"""
+        data = request.json
+        status = data.get('status')
+        if status not in ('confirmed', 'dismissed'):
+            return jsonify({"status": "error", "message": "status must be confirmed or dismissed"}), 400
+        alerts = state.find_alerts(alert_id=data.get('alert_id'))
+        if not alerts:
+            return jsonify({"status": "error", "message": "Alert not found"}), 404
+        
+        alert = alerts[0]
+        analyst = data.get('analyst')
+        state.set_alert_status(alert, status, analyst)
+        response = {"status": "success", "alert": alert}
+        if alert['transaction_id'] is not None:
+            record, learned = apply_label(alert['transaction_id'], status == 'confirmed', 'alert_review', analyst)
+            response['label'] = record.as_dict()
+            response['model_updated'] = learned
+        return jsonify(response)
+    
+    @app.route('/api/label-transaction', methods=['POST'])
+    def label_transaction():
+        """Analyst label for any scored transaction (e.g. a reported fraud that was let through)"""
+        data = request.json
+        transaction_id = data.get('transaction_id')
+        if not transaction_id:
+            return jsonify({"status": "error", "message": "No transaction_id provided"}), 400
+        try:
+            is_fraud = parse_label(data.get('label'))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        if (state.labels.verdicts.get(transaction_id) is None and state.labels.get(transaction_id) is None
+                and state.find_transaction(transaction_id) is None):
+            return jsonify({"status": "error", "message": "Transaction not found"}), 404
+        
+        analyst = data.get('analyst')
+        record, learned = apply_label(transaction_id, is_fraud, 'analyst', analyst)
+        # Open alerts on the transaction follow the label
+        for alert in state.find_alerts(transaction_id=transaction_id):
+            if alert['status'] == 'active':
+                state.set_alert_status(alert, 'confirmed' if is_fraud else 'dismissed', analyst)
+        return jsonify({"status": "success", "label": record.as_dict(), "model_updated": learned})
+    
+    @app.route('/api/get-detection-quality', methods=['GET'])
+    def get_detection_quality():
+        """Precision/recall of the fraud verdicts against analyst labels (running counters)"""
+        return jsonify(state.labels.quality())
+    
+    @app.route('/api/get-activity-rollups', methods=['GET'])
+    def get_activity_rollups():
+        """Hourly or daily transaction/alert counters"""
+        resolution = request.args.get('resolution', 'hourly')
+        if resolution not in ('hourly', 'daily'):
+            return jsonify({"status": "error", "message": "resolution must be hourly or daily"}), 400
+        limit = request.args.get('limit', 24, type=int)
+        
+        return jsonify({
+            'resolution': resolution,
+            'buckets': state.aggregates.rollup(resolution, max(1, limit)),
+            'totals': state.aggregates.summary()
+        })
+    
+    @app.route('/api/get-traffic-status', methods=['GET'])
+    def get_traffic_status():
+        """Global volume/fraud baselines, forecasts and anomaly alarms"""
+        limit = request.args.get('limit', 10, type=int)
+        now = state.clock.now()
+        return jsonify(dict(state.traffic.status(now, max(1, limit)),
+                            next_hour=state.traffic.forecast(now)))
+    
+    @app.route('/api/get-transactions', methods=['GET'])
+    def get_transactions():
+        """Latest transactions, optionally for one user_id"""
+        limit = max(1, min(request.args.get('limit', 20, type=int), 1000))
+        user_id = request.args.get('user_id')
+        return jsonify({
+            'transactions': state.recent_transactions(limit, user_id),
+            'total_count': state.transaction_count(user_id)
+        })
+    
+    @app.route('/api/simulate-fraud', methods=['POST'])
+    def simulate_fraud():
+        """Simulate various fraud scenarios for demo"""
+        data = request.json
+        scenario = data.get('scenario', 'large_transaction')
+        scenario_data = FRAUD_SCENARIOS.get(scenario, FRAUD_SCENARIOS['large_transaction'])
+        
+        # Process the fraudulent transaction
+        transaction = {
+            'id': state.ids.new_id(),
+            'user_id': 'fraud_user',
+            'amount': scenario_data['amount'],
+            'type': scenario_data['type'],
+            'recipient': 'fraud_recipient',
+            'timestamp': state.clock.now(),
+            'status': 'pending'
+        }
+        
+        fraud_analysis, alert = score_transaction(transaction)
+        
+        response = {
+            'scenario': scenario,
+            'description': scenario_data['description'],
+            'transaction_id': transaction['id'],
+            'fraud_analysis': fraud_analysis,
+            'timestamp': transaction['timestamp'].isoformat()
+        }
+        if alert:
+            response['alert'] = alert
+        
+        return jsonify(response)
+    
+    @app.route('/api/save-user-profile', methods=['POST'])
+    def save_user_profile():
+        data = request.json
+        try:
+            user_id = profile_user_id(data.get('user_id', 'demo_user'))
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        if data.get('transaction_limit') is not None:
+            # The limit changes how the user's payments are scored, so only the verified owner may set it
+            token = data.get('session_token') or request.headers.get('X-Session-Token')
+            if not token:
+                raise SessionError("transaction_limit requires a session_token from /api/verify-face")
+            _, session = state.sessions.lookup(token)
+            if session.user_id != user_id:
+                raise SessionError("Session belongs to another user")
+        
+        try:
+            profile = state.profiles.save(user_id, data)
+        except ValueError as e:
+            return jsonify({"status": "error", "message": str(e)}), 400
+        
+        return jsonify({
+            "status": "success",
+            "message": "User profile saved successfully",
+            "user_id": profile.user_id,
+            "user_profile": profile.as_dict()
+        })
+    
+    @app.route('/api/get-user-profile', methods=['GET'])
+    def get_user_profile():
+        user_id = request.args.get('user_id', 'demo_user')
+        
+        profile = state.profiles.get(user_id)
+        user_profile = profile.as_dict() if profile is not None else {"user_id": user_id}
+        user_profile['is_registered'] = profile is not None
+        user_profile.update(biometric_auth.get_enrollment_status(user_id))
+        return jsonify({
+            "status": "success",
+            "user_profile": user_profile
+        })
+    
+    @app.route('/api/health', methods=['GET'])
+    def health():
+        """503 when the storage backend is losing writes"""
+        storage = state.storage.health()
+        ok = storage['ok']
+        return jsonify({"status": "ok" if ok else "degraded", "storage": storage}), 200 if ok else 503
+    
+    @app.route('/api/startup-report', methods=['GET'])
+    def startup_report():
+        """Import-time breakdown and which heavy components are loaded"""
+        report = import_report()
+        report['engine'] = state.engine_name
+        report['models_loaded'] = fraud_detector.loaded_components()
+        return jsonify(report)
@@ -0,0 +1,131 @@
+"""
+Verification sessions
+A successful face verification opens a short-lived session identified by an
+HMAC-signed token. Continuous monitoring then sends frames against the
+session: a frame whose digest matches the last verified one reuses the
+cached result, and only a changed frame pays for a full verification. A
+failed re-verification closes the session.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+
+from face_to_phone.cache import TTLCache
+
+
+class SessionError(ValueError):
+    """Raised for a session token that is malformed, forged, expired or revoked"""
+
+
+def encode_token_part(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_token_part(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SessionTokens:
+    """Signs and checks '<payload>.<signature>' tokens carrying session id, expiry and user"""
+
+    def __init__(self, secret):
+        self.key = secret.encode() if isinstance(secret, str) else secret
+
+    def sign(self, payload):
+        return hmac.new(self.key, payload, hashlib.sha256).digest()
+
+    def issue(self, session_id, user_id, expires_at):
+        # user_id goes last since it may itself contain ':'
+        payload = f"{session_id}:{int(expires_at)}:{user_id}".encode()
+        return f"{encode_token_part(payload)}.{encode_token_part(self.sign(payload))}"
+
+    def read(self, token, now=None):
+        """(session_id, user_id) of a valid token, or raise SessionError"""
+        try:
+            payload_text, signature_text = token.split('.')
+            payload, signature = decode_token_part(payload_text), decode_token_part(signature_text)
+        except (AttributeError, ValueError):
+            raise SessionError("Malformed session token")
+        if not hmac.compare_digest(self.sign(payload), signature):
+            raise SessionError("Invalid session token")
+        session_id, expires_at, user_id = payload.decode().split(':', 2)
+        if int(expires_at) <= (time.time() if now is None else now):
+            raise SessionError("Session expired")
+        return session_id, user_id
+
+
+class Session:
+    """Last verified state of one session"""
+
+    __slots__ = ('user_id', 'frame_hash', 'result', 'verified_at')
+
+    def __init__(self, user_id, frame_hash, result):
+        self.user_id = user_id
+        self.frame_hash = frame_hash
+        self.result = dict(result)
+        self.verified_at = time.time()
+
+
+class VerificationSessions:
+    """Signed session tokens backed by a bounded TTL cache of verified states"""
+
+    def __init__(self, settings=None):
+        self.settings = settings
+        self.ttl = settings.session_ttl_seconds if settings else 300
+        # Without a configured secret, tokens are only valid for this process's lifetime
+        secret = settings.session_secret if settings else ''
+        self.tokens = SessionTokens(secret or os.urandom(32))
+        self.cache = TTLCache(settings.session_cache_size if settings else 100000, self.ttl)
+        self._lock = threading.Lock()
+        self.full_checks = 0
+        self.reused_checks = 0
+
+    def start(self, user_id, frame_hash, result):
+        """Open a session after a successful verification; returns its token"""
+        session_id = secrets.token_urlsafe(12)
+        self.cache.put(session_id, Session(user_id, frame_hash, result))
+        return self.tokens.issue(session_id, user_id, time.time() + self.ttl)
+
+    def lookup(self, token):
+        """(session_id, Session) for a token, or raise SessionError"""
+        session_id, user_id = self.tokens.read(token)
+        session = self.cache.get(session_id)
+        if session is None or session.user_id != user_id:
+            raise SessionError("Session expired or ended")
+        return session_id, session
+
+    def cached_result(self, session, frame_hash):
+        """The session's last result if this frame is unchanged, else None"""
+        with self._lock:
+            if frame_hash is not None and hmac.compare_digest(frame_hash, session.frame_hash or b''):
+                self.reused_checks += 1
+                return session.result
+            self.full_checks += 1
+            return None
+
+    def renew(self, session_id, session, frame_hash, result):
+        """Record a fresh successful verification; returns a token with a new expiry"""
+        with self._lock:
+            session.frame_hash = frame_hash
+            session.result = dict(result)
+            session.verified_at = time.time()
+        self.cache.put(session_id, session)
+        return self.tokens.issue(session_id, session.user_id, time.time() + self.ttl)
+
+    def end(self, session_id):
+        self.cache.pop(session_id)
+
+    def stats(self):
+        with self._lock:
+            checks = self.full_checks + self.reused_checks
+            return dict(
+                self.cache.stats(),
+                full_checks=self.full_checks,
+                reused_checks=self.reused_checks,
+                reuse_rate=round(self.reused_checks / checks, 3) if checks else 0
+            )
@@ -0,0 +1,224 @@
+"""
+Typed runtime settings
+Values come from config.ini, then environment variables (F2P_<KEY>, plus a
+few legacy names such as FRAUD_ENGINE and PORT), then explicit overrides.
+Everything is validated before it replaces the live values, so a bad edit
+to config.ini never takes down a running instance.
+"""
+
+import configparser
+import os
+import threading
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CONFIG_PATH = os.path.join(ROOT_DIR, 'config.ini')
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+FALSE_VALUES = ('0', 'false', 'no', 'off')
+
+
+class SettingsError(ValueError):
+    """Raised when config.ini or an override holds invalid values"""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+class Setting:
+    """One typed, validated configuration value"""
+
+    def __init__(self, section, key, kind, default, minimum=None, maximum=None, choices=None,
+                 env=None, reloadable=True, secret=False):
+        self.section = section
+        self.key = key
+        self.name = key.lower()
+        self.kind = kind
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = choices
+        self.env_names = [f"F2P_{key}"] + ([env] if env else [])
+        self.reloadable = reloadable
+        self.secret = secret
+
+    def parse(self, raw):
+        """Convert a raw string (or value) to the setting's type and validate it"""
+        if self.kind is bool:
+            if isinstance(raw, bool):
+                value = raw
+            elif str(raw).strip().lower() in TRUE_VALUES:
+                value = True
+            elif str(raw).strip().lower() in FALSE_VALUES:
+                value = False
+            else:
+                raise ValueError(f"{self.key} must be true or false, got '{raw}'")
+        else:
+            try:
+                value = self.kind(str(raw).strip()) if self.kind is not str else str(raw).strip()
+            except ValueError:
+                raise ValueError(f"{self.key} must be {self.kind.__name__}, got '{raw}'")
+
+        if self.kind is str and self.choices is not None:
+            value = value.lower()
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"{self.key} must be >= {self.minimum}, got {value}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"{self.key} must be <= {self.maximum}, got {value}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"{self.key} must be one of {', '.join(self.choices)}, got '{value}'")
+        return value
+
+
+SCHEMA = [
+    Setting('ENGINE', 'DETECTOR', str, 'enhanced', choices=('enhanced', 'advanced', 'simple', 'demo'),
+            env='FRAUD_ENGINE', reloadable=False),
+    Setting('ENGINE', 'BIOMETRICS', str, 'simplified', choices=('simplified', 'lightweight'),
+            env='BIOMETRICS_BACKEND', reloadable=False),
+    Setting('ENGINE', 'ONLINE_LEARNING_RATE', float, 0.1, minimum=0.0001, maximum=10.0, reloadable=False),
+    Setting('ENGINE', 'ONLINE_FRAUD_WEIGHT', float, 5.0, minimum=1.0),
+    Setting('ENGINE', 'ONLINE_MIN_LABELS', int, 100, minimum=0),
+    Setting('ENGINE', 'ONLINE_THRESHOLD', float, 0.8, minimum=0.5, maximum=1.0),
+    Setting('ENGINE', 'STORAGE', str, 'memory', choices=('memory', 'sqlite'), reloadable=False),
+    Setting('ENGINE', 'CLOCK', str, 'wall', choices=('wall', 'event'), reloadable=False),
+
+    Setting('SECURITY', 'BIOMETRIC_TOLERANCE', float, 0.6, minimum=0.0),
+    Setting('SECURITY', 'VOICE_THRESHOLD', float, 70.0, minimum=0.0),
+    Setting('SECURITY', 'PIN_LENGTH', int, 4, minimum=4),
+    Setting('SECURITY', 'PIN_HASH_COST', int, 14, minimum=10, maximum=20),
+    Setting('SECURITY', 'PIN_MAX_ATTEMPTS', int, 5, minimum=1),
+    Setting('SECURITY', 'PIN_DEVICE_MAX_ATTEMPTS', int, 20, minimum=1),
+    Setting('SECURITY', 'PIN_ATTEMPT_WINDOW_SECONDS', int, 900, minimum=1, reloadable=False),
+    Setting('SECURITY', 'PIN_LOCKOUT_SECONDS', int, 900, minimum=0, reloadable=False),
+    Setting('SECURITY', 'DUPLICATE_MATCH_THRESHOLD', float, 0.9, minimum=0.5, maximum=1.0),
+    Setting('SECURITY', 'VOICE_DUPLICATE_THRESHOLD', float, 0.9, minimum=0.5, maximum=1.0),
+    Setting('SECURITY', 'MAX_UPLOAD_BYTES', int, 5000000, minimum=1024),
+    Setting('SECURITY', 'SESSION_TTL_SECONDS', int, 300, minimum=10, reloadable=False),
+    Setting('SECURITY', 'SESSION_SECRET', str, '', reloadable=False, secret=True),
+    Setting('SECURITY', 'ADMIN_TOKEN', str, '', env='ADMIN_TOKEN', secret=True),
+
+    Setting('PERFORMANCE', 'MAX_TRANSACTION_HISTORY', int, 100, minimum=1),
+    Setting('PERFORMANCE', 'MAX_ALERTS_HISTORY', int, 50, minimum=1),
+    Setting('PERFORMANCE', 'DETECTION_TIMEOUT', int, 1000, minimum=0),
+    Setting('PERFORMANCE', 'CACHE_SIZE', int, 10000, minimum=0),
+    Setting('PERFORMANCE', 'DETECTOR_HISTORY_SIZE', int, 1000, minimum=1),
+    Setting('PERFORMANCE', 'BEHAVIOR_WINDOW', int, 100, minimum=2),
+    Setting('PERFORMANCE', 'DEVICE_FINGERPRINT_WINDOW', int, 10, minimum=1),
+    Setting('PERFORMANCE', 'DEVICE_INDEX_SIZE', int, 500000, minimum=1),
+    Setting('PERFORMANCE', 'SHARED_DEVICE_THRESHOLD', int, 10, minimum=2),
+    Setting('PERFORMANCE', 'GRAPH_WINDOW', int, 100, minimum=10),
+    Setting('PERFORMANCE', 'RECENT_WINDOW_SECONDS', int, 3600, minimum=1),
+    Setting('PERFORMANCE', 'SKETCH_CAPACITY', int, 1000000, minimum=1000, reloadable=False),
+    Setting('PERFORMANCE', 'SKETCH_ERROR_RATE', float, 0.01, minimum=0.0001, maximum=0.5, reloadable=False),
+    Setting('PERFORMANCE', 'COUNT_MIN_WIDTH', int, 131072, minimum=64, reloadable=False),
+    Setting('PERFORMANCE', 'HLL_PRECISION', int, 6, minimum=4, maximum=16, reloadable=False),
+    Setting('PERFORMANCE', 'SKETCH_USERS', int, 100000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'RECIPIENT_FANOUT_THRESHOLD', int, 20, minimum=1),
+    Setting('PERFORMANCE', 'UPLOAD_CHUNK_SIZE', int, 65536, minimum=1024),
+    Setting('PERFORMANCE', 'DUPLICATE_SEARCH_BUDGET_MS', int, 50, minimum=0),
+    Setting('PERFORMANCE', 'DUPLICATE_SEARCH_WORKERS', int, 4, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'BIOMETRIC_WORKERS', int, 2, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'BIOMETRIC_QUEUE_SIZE', int, 32, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'BIOMETRIC_TIMEOUT_MS', int, 5000, minimum=0),
+    Setting('PERFORMANCE', 'BIOMETRIC_BATCH_SIZE', int, 8, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'BIOMETRIC_BATCH_WAIT_MS', int, 5, minimum=0, reloadable=False),
+    Setting('PERFORMANCE', 'PIN_HASH_WORKERS', int, 2, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'PIN_HASH_QUEUE_SIZE', int, 64, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'ATTEMPT_TRACKER_SIZE', int, 100000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'SESSION_CACHE_SIZE', int, 100000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'IDEMPOTENCY_WINDOW_SECONDS', int, 600, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'IDEMPOTENCY_MAX_KEYS', int, 1000000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'ONLINE_FEATURE_CACHE', int, 100000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'ONLINE_LABEL_WINDOW_SECONDS', int, 604800, minimum=60, reloadable=False),
+    Setting('PERFORMANCE', 'LABEL_STORE_SIZE', int, 1000000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'STORAGE_PATH', str, 'face_to_phone.db', reloadable=False),
+    Setting('PERFORMANCE', 'STORAGE_COMMIT_MS', int, 5, minimum=1, maximum=1000, reloadable=False),
+    Setting('PERFORMANCE', 'STORAGE_READERS', int, 8, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'PROFILE_STORE', str, '', reloadable=False),
+    Setting('PERFORMANCE', 'PROFILE_CACHE_SIZE', int, 100000, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'PROFILE_FLUSH_MS', int, 200, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'ARCHIVE_DIR', str, '', reloadable=False),
+    Setting('PERFORMANCE', 'ARCHIVE_CHUNK_ROWS', int, 65536, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'TRAFFIC_SMOOTHING', float, 0.1, minimum=0.001, maximum=1.0, reloadable=False),
+    Setting('PERFORMANCE', 'TRAFFIC_ALERT_THRESHOLD', float, 4.0, minimum=1.0),
+    Setting('PERFORMANCE', 'TRAFFIC_WARMUP_BUCKETS', int, 30, minimum=1),
+    Setting('PERFORMANCE', 'TRAFFIC_ALARM_HISTORY', int, 100, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'HOURLY_ROLLUP_BUCKETS', int, 48, minimum=1),
+    Setting('PERFORMANCE', 'DAILY_ROLLUP_BUCKETS', int, 30, minimum=1),
+    Setting('PERFORMANCE', 'SCORING_WORKERS', int, 4, minimum=1, reloadable=False),
+    Setting('PERFORMANCE', 'WARMUP_MODELS', bool, False, env='WARMUP_MODELS', reloadable=False),
+
+    Setting('API', 'HOST', str, '0.0.0.0', reloadable=False),
+    Setting('API', 'PORT', int, 5000, minimum=1, env='PORT', reloadable=False),
+    Setting('API', 'DEBUG', bool, False, reloadable=False),
+    Setting('API', 'CORS_ENABLED', bool, True, reloadable=False),
+    Setting('API', 'PROXY_HOPS', int, 0, minimum=0, maximum=10, reloadable=False),
+    Setting('API', 'WORKER_ID', int, -1, minimum=-1, maximum=1023, reloadable=False),
+]
+
+SCHEMA_BY_NAME = {setting.name: setting for setting in SCHEMA}
+
+
+class Settings:
+    """Live, validated settings shared by the app, engines and stores"""
+
+    def __init__(self, config_path=None, overrides=None):
+        self.config_path = config_path or os.environ.get('FACE_TO_PHONE_CONFIG', DEFAULT_CONFIG_PATH)
+        self.overrides = {name: value for name, value in (overrides or {}).items() if value is not None}
+        self._lock = threading.Lock()
+        self._values = self._load()
+
+    def _load(self):
+        config = configparser.ConfigParser()
+        config.read(self.config_path)
+
+        values = {}
+        errors = []
+        for setting in SCHEMA:
+            raw = config.get(setting.section, setting.key, fallback=setting.default)
+            for env_name in setting.env_names:
+                # An empty variable is ignored, unless empty is the setting's own "off" value
+                if os.environ.get(env_name) or (env_name in os.environ and setting.default == ''):
+                    raw = os.environ[env_name]
+                    break
+            if setting.name in self.overrides:
+                raw = self.overrides[setting.name]
+            try:
+                values[setting.name] = setting.parse(raw)
+            except ValueError as e:
+                errors.append(str(e))
+
+        if errors:
+            raise SettingsError(errors)
+        return values
+
+    def reload(self):
+        """Re-read config.ini and the environment; returns the changed settings"""
+        values = self._load()
+        with self._lock:
+            changed = {name: value for name, value in values.items() if self._values[name] != value}
+            restart_required = [name for name in changed if not SCHEMA_BY_NAME[name].reloadable]
+            for name in restart_required:
+                values[name] = self._values[name]
+            self._values = values
+
+        return {
+            "applied": {name: value for name, value in changed.items() if name not in restart_required},
+            "restart_required": restart_required
+        }
+
+    def __getattr__(self, name):
+        try:
+            return self.__dict__['_values'][name]
+        except KeyError:
+            raise AttributeError(f"Unknown setting '{name}'")
+
+    def as_dict(self):
+        """Current values grouped by section, secrets masked"""
+        sections = {}
+        for setting in SCHEMA:
+            value = self._values[setting.name]
+            if setting.secret and value:
+                value = '***'
+            sections.setdefault(setting.section, {})[setting.key] = value
+        return sections
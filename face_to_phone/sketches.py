@@ -0,0 +1,296 @@
+"""
+Approximate-membership and counting sketches
+Fixed-memory answers to "seen before?", "how often?" and "how many distinct?"
+for high-cardinality fraud signals (recipients, devices, user agents).
+Pure standard library so every engine can use them.
+"""
+
+import hashlib
+import math
+import threading
+from array import array
+from collections import OrderedDict
+
+
+def hash_pair(key):
+    """Two independent 64-bit hashes of a key (for double hashing)"""
+    if not isinstance(key, bytes):
+        key = str(key).encode()
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+
+
+class BloomFilter:
+    """Set membership with no false negatives and a tunable false-positive rate"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        h1, h2 = hash_pair(key)
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        """Add a key; returns True if it was (probably) already present"""
+        present = True
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                present = False
+                self.bits[byte] |= 1 << bit
+        if not present:
+            self.count += 1
+        return present
+
+    def __contains__(self, key):
+        for position in self._positions(key):
+            byte, bit = divmod(position, 8)
+            if not self.bits[byte] & (1 << bit):
+                return False
+        return True
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+
+class RotatingBloomFilter:
+    """Two Bloom generations; the older one is dropped when the current fills up
+
+    Memory and false-positive rate stay fixed no matter how many keys arrive;
+    keys older than roughly two generations are forgotten.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.current = BloomFilter(capacity, error_rate)
+        self.previous = None
+
+    def add(self, key):
+        present = key in self.current or (self.previous is not None and key in self.previous)
+        self.current.add(key)
+        if self.current.count >= self.capacity:
+            self.previous = self.current
+            self.current = BloomFilter(self.capacity, self.error_rate)
+        return present
+
+    def __contains__(self, key):
+        return key in self.current or (self.previous is not None and key in self.previous)
+
+    @property
+    def memory_bytes(self):
+        return self.current.memory_bytes * 2
+
+
+class CountMinSketch:
+    """Frequency estimates that never undercount, in width x depth counters"""
+
+    def __init__(self, width=1 << 17, depth=4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def add(self, key, count=1):
+        """Add to a key's count; returns the new estimate"""
+        h1, h2 = hash_pair(key)
+        estimate = None
+        for i, row in enumerate(self.rows):
+            position = (h1 + i * h2) % self.width
+            value = min(row[position] + count, 0xFFFFFFFF)
+            row[position] = value
+            estimate = value if estimate is None else min(estimate, value)
+        self.total += count
+        return estimate
+
+    def estimate(self, key):
+        h1, h2 = hash_pair(key)
+        return min(row[(h1 + i * h2) % self.width] for i, row in enumerate(self.rows))
+
+    @property
+    def memory_bytes(self):
+        return self.width * self.depth * 4
+
+
+class WindowedCountMin:
+    """Count-Min counts over the current and previous time window"""
+
+    def __init__(self, window_seconds, width=1 << 17, depth=4):
+        self.window_seconds = window_seconds
+        self.width = width
+        self.depth = depth
+        self.window = None
+        self.current = CountMinSketch(width, depth)
+        self.previous = None
+
+    def _rotate(self, epoch_seconds):
+        window = int(epoch_seconds // self.window_seconds)
+        if self.window is None:
+            self.window = window
+        elif window > self.window:
+            self.previous = self.current if window == self.window + 1 else None
+            self.current = CountMinSketch(self.width, self.depth)
+            self.window = window
+
+    def add(self, key, epoch_seconds, count=1):
+        """Add at a point in time; returns the estimate over both windows"""
+        self._rotate(epoch_seconds)
+        estimate = self.current.add(key, count)
+        return estimate + (self.previous.estimate(key) if self.previous else 0)
+
+    def estimate(self, key):
+        return self.current.estimate(key) + (self.previous.estimate(key) if self.previous else 0)
+
+    @property
+    def memory_bytes(self):
+        return self.current.memory_bytes * 2
+
+
+class HyperLogLog:
+    """Distinct-count estimate in 2**precision one-byte registers"""
+
+    def __init__(self, precision=6):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, key):
+        value, _ = hash_pair(key)
+        index = value >> (64 - self.precision)
+        remaining = (value << self.precision) & 0xFFFFFFFFFFFFFFFF
+        rank = min(64 - self.precision, 64 - remaining.bit_length()) + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        for i, rank in enumerate(other.registers):
+            if rank > self.registers[i]:
+                self.registers[i] = rank
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.673 if m == 16 else 0.697 if m == 32 else 0.709 if m == 64 else 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    @property
+    def memory_bytes(self):
+        return len(self.registers)
+
+
+class KeyedWindowedHLL:
+    """Per-key distinct counts over a sliding-ish window, LRU-bounded by key
+
+    Each key holds two HyperLogLogs covering consecutive half-windows, so the
+    count spans between one half and one full window of history.
+    """
+
+    def __init__(self, window_seconds, precision=6, max_keys=100000):
+        self.half_window = window_seconds / 2
+        self.precision = precision
+        self.max_keys = max_keys
+        self._entries = OrderedDict()  # key -> [half-window index, current HLL, previous HLL]
+
+    def add(self, key, item, epoch_seconds):
+        """Add an item for a key; returns the key's distinct count"""
+        half = int(epoch_seconds // self.half_window)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [half, HyperLogLog(self.precision), None]
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+            if half > entry[0]:
+                entry[2] = entry[1] if half == entry[0] + 1 else None
+                entry[1] = HyperLogLog(self.precision)
+                entry[0] = half
+        entry[1].add(item)
+        return self._count(entry)
+
+    def _count(self, entry):
+        if entry[2] is None:
+            return entry[1].count()
+        combined = HyperLogLog(self.precision)
+        combined.merge(entry[1])
+        combined.merge(entry[2])
+        return combined.count()
+
+    @property
+    def memory_bytes(self):
+        return len(self._entries) * 2 * (1 << self.precision)
+
+
+class FraudSketches:
+    """The sketches the engines share, sized from settings"""
+
+    def __init__(self, capacity=1000000, error_rate=0.01, count_min_width=1 << 17,
+                 hll_precision=6, max_users=100000):
+        self._lock = threading.Lock()
+        self.recipient_pairs = RotatingBloomFilter(capacity, error_rate)
+        self.recipient_counts = WindowedCountMin(24 * 3600, count_min_width)
+        self.user_recipients = KeyedWindowedHLL(24 * 3600, hll_precision, max_users)
+        self.seen_devices = RotatingBloomFilter(capacity, error_rate)
+        self.device_counts = WindowedCountMin(3600, count_min_width)
+        self.seen_user_agents = RotatingBloomFilter(capacity, error_rate)
+        self.user_agent_counts = WindowedCountMin(24 * 3600, count_min_width)
+
+    def observe_payment(self, user_id, recipient, timestamp):
+        """First time this user pays this recipient? Distinct recipients in ~24h?"""
+        epoch = timestamp.timestamp()
+        with self._lock:
+            paid_before = self.recipient_pairs.add(f"{user_id}\x1f{recipient}")
+            recipient_payments = self.recipient_counts.add(recipient, epoch)
+            distinct_recipients = self.user_recipients.add(user_id, recipient, epoch)
+        return {
+            'first_time_recipient': not paid_before,
+            'distinct_recipients_24h': distinct_recipients,
+            'recipient_payments_24h': recipient_payments
+        }
+
+    def observe_device(self, device_id, user_agent, timestamp):
+        """New device or user agent? How hot is this device in the last hour?"""
+        epoch = timestamp.timestamp()
+        with self._lock:
+            device_seen = self.seen_devices.add(device_id)
+            device_hits = self.device_counts.add(device_id, epoch)
+            user_agent_seen = self.seen_user_agents.add(user_agent)
+            user_agent_hits = self.user_agent_counts.add(user_agent, epoch)
+        return {
+            'new_device': not device_seen,
+            'device_hits_last_hour': device_hits,
+            'new_user_agent': not user_agent_seen,
+            'user_agent_hits_24h': user_agent_hits
+        }
+
+    def stats(self):
+        sketches = {
+            'recipient_pairs': self.recipient_pairs,
+            'recipient_counts': self.recipient_counts,
+            'user_recipients': self.user_recipients,
+            'seen_devices': self.seen_devices,
+            'device_counts': self.device_counts,
+            'seen_user_agents': self.seen_user_agents,
+            'user_agent_counts': self.user_agent_counts
+        }
+        memory = {name: sketch.memory_bytes for name, sketch in sketches.items()}
+        return {'memory_bytes': memory, 'total_memory_bytes': sum(memory.values())}
+
+
+def create_fraud_sketches(settings):
+    """FraudSketches sized from settings"""
+    return FraudSketches(
+        capacity=settings.sketch_capacity,
+        error_rate=settings.sketch_error_rate,
+        count_min_width=settings.count_min_width,
+        hll_precision=settings.hll_precision,
+        max_users=settings.sketch_users
+    )
@@ -0,0 +1,172 @@
+"""
+In-memory state of a running app instance
+With a persistent storage backend the newest transactions and alerts are
+reloaded from it at startup, and history queries are answered from it.
+The reloaded window (MAX_TRANSACTION_HISTORY / MAX_ALERTS_HISTORY) is
+replayed into the running aggregates, the traffic monitor and the engine's
+record_transaction, so insights and rollups start from it. State an engine
+only builds while scoring (behavioural patterns, transaction graphs, device
+and sketch observations, the online model) is not rebuilt, and totals
+cover the reloaded window rather than the whole database.
+"""
+
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from face_to_phone.aggregates import RunningAggregates
+from face_to_phone.archive import create_archive
+from face_to_phone.biometrics import create_biometric_auth
+from face_to_phone.cache import UserResultCache
+from face_to_phone.clock import create_clock
+from face_to_phone.devices import create_device_index
+from face_to_phone.engines import load_engine_module
+from face_to_phone.idempotency import IdempotencyIndex
+from face_to_phone.ids import IdGenerator
+from face_to_phone.labels import LabelStore
+from face_to_phone.profiles import create_profile_store
+from face_to_phone.sessions import VerificationSessions
+from face_to_phone.sketches import create_fraud_sketches
+from face_to_phone.storage import create_storage
+from face_to_phone.traffic import TrafficMonitor
+from face_to_phone.workers import Batcher, BoundedPool
+
+
+class AppState:
+    """Global stores plus the selected biometric backend and fraud engine"""
+    
+    def __init__(self, settings):
+        self.settings = settings
+        # Time source for transaction stamps and every detector feature
+        self.clock = create_clock(settings.clock)
+        # Durable copy of transactions, alerts, templates, PINs and profiles (STORAGE setting)
+        self.storage = create_storage(settings)
+        self.transaction_history = self.storage.transactions(settings.max_transaction_history)
+        self.fraud_alerts = self.storage.alerts(settings.max_alerts_history)
+        self.profiles = create_profile_store(settings, self.storage)
+        # Time-ordered ids for transactions and alerts
+        self.ids = IdGenerator(settings.worker_id if settings.worker_id >= 0 else None)
+        self.idempotency = IdempotencyIndex(settings.idempotency_window_seconds, settings.idempotency_max_keys)
+        self.result_cache = UserResultCache(settings.cache_size)
+        self.aggregates = RunningAggregates(settings.hourly_rollup_buckets, settings.daily_rollup_buckets)
+        self.traffic = TrafficMonitor(settings)
+        # Columnar copy of every scored transaction (None unless ARCHIVE_DIR is set)
+        self.archive = create_archive(settings)
+        if self.archive is not None:
+            atexit.register(self.archive.flush)
+        # Analyst labels, persisted next to the archive so they can be joined to it
+        self.labels = LabelStore(settings, os.path.join(settings.archive_dir, 'labels.ndjson')
+                                 if self.archive is not None else None)
+        self.device_index = create_device_index(settings)
+        self.sketches = create_fraud_sketches(settings)
+        self.engine_name = settings.detector
+        self.biometric_auth = create_biometric_auth(settings.biometrics, settings, self.storage)
+        self.engine_module = load_engine_module(settings.detector)
+        self.engine = self.engine_module.create_engine(self)
+        # Engines keep per-user history without locks of their own: analysis and recording take this
+        self.engine_lock = threading.Lock()
+        self.scoring_pool = ThreadPoolExecutor(max_workers=settings.scoring_workers, thread_name_prefix='scoring')
+        self.scoring_timeouts = 0  # transactions held for review because scoring ran out of time
+        # Biometric work gets its own bounded pool so large uploads can't starve scoring
+        self.biometric_pool = BoundedPool('biometric', settings.biometric_workers, settings.biometric_queue_size)
+        batch_size, batch_wait = settings.biometric_batch_size, settings.biometric_batch_wait_ms / 1000
+        self.face_verifier = Batcher(self.biometric_pool, self.biometric_auth.verify_face_batch, batch_size, batch_wait)
+        self.voice_verifier = Batcher(self.biometric_pool, self.biometric_auth.verify_voice_batch, batch_size, batch_wait)
+        self.sessions = VerificationSessions(settings)
+        if self.storage.persistent:
+            self.restore_history()
+    
+    def restore_history(self):
+        """Feed the reloaded transactions and alerts through the derived in-memory state"""
+        flagged = {alert['transaction_id'] for alert in self.fraud_alerts}
+        for transaction in self.transaction_history:
+            self.aggregates.record_transaction(transaction)
+            self.traffic.observe(transaction['timestamp'], transaction.get('amount') or 0,
+                                 transaction['id'] in flagged)
+            self.engine.record_transaction(transaction)
+        for alert in self.fraud_alerts:
+            self.aggregates.record_alert(alert)
+    
+    def add_transaction(self, transaction, is_fraud=False):
+        self.transaction_history.append(transaction)
+        self.storage.add_transaction(transaction, is_fraud)
+        trim(self.transaction_history, self.settings.max_transaction_history)
+        self.aggregates.record_transaction(transaction)
+        self.result_cache.invalidate(transaction['user_id'])
+    
+    def add_alert(self, alert):
+        self.fraud_alerts.append(alert)
+        self.storage.add_alert(alert)
+        trim(self.fraud_alerts, self.settings.max_alerts_history)
+        self.aggregates.record_alert(alert)
+        self.result_cache.invalidate(alert['user_id'])
+    
+    def find_alerts(self, transaction_id=None, alert_id=None):
+        """Alerts for a transaction, or the one with an id (from storage once they left memory)"""
+        if alert_id is not None:
+            alerts = [alert for alert in self.fraud_alerts if alert['id'] == alert_id]
+        else:
+            alerts = [alert for alert in self.fraud_alerts if alert['transaction_id'] == transaction_id]
+        return alerts or self.storage.find_alerts(transaction_id, alert_id)
+    
+    def find_transaction(self, transaction_id):
+        """A scored transaction by id (from storage once it left memory), or None"""
+        for transaction in reversed(self.transaction_history):
+            if transaction['id'] == transaction_id:
+                return transaction
+        return self.storage.find_transaction(transaction_id)
+    
+    def recent_transactions(self, limit, user_id=None):
+        """Latest transactions, oldest first, optionally for one user"""
+        if self.storage.persistent:
+            return self.storage.transactions(limit, user_id)
+        history = self.transaction_history
+        if user_id is not None:
+            history = [transaction for transaction in history if transaction['user_id'] == user_id]
+        return history[-limit:] if limit else []
+    
+    def transaction_count(self, user_id=None):
+        if self.storage.persistent:
+            return self.storage.transaction_count(user_id)
+        if user_id is None:
+            return len(self.transaction_history)
+        return sum(1 for transaction in self.transaction_history if transaction['user_id'] == user_id)
+    
+    def recent_alerts(self, limit, user_id=None, status=None):
+        """Latest alerts, oldest first, optionally for one user and/or status"""
+        if self.storage.persistent:
+            return self.storage.alerts(limit, user_id, status)
+        alerts = [alert for alert in self.fraud_alerts
+                  if (user_id is None or alert['user_id'] == user_id) and (status is None or alert['status'] == status)]
+        return alerts[-limit:] if limit else []
+    
+    def alert_count(self):
+        return self.storage.alert_count() if self.storage.persistent else len(self.fraud_alerts)
+    
+    def set_alert_status(self, alert, status, analyst=None):
+        old_status = alert['status']
+        alert['status'] = status
+        alert['reviewed_by'] = analyst
+        alert['reviewed_at'] = self.clock.now()
+        self.storage.update_alert(alert)
+        self.aggregates.alert_status_changed(old_status, status)
+        self.result_cache.invalidate(alert['user_id'])
+    
+    def reload_settings(self):
+        """Re-read settings and resize everything that depends on them"""
+        result = self.settings.reload()
+        trim(self.transaction_history, self.settings.max_transaction_history)
+        trim(self.fraud_alerts, self.settings.max_alerts_history)
+        self.engine.apply_settings()
+        self.device_index.apply_settings(self.settings)
+        self.result_cache.resize(self.settings.cache_size)
+        self.aggregates.resize(self.settings.hourly_rollup_buckets, self.settings.daily_rollup_buckets)
+        self.result_cache.clear()
+        return result
+
+
+def trim(items, limit):
+    """Drop the oldest entries of a list so it holds at most limit items"""
+    if len(items) > limit:
+        del items[:len(items) - limit]
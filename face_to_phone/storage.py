@@ -0,0 +1,444 @@
+"""
+Storage backends
+Where transactions, alerts, biometric templates, PINs and profiles are kept
+beyond the in-memory stores. The base Storage keeps nothing (the default,
+everything is lost on restart); SQLiteStorage writes them to an embedded
+database file, so it needs no server and works offline.
+
+The in-memory stores stay the hot path and SQLite sits behind them:
+
+- Writes are queued and a single writer thread commits everything that
+  arrived in the last STORAGE_COMMIT_MS in one transaction (group commit),
+  so request threads never wait on the disk.
+- The database runs in WAL mode, so readers don't block the writer or each
+  other. Readers borrow connections from a small pool; sqlite3 keeps each
+  connection's prepared statements cached.
+- Reads first wait for writes already queued to be committed (at most
+  one commit, the writer is told to go at once), so a query right after a
+  write sees it.
+- A commit that fails is retried; if it still fails, its writes are
+  committed one by one so a single bad row doesn't take the batch with it.
+  Writes that can't be stored are counted, logged and reported by health().
+- Transactions are clustered by (user_id, timestamp), so per-user history
+  is one range scan; alerts have indexes for user/time, status and
+  transaction lookups.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from face_to_phone.clock import epoch_ms
+
+logger = logging.getLogger(__name__)
+
+COMMIT_RETRIES = 3
+# Longest a read waits for queued writes to be committed
+READ_FLUSH_TIMEOUT = 1.0
+
+# Fields stored as ISO strings in JSON columns and turned back into datetimes
+DATETIME_FIELDS = ('timestamp', 'enrolled_at', 'reviewed_at')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    user_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    id TEXT NOT NULL,
+    amount REAL,
+    is_fraud INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, timestamp, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS transactions_time ON transactions (timestamp);
+CREATE INDEX IF NOT EXISTS transactions_id ON transactions (id);
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT NOT NULL UNIQUE,
+    transaction_id TEXT,
+    user_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS alerts_user_time ON alerts (user_id, timestamp);
+CREATE INDEX IF NOT EXISTS alerts_status_time ON alerts (status, timestamp);
+CREATE INDEX IF NOT EXISTS alerts_transaction ON alerts (transaction_id);
+CREATE TABLE IF NOT EXISTS templates (
+    kind TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    template BLOB NOT NULL,
+    embedding BLOB,
+    PRIMARY KEY (kind, user_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS pins (
+    user_id TEXT PRIMARY KEY,
+    cost INTEGER NOT NULL,
+    salt BLOB NOT NULL,
+    digest BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS profiles (
+    user_id TEXT PRIMARY KEY,
+    record BLOB NOT NULL
+) WITHOUT ROWID;
+"""
+
+INSERT_TRANSACTION = ("INSERT OR REPLACE INTO transactions (user_id, timestamp, id, amount, is_fraud, data) "
+                      "VALUES (?, ?, ?, ?, ?, ?)")
+INSERT_ALERT = ("INSERT OR REPLACE INTO alerts (id, transaction_id, user_id, timestamp, status, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)")
+UPDATE_ALERT = "UPDATE alerts SET status = ?, data = ? WHERE id = ?"
+SAVE_TEMPLATE = ("INSERT OR REPLACE INTO templates (kind, user_id, meta, template, embedding) "
+                 "VALUES (?, ?, ?, ?, ?)")
+SAVE_PIN = "INSERT OR REPLACE INTO pins (user_id, cost, salt, digest) VALUES (?, ?, ?, ?)"
+SAVE_PROFILE = "INSERT OR REPLACE INTO profiles (user_id, record) VALUES (?, ?)"
+
+
+def to_json(value):
+    return json.dumps(value, default=lambda item: item.isoformat() if isinstance(item, datetime) else str(item))
+
+
+def from_json(text):
+    value = json.loads(text)
+    for field in DATETIME_FIELDS:
+        if isinstance(value.get(field), str):
+            try:
+                value[field] = datetime.fromisoformat(value[field])
+            except ValueError:
+                pass
+    return value
+
+
+class Storage:
+    """Storage backend interface; the base class keeps nothing (in-memory deployment)"""
+
+    name = 'memory'
+    # Whether data outlives the process (queries are only answered when it does)
+    persistent = False
+
+    def add_transaction(self, transaction, is_fraud):
+        """Store a scored transaction"""
+
+    def add_alert(self, alert):
+        """Store a new alert"""
+
+    def update_alert(self, alert):
+        """Store an alert's new status"""
+
+    def transactions(self, limit, user_id=None):
+        """Latest transactions (oldest first), optionally for one user"""
+        return []
+
+    def transaction_count(self, user_id=None):
+        return 0
+
+    def alerts(self, limit, user_id=None, status=None):
+        """Latest alerts (oldest first), optionally filtered"""
+        return []
+
+    def alert_count(self):
+        return 0
+
+    def find_alerts(self, transaction_id=None, alert_id=None):
+        return []
+
+    def find_transaction(self, transaction_id):
+        """A stored transaction by id, or None"""
+        return None
+
+    def save_template(self, kind, user_id, meta, template, embedding=None):
+        """Store a user's face/voice template (replacing the previous one)"""
+
+    def load_templates(self):
+        """(kind, user_id, meta, template, embedding) of every stored template"""
+        return []
+
+    def save_pin(self, user_id, record):
+        """Store a user's PinRecord"""
+
+    def load_pins(self):
+        """(user_id, cost, salt, digest) of every stored PIN"""
+        return []
+
+    def save_profiles(self, records):
+        """Store packed profiles, given as (user_id, bytes) pairs"""
+
+    def load_profile(self, user_id):
+        """A user's packed profile, or None"""
+        return None
+
+    def profile_ids(self):
+        return []
+
+    def flush(self, timeout=None):
+        """Wait until every queued write is committed; False on timeout"""
+        return True
+
+    def close(self):
+        pass
+
+    def health(self):
+        """Whether writes are being stored"""
+        return {'backend': self.name, 'ok': True}
+
+    def stats(self):
+        return {'backend': self.name, 'persistent': self.persistent}
+
+
+class SQLiteStorage(Storage):
+    """Embedded SQLite database (WAL) with group-committed writes and pooled readers"""
+
+    name = 'sqlite'
+    persistent = True
+
+    def __init__(self, path, commit_interval=0.005, readers=8):
+        self.path = path
+        self.commit_interval = commit_interval
+        self._readers = queue.LifoQueue(maxsize=readers)
+        self._pending = []  # (sql, params) waiting for the next commit
+        self._cond = threading.Condition()
+        self._hurry = threading.Event()
+        self._queued = 0
+        self._committed = 0
+        self._closing = False
+        self.commits = 0
+        self.failed_writes = 0
+        self.retried_commits = 0
+        self.last_error = None
+        self.failing = False  # the last commit lost writes
+
+        connection = self._connect()
+        connection.executescript(SCHEMA)
+        connection.commit()
+        self._writer = threading.Thread(target=self._run, args=(connection,), name='storage-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self, readonly=False):
+        # cached_statements: every query here is a fixed string, so each is prepared once per connection
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False, cached_statements=64)
+        connection.execute("PRAGMA journal_mode=WAL")
+        # NORMAL is safe in WAL mode: a crash loses no committed data, a power cut at most the last commits
+        connection.execute("PRAGMA synchronous=NORMAL")
+        if readonly:
+            connection.execute("PRAGMA query_only=1")
+        return connection
+
+    @contextmanager
+    def _reading(self):
+        """Borrow a pooled read connection (opening one if the pool is empty)"""
+        try:
+            connection = self._readers.get_nowait()
+        except queue.Empty:
+            connection = self._connect(readonly=True)
+        try:
+            yield connection
+        finally:
+            try:
+                self._readers.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    def _query(self, sql, params=()):
+        # Read your writes: let everything queued so far reach the database first
+        self.flush(READ_FLUSH_TIMEOUT)
+        with self._reading() as connection:
+            return connection.execute(sql, params).fetchall()
+
+    def _write(self, sql, params):
+        with self._cond:
+            if self._closing:
+                raise RuntimeError("Storage is closed")
+            self._pending.append((sql, params))
+            self._queued += 1
+            if len(self._pending) == 1:
+                self._cond.notify_all()
+
+    def _run(self, connection):
+        """Writer thread: commit whatever queued up during each interval in one transaction"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closing)
+                if not self._pending:
+                    break
+            # Let concurrent writers join this commit
+            self._hurry.wait(self.commit_interval)
+            with self._cond:
+                batch, self._pending = self._pending, []
+                self._hurry.clear()
+            self._commit(connection, batch)
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+        connection.close()
+
+    def _commit(self, connection, batch):
+        for attempt in range(COMMIT_RETRIES):
+            try:
+                with connection:
+                    start = 0
+                    # Consecutive writes of the same statement go through one executemany
+                    for index in range(1, len(batch) + 1):
+                        if index == len(batch) or batch[index][0] != batch[start][0]:
+                            connection.executemany(batch[start][0], [params for _, params in batch[start:index]])
+                            start = index
+                self.commits += 1
+                self.failing = False
+                return
+            except sqlite3.OperationalError as e:
+                # Locked or busy (another process, a checkpoint): back off and retry
+                self.retried_commits += 1
+                self.last_error = str(e)
+                time.sleep(0.05 * 2 ** attempt)
+            except sqlite3.Error as e:
+                # A bad row; retrying the same batch won't help
+                self.last_error = str(e)
+                break
+
+        # Commit one by one, so only the writes that really fail are lost
+        failed = 0
+        for sql, params in batch:
+            try:
+                with connection:
+                    connection.execute(sql, params)
+            except sqlite3.Error as e:
+                failed += 1
+                self.last_error = str(e)
+        self.commits += 1
+        self.failed_writes += failed
+        self.failing = failed > 0
+        if failed:
+            logger.error("Storage lost %d of %d writes: %s", failed, len(batch), self.last_error)
+
+    def add_transaction(self, transaction, is_fraud):
+        try:
+            amount = float(transaction['amount'])
+        except (TypeError, ValueError):
+            amount = None
+        self._write(INSERT_TRANSACTION, (
+            str(transaction['user_id']), epoch_ms(transaction['timestamp']), str(transaction['id']),
+            amount, 1 if is_fraud else 0, to_json(transaction)
+        ))
+
+    def add_alert(self, alert):
+        self._write(INSERT_ALERT, (
+            str(alert['id']), alert['transaction_id'], str(alert['user_id']),
+            epoch_ms(alert['timestamp']), alert['status'], to_json(alert)
+        ))
+
+    def update_alert(self, alert):
+        self._write(UPDATE_ALERT, (alert['status'], to_json(alert), str(alert['id'])))
+
+    def transactions(self, limit, user_id=None):
+        if user_id is None:
+            rows = self._query("SELECT data FROM transactions ORDER BY timestamp DESC LIMIT ?", (limit,))
+        else:
+            rows = self._query("SELECT data FROM transactions WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?",
+                               (str(user_id), limit))
+        return [from_json(data) for (data,) in reversed(rows)]
+
+    def transaction_count(self, user_id=None):
+        # count(*) rather than a running counter: replaced and failed writes must not count
+        if user_id is None:
+            return self._query("SELECT count(*) FROM transactions")[0][0]
+        return self._query("SELECT count(*) FROM transactions WHERE user_id = ?", (str(user_id),))[0][0]
+
+    def alerts(self, limit, user_id=None, status=None):
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(str(user_id))
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if conditions:
+            sql = f"SELECT data FROM alerts WHERE {' AND '.join(conditions)} ORDER BY timestamp DESC LIMIT ?"
+        else:
+            sql = "SELECT data FROM alerts ORDER BY rowid DESC LIMIT ?"
+        return [from_json(data) for (data,) in reversed(self._query(sql, params + [limit]))]
+
+    def alert_count(self):
+        return self._query("SELECT count(*) FROM alerts")[0][0]
+
+    def find_alerts(self, transaction_id=None, alert_id=None):
+        if alert_id is not None:
+            rows = self._query("SELECT data FROM alerts WHERE id = ?", (str(alert_id),))
+        else:
+            rows = self._query("SELECT data FROM alerts WHERE transaction_id = ?", (transaction_id,))
+        return [from_json(data) for (data,) in rows]
+
+    def find_transaction(self, transaction_id):
+        rows = self._query("SELECT data FROM transactions WHERE id = ?", (str(transaction_id),))
+        return from_json(rows[0][0]) if rows else None
+
+    def save_template(self, kind, user_id, meta, template, embedding=None):
+        self._write(SAVE_TEMPLATE, (kind, str(user_id), to_json(meta), template, embedding))
+
+    def load_templates(self):
+        rows = self._query("SELECT kind, user_id, meta, template, embedding FROM templates")
+        return [(kind, user_id, from_json(meta), template, embedding)
+                for kind, user_id, meta, template, embedding in rows]
+
+    def save_pin(self, user_id, record):
+        self._write(SAVE_PIN, (str(user_id), record.cost, record.salt, record.digest))
+
+    def load_pins(self):
+        return self._query("SELECT user_id, cost, salt, digest FROM pins")
+
+    def save_profiles(self, records):
+        for user_id, packed in records:
+            self._write(SAVE_PROFILE, (str(user_id), packed))
+
+    def load_profile(self, user_id):
+        rows = self._query("SELECT record FROM profiles WHERE user_id = ?", (str(user_id),))
+        return rows[0][0] if rows else None
+
+    def profile_ids(self):
+        return [user_id for (user_id,) in self._query("SELECT user_id FROM profiles")]
+
+    def flush(self, timeout=None):
+        with self._cond:
+            target = self._queued
+            if self._committed >= target:
+                return True
+            self._hurry.set()
+            return self._cond.wait_for(lambda: self._committed >= target or not self._writer.is_alive(), timeout)
+
+    def health(self):
+        return {'backend': self.name, 'ok': not self.failing and self._writer.is_alive(),
+                'failed_writes': self.failed_writes, 'last_error': self.last_error}
+
+    def close(self):
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            self._hurry.set()
+            self._cond.notify_all()
+        self._writer.join()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self._cond:
+            pending = len(self._pending)
+        return dict(super().stats(), path=self.path, pending_writes=pending, committed_writes=self._committed,
+                    commits=self.commits, retried_commits=self.retried_commits, failed_writes=self.failed_writes,
+                    last_error=self.last_error,
+                    idle_readers=self._readers.qsize(), transactions=self.transaction_count(),
+                    alerts=self.alert_count())
+
+
+def create_storage(settings):
+    """Storage backend selected by the STORAGE setting"""
+    if settings.storage == 'sqlite':
+        return SQLiteStorage(settings.storage_path, settings.storage_commit_ms / 1000, settings.storage_readers)
+    return Storage()
@@ -0,0 +1,261 @@
+"""
+Biometric template stores
+Templates live as fixed-width rows of one contiguous buffer with a
+user -> row index. 1:1 verification compares a single row; 1:N search is a
+vectorized NumPy scan over the whole buffer (NumPy is loaded lazily, so 1:1
+checks on binary templates work on the Flask-only deployment too).
+"""
+
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from face_to_phone.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+# Rows compared per NumPy call during 1:N search (a few MB, stays in cache)
+SEARCH_BLOCK_ROWS = 65536
+
+
+def numpy_available():
+    try:
+        np.load()
+        return True
+    except ImportError:
+        return False
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    # NumPy < 2.0: SWAR popcount, a dozen vectorized ops per 64-bit word
+    values = values - ((values >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    values = (values & np.uint64(0x3333333333333333)) + ((values >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    values = (values + (values >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (values * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+class TemplateStore:
+    """Fixed-width templates in a contiguous buffer, indexed by user"""
+
+    itemsize = 1
+
+    def __init__(self, width, capacity=1024):
+        self.width = width
+        self.row_bytes = width * self.itemsize
+        self._buffer = bytearray(capacity * self.row_bytes)
+        self._rows = {}  # user id -> row
+        self._users = []  # row -> user id (None for a freed row)
+        self._free = []
+        self._lock = threading.RLock()
+
+    def encode(self, template):
+        """Template as exactly row_bytes bytes"""
+        raise NotImplementedError
+
+    def similarity(self, stored, template):
+        """Similarity (0-1) of one stored row and an encoded template"""
+        raise NotImplementedError
+
+    def similarities(self, rows, template):
+        """Similarity of every row of a NumPy block to an encoded template"""
+        raise NotImplementedError
+
+    def block_matches(self, rows, template, min_similarity):
+        """Offsets and similarities of the rows in a NumPy block scoring >= min_similarity"""
+        scores = self.similarities(rows, template)
+        offsets = np.flatnonzero(scores >= min_similarity)
+        return offsets, scores[offsets]
+
+    def block(self, buffer, start, end):
+        """NumPy view (no copy) of rows start..end of a buffer"""
+        return np.frombuffer(buffer, dtype=np.uint8, count=(end - start) * self.row_bytes,
+                             offset=start * self.row_bytes).reshape(end - start, self.row_bytes)
+
+    def put(self, user_id, template):
+        """Store (or replace) a user's template"""
+        return self.restore(user_id, self.encode(template))
+
+    def restore(self, user_id, encoded):
+        """Store an already encoded row (as returned by get), e.g. when loading from storage"""
+        if len(encoded) != self.row_bytes:
+            raise ValueError(f"Encoded template must be {self.row_bytes} bytes, got {len(encoded)}")
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                row = self._allocate(user_id)
+            start = row * self.row_bytes
+            self._buffer[start:start + self.row_bytes] = encoded
+        return row
+
+    def _allocate(self, user_id):
+        if self._free:
+            row = self._free.pop()
+            self._users[row] = user_id
+        else:
+            row = len(self._users)
+            if (row + 1) * self.row_bytes > len(self._buffer):
+                # Grow into a new buffer; NumPy views of the old one stay valid
+                grown = bytearray(max(len(self._buffer) * 2, self.row_bytes * 1024))
+                grown[:len(self._buffer)] = self._buffer
+                self._buffer = grown
+            self._users.append(user_id)
+        self._rows[user_id] = row
+        return row
+
+    def get(self, user_id):
+        with self._lock:
+            row = self._rows.get(user_id)
+            if row is None:
+                return None
+            start = row * self.row_bytes
+            return bytes(self._buffer[start:start + self.row_bytes])
+
+    def remove(self, user_id):
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is not None:
+                start = row * self.row_bytes
+                self._buffer[start:start + self.row_bytes] = bytes(self.row_bytes)
+                self._users[row] = None
+                self._free.append(row)
+
+    def compare(self, user_id, template):
+        """1:1 similarity against a user's stored template (None if not enrolled)"""
+        stored = self.get(user_id)
+        if stored is None:
+            return None
+        return self.similarity(stored, self.encode(template))
+
+    def search(self, template, limit=5, min_similarity=0.0, exclude=None):
+        """1:N search: best matching users as (user_id, similarity), best first"""
+        return self.find_matches(template, min_similarity, exclude, limit)['matches']
+
+    def find_matches(self, template, min_similarity, exclude=None, limit=10, executor=None, timeout=None):
+        """1:N search in blocks, spread over an executor and cut off after timeout seconds
+
+        Blocks still unscanned at the deadline are skipped and the result is
+        marked incomplete rather than blowing the caller's latency budget.
+        """
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        encoded = self.encode(template)
+        with self._lock:
+            buffer = self._buffer
+            rows = len(self._users)
+        blocks = [(start, min(start + SEARCH_BLOCK_ROWS, rows)) for start in range(0, rows, SEARCH_BLOCK_ROWS)]
+        use_numpy = numpy_available()
+
+        def scan(block):
+            start, end = block
+            if use_numpy:
+                offsets, scores = self.block_matches(self.block(buffer, start, end), encoded, min_similarity)
+                hits = zip((start + offset for offset in offsets.tolist()), scores.tolist())
+            else:
+                # No NumPy: compare row by row (fine for small deployments)
+                hits = ((row, self.similarity(bytes(buffer[row * self.row_bytes:(row + 1) * self.row_bytes]), encoded))
+                        for row in range(start, end))
+            hits = [(row, score) for row, score in hits if score >= min_similarity]
+            with self._lock:
+                owners = [(self._users[row], score) for row, score in hits]
+            return [(user_id, score) for user_id, score in owners if user_id is not None and user_id != exclude]
+
+        matches = []
+        scanned = 0
+        if executor is None:
+            for block in blocks:
+                if deadline is not None and time.perf_counter() > deadline:
+                    break
+                matches.extend(scan(block))
+                scanned += block[1] - block[0]
+        else:
+            futures = [executor.submit(scan, block) for block in blocks]
+            for future, block in zip(futures, blocks):
+                try:
+                    remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+                    matches.extend(future.result(timeout=remaining))
+                    scanned += block[1] - block[0]
+                except FutureTimeoutError:
+                    break
+            for future in futures:
+                future.cancel()
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return {
+            'matches': matches[:limit],
+            'scanned': scanned,
+            'total': rows,
+            'complete': scanned == rows
+        }
+
+    def __contains__(self, user_id):
+        return user_id in self._rows
+
+    def __len__(self):
+        return len(self._rows)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'templates': len(self._rows),
+                'row_bytes': self.row_bytes,
+                'memory_bytes': len(self._buffer)
+            }
+
+
+class BinaryTemplateStore(TemplateStore):
+    """Bit-string templates (hashes) compared by Hamming distance"""
+
+    def encode(self, template):
+        if isinstance(template, str):
+            template = bytes.fromhex(template)
+        if len(template) != self.row_bytes:
+            raise ValueError(f"Template must be {self.row_bytes} bytes, got {len(template)}")
+        return bytes(template)
+
+    def similarity(self, stored, template):
+        distance = (int.from_bytes(stored, 'big') ^ int.from_bytes(template, 'big')).bit_count()
+        return 1 - distance / (self.row_bytes * 8)
+
+    def distances(self, rows, template):
+        """Hamming distance of every row of a NumPy block to an encoded template"""
+        query = np.frombuffer(template, dtype=np.uint8)
+        if self.row_bytes % 8 != 0:
+            return np.unpackbits(rows ^ query, axis=1).sum(axis=1, dtype=np.uint32)
+        # Compare 64 bits at a time; adding columns beats sum(axis=1) on narrow rows
+        counts = popcount(rows.view(np.uint64) ^ query.view(np.uint64))
+        distances = counts[:, 0].astype(np.uint32)
+        for column in range(1, counts.shape[1]):
+            distances += counts[:, column]
+        return distances
+
+    def similarities(self, rows, template):
+        return 1 - self.distances(rows, template) / (self.row_bytes * 8)
+
+    def block_matches(self, rows, template, min_similarity):
+        # Threshold on integer distances, only convert the hits
+        bits = self.row_bytes * 8
+        distances = self.distances(rows, template)
+        offsets = np.flatnonzero(distances <= int((1 - min_similarity) * bits))
+        return offsets, 1 - distances[offsets] / bits
+
+
+class EmbeddingTemplateStore(TemplateStore):
+    """Float32 embedding templates compared by cosine similarity (NumPy required)"""
+
+    itemsize = 4
+
+    def encode(self, template):
+        vector = np.asarray(template, dtype=np.float32).ravel()
+        if vector.size != self.width:
+            raise ValueError(f"Embedding must have {self.width} values, got {vector.size}")
+        norm = np.linalg.norm(vector)
+        # Stored unit-length so cosine similarity is a plain dot product
+        return (vector / norm if norm else vector).tobytes()
+
+    def similarity(self, stored, template):
+        return float(np.dot(np.frombuffer(stored, dtype=np.float32), np.frombuffer(template, dtype=np.float32)))
+
+    def similarities(self, rows, template):
+        return rows.view(np.float32) @ np.frombuffer(template, dtype=np.float32)
@@ -0,0 +1,320 @@
+"""
+Global traffic monitor
+Every scored transaction is counted into per-second, per-minute and
+per-hour buckets (volume, amount, frauds). When a bucket closes, its totals
+update exponentially weighted baselines and a CUSUM change-point detector;
+the hourly series also feeds an additive Holt-Winters model (daily season)
+that forecasts the next hour. The bucket still filling is checked against
+its baseline on every event, so a burst is flagged within the second it
+starts instead of after a history scan.
+
+Each event costs a constant amount of work per resolution; a gap of idle
+buckets is folded in at most one ring's worth of updates.
+"""
+
+import math
+import threading
+from collections import deque
+
+from face_to_phone.clock import EPOCH, MILLISECOND, epoch_ms
+
+# (name, bucket seconds, buckets kept, Holt-Winters season in buckets)
+RESOLUTIONS = (
+    ('second', 1, 120, None),
+    ('minute', 60, 120, None),
+    ('hour', 3600, 48, 24)
+)
+# Sustained upward shift (in baseline standard deviations) the CUSUM ignores, and its alarm level
+CUSUM_DRIFT = 0.5
+CUSUM_LIMIT = 8.0
+
+
+class Ewma:
+    """Exponentially weighted mean and variance of a series"""
+
+    __slots__ = ('alpha', 'mean', 'variance', 'count')
+
+    def __init__(self, alpha):
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    def update(self, value):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+    def deviation(self):
+        """Standard deviation, floored at Poisson noise so a flat baseline isn't infinitely sensitive"""
+        return max(math.sqrt(self.variance), math.sqrt(max(self.mean, 1.0)))
+
+    def score(self, value):
+        """How many standard deviations a count is above the baseline
+
+        At low rates counts are too skewed for a plain z-score (five events
+        in a usually quiet second is common), so the Anscombe-transformed
+        Poisson score is used when it is the more conservative of the two.
+        """
+        anscombe = 2 * (math.sqrt(max(value, 0) + 0.375) - math.sqrt(max(self.mean, 0) + 0.375))
+        return min((value - self.mean) / self.deviation(), anscombe)
+
+
+class Cusum:
+    """One-sided CUSUM of standardized values, flags a sustained rise"""
+
+    __slots__ = ('total',)
+
+    def __init__(self):
+        self.total = 0.0
+
+    def update(self, score):
+        self.total = max(0.0, self.total + score - CUSUM_DRIFT)
+        if self.total > CUSUM_LIMIT:
+            self.total = 0.0
+            return True
+        return False
+
+
+class HoltWinters:
+    """Additive Holt-Winters (level, trend, seasonal) one-step forecaster"""
+
+    __slots__ = ('alpha', 'beta', 'gamma', 'season', 'level', 'trend', 'seasonal', 'count')
+
+    def __init__(self, season, alpha=0.3, beta=0.05, gamma=0.2):
+        self.season = season
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.level = 0.0
+        self.trend = 0.0
+        self.seasonal = [0.0] * season
+        self.count = 0
+
+    def update(self, value, index):
+        """Fold in the value observed at a position (0..season-1) of the season"""
+        if self.count < self.season:
+            # First season: collect it, then start from its mean and offsets
+            self.seasonal[index] = value
+            if self.count == self.season - 1:
+                self.level = sum(self.seasonal) / self.season
+                self.seasonal = [observed - self.level for observed in self.seasonal]
+        else:
+            last_level = self.level
+            self.level = self.alpha * (value - self.seasonal[index]) + (1 - self.alpha) * (self.level + self.trend)
+            self.trend = self.beta * (self.level - last_level) + (1 - self.beta) * self.trend
+            self.seasonal[index] = self.gamma * (value - self.level) + (1 - self.gamma) * self.seasonal[index]
+        self.count += 1
+
+    @property
+    def ready(self):
+        return self.count >= self.season
+
+    def forecast(self, index, steps=1):
+        """Expected value steps ahead, at a position of the season"""
+        return max(0.0, self.level + steps * self.trend + self.seasonal[index])
+
+
+class Resolution:
+    """Ring of equal-width buckets with baselines updated as each bucket closes"""
+
+    def __init__(self, name, seconds, buckets, season, alpha):
+        self.name = name
+        self.width_ms = seconds * 1000
+        self.buckets = [None] * buckets  # bucket number held by each slot
+        self.counts = [0] * buckets
+        self.amounts = [0.0] * buckets
+        self.frauds = [0] * buckets
+        self.current = None  # bucket number (epoch ms // width) being filled
+        self.volume = Ewma(alpha)
+        self.amount = Ewma(alpha)
+        self.fraud = Ewma(alpha)
+        self.shift = Cusum()
+        self.volume_model = HoltWinters(season) if season else None
+        self.fraud_model = HoltWinters(season) if season else None
+        self.flagged = set()  # metrics already alarmed for the current bucket
+
+    def totals(self, bucket):
+        """(volume, amount, frauds) of a bucket still in the ring, else zeros"""
+        slot = bucket % len(self.buckets)
+        if self.buckets[slot] != bucket:
+            return 0, 0.0, 0
+        return self.counts[slot], self.amounts[slot], self.frauds[slot]
+
+    def advance(self, bucket, monitor):
+        """Close every bucket before this one and start filling it"""
+        if self.current is not None:
+            if bucket <= self.current:
+                return
+            self.close(self.current, *self.totals(self.current), monitor)
+            # Buckets skipped since then were empty; a long gap only feeds one ring's worth
+            for closing in range(max(self.current + 1, bucket - len(self.buckets)), bucket):
+                self.close(closing, 0, 0.0, 0, monitor)
+        slot = bucket % len(self.buckets)
+        self.buckets[slot] = bucket
+        self.counts[slot] = 0
+        self.amounts[slot] = 0.0
+        self.frauds[slot] = 0
+        self.current = bucket
+        self.flagged.clear()
+
+    def close(self, bucket, count, amount, frauds, monitor):
+        if self.volume.count >= monitor.warmup_buckets and self.shift.update(self.volume.score(count)):
+            monitor.alarm(self, bucket, 'volume_shift', count, self.volume)
+        self.volume.update(count)
+        self.amount.update(amount)
+        self.fraud.update(frauds)
+        if self.volume_model is not None:
+            # Seasons line up with bucket numbers (the hour of the day, in UTC, for hourly buckets)
+            index = bucket % self.volume_model.season
+            self.volume_model.update(count, index)
+            self.fraud_model.update(frauds, index)
+
+    def observe(self, bucket, amount, is_fraud, monitor):
+        self.advance(bucket, monitor)
+        # Late events count towards the bucket being filled; closed buckets are final
+        slot = self.current % len(self.buckets)
+        self.counts[slot] += 1
+        self.amounts[slot] += amount
+        self.frauds[slot] += is_fraud
+        if self.volume.count < monitor.warmup_buckets:
+            return
+        # A filling bucket already far above its baseline is a spike, no need to wait for it to close
+        for metric, value, baseline in (('volume_spike', self.counts[slot], self.volume),
+                                        ('fraud_spike', self.frauds[slot], self.fraud)):
+            if metric not in self.flagged and baseline.score(value) > monitor.threshold:
+                self.flagged.add(metric)
+                monitor.alarm(self, self.current, metric, value, baseline)
+
+    def forecast(self):
+        """Expected volume and frauds of the bucket being filled (at least what it already holds)"""
+        if self.current is None:
+            return 0.0, 0.0
+        if self.volume_model is not None and self.volume_model.ready:
+            index = self.current % self.volume_model.season
+            volume, frauds = self.volume_model.forecast(index), self.fraud_model.forecast(index)
+        else:
+            volume, frauds = self.volume.mean, self.fraud.mean
+        count, _, fraud_count = self.totals(self.current)
+        return max(volume, count), max(frauds, fraud_count)
+
+    def recent(self, limit):
+        """Totals of the last buckets (oldest first), the filling one included"""
+        if self.current is None:
+            return []
+        rows = []
+        for bucket in range(self.current - min(limit, len(self.buckets)) + 1, self.current + 1):
+            count, amount, frauds = self.totals(bucket)
+            rows.append({
+                'start': (EPOCH + bucket * self.width_ms * MILLISECOND).isoformat(),
+                'volume': count,
+                'amount': round(amount, 2),
+                'frauds': frauds
+            })
+        return rows
+
+    def status(self, limit):
+        count = self.totals(self.current)[0] if self.current is not None else 0
+        volume, frauds = self.forecast()
+        return {
+            'bucket_seconds': self.width_ms // 1000,
+            'baseline_volume': round(self.volume.mean, 3),
+            'baseline_deviation': round(self.volume.deviation(), 3),
+            'baseline_amount': round(self.amount.mean, 2),
+            'baseline_frauds': round(self.fraud.mean, 3),
+            'volume_score': round(self.volume.score(count), 2) if self.volume.count else 0,
+            'forecast_volume': round(volume, 3),
+            'forecast_frauds': round(frauds, 3),
+            'buckets_seen': self.volume.count,
+            'recent': self.recent(limit)
+        }
+
+
+class TrafficMonitor:
+    """Streaming volume/amount/fraud-rate baselines, anomaly alarms and forecasts over all traffic"""
+
+    def __init__(self, settings=None):
+        self.settings = settings
+        alpha = settings.traffic_smoothing if settings else 0.1
+        self.resolutions = {name: Resolution(name, seconds, buckets, season, alpha)
+                            for name, seconds, buckets, season in RESOLUTIONS}
+        self.alarms = deque(maxlen=settings.traffic_alarm_history if settings else 100)
+        self.events = 0
+        self._lock = threading.Lock()
+
+    @property
+    def threshold(self):
+        return self.settings.traffic_alert_threshold if self.settings else 4.0
+
+    @property
+    def warmup_buckets(self):
+        return self.settings.traffic_warmup_buckets if self.settings else 30
+
+    def observe(self, timestamp, amount, is_fraud=False):
+        """Count one scored transaction"""
+        ms = epoch_ms(timestamp)
+        with self._lock:
+            self.events += 1
+            for resolution in self.resolutions.values():
+                resolution.observe(ms // resolution.width_ms, float(amount), int(bool(is_fraud)), self)
+
+    def advance(self, now):
+        """Close buckets that ended with no traffic (so quiet periods count as quiet)"""
+        ms = epoch_ms(now)
+        with self._lock:
+            for resolution in self.resolutions.values():
+                resolution.advance(ms // resolution.width_ms, self)
+
+    def alarm(self, resolution, bucket, metric, observed, baseline):
+        start_ms = bucket * resolution.width_ms
+        self.alarms.append((start_ms, {
+            'resolution': resolution.name,
+            'metric': metric,
+            'bucket_start': (EPOCH + start_ms * MILLISECOND).isoformat(),
+            'observed': round(observed, 2),
+            'expected': round(baseline.mean, 2),
+            'score': round(baseline.score(observed), 2)
+        }))
+
+    def recent_alarms(self, now, seconds=300):
+        """Alarms for buckets that started within the last seconds, newest first"""
+        cutoff = epoch_ms(now) - seconds * 1000
+        with self._lock:
+            return [alarm for start_ms, alarm in reversed(self.alarms) if start_ms >= cutoff]
+
+    def forecast(self, now, resolution='hour'):
+        """Expected volume, frauds and fraud rate of the current bucket (e.g. this hour)"""
+        self.advance(now)
+        with self._lock:
+            volume, frauds = self.resolutions[resolution].forecast()
+        return {
+            'expected_volume': round(volume, 2),
+            'expected_frauds': round(frauds, 2),
+            'fraud_rate': round(min(1.0, frauds / volume), 4) if volume > 0 else 0,
+            # Chance of at least one fraud, treating frauds as Poisson arrivals
+            'fraud_probability': round(1 - math.exp(-frauds), 4)
+        }
+
+    def status(self, now, limit=10):
+        """Baselines, forecasts and the last limit buckets per resolution, plus recent alarms"""
+        self.advance(now)
+        with self._lock:
+            resolutions = {name: resolution.status(limit) for name, resolution in self.resolutions.items()}
+        return {
+            'events': self.events,
+            'resolutions': resolutions,
+            'alarms': self.recent_alarms(now)
+        }
+
+    def stats(self):
+        with self._lock:
+            return {
+                'events': self.events,
+                'alarms': len(self.alarms),
+                'buckets': {name: resolution.volume.count for name, resolution in self.resolutions.items()}
+            }
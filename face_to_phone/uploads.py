@@ -0,0 +1,112 @@
+"""
+Biometric upload decoding
+Images and audio arrive as base64 (data URLs in JSON) or as raw / multipart
+bodies. Both are decoded and hashed in fixed-size chunks, so an upload costs
+one small buffer instead of several whole-image copies, and oversized
+uploads are rejected before anything is buffered.
+"""
+
+import base64
+import binascii
+import hashlib
+
+CHUNK_SIZE = 64 * 1024
+
+
+class UploadError(ValueError):
+    """Raised for a biometric upload that cannot be read"""
+
+
+class UploadTooLarge(UploadError):
+    """Raised as soon as an upload is known to exceed the size limit"""
+
+    def __init__(self, limit):
+        super().__init__(f"Upload exceeds {limit} bytes")
+        self.limit = limit
+
+
+class Upload:
+    """Digest and size of an uploaded sample (plus its bytes when kept)"""
+
+    __slots__ = ('sha256', 'size', 'data')
+
+    def __init__(self, sha256, size, data=None):
+        self.sha256 = sha256
+        self.size = size
+        self.data = data
+
+
+def encoded_limit(limit):
+    """Longest base64 text that can decode to at most limit bytes"""
+    return (limit + 2) // 3 * 4
+
+
+def read_stream(stream, limit, chunk_size=CHUNK_SIZE, keep=False):
+    """Hash a binary stream chunk by chunk, reusing a single buffer"""
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    kept = bytearray() if keep else None
+    size = 0
+    while True:
+        if hasattr(stream, 'readinto'):
+            count = stream.readinto(view)
+        else:
+            chunk = stream.read(chunk_size)
+            count = len(chunk)
+            view[:count] = chunk
+        if not count:
+            break
+        size += count
+        if size > limit:
+            raise UploadTooLarge(limit)
+        digest.update(view[:count])
+        if keep:
+            kept += view[:count]
+    return Upload(digest.digest(), size, bytes(kept) if keep else None)
+
+
+def decode_base64(text, limit, chunk_size=CHUNK_SIZE, keep=False):
+    """Decode and hash base64 text (or a data URL) chunk by chunk"""
+    # Skip a "data:<mime>;base64," prefix without copying the payload
+    start = text.find(',') + 1 if text.startswith('data:') else 0
+    if text.startswith('data:') and not start:
+        raise UploadError("Malformed data URL (no ',' before the payload)")
+    if len(text) - start > encoded_limit(limit):
+        raise UploadTooLarge(limit)
+
+    digest = hashlib.sha256()
+    kept = bytearray() if keep else None
+    size = 0
+    step = chunk_size // 3 * 4  # whole base64 quanta per chunk
+    try:
+        for offset in range(start, len(text), step):
+            chunk = binascii.a2b_base64(text[offset:offset + step])
+            size += len(chunk)
+            digest.update(chunk)
+            if keep:
+                kept += chunk
+    except binascii.Error:
+        # Whitespace or stray characters break chunk alignment; decode leniently in one go
+        try:
+            data = base64.b64decode(text[start:])
+        except binascii.Error:
+            raise UploadError("Invalid base64 data")
+        return Upload(hashlib.sha256(data).digest(), len(data), data if keep else None)
+
+    if size > limit:
+        raise UploadTooLarge(limit)
+    return Upload(digest.digest(), size, bytes(kept) if keep else None)
+
+
+def read_upload(sample, limit, chunk_size=CHUNK_SIZE, keep=False):
+    """Upload for a sample given as base64 text, raw bytes or an already-read Upload"""
+    if isinstance(sample, Upload):
+        return sample
+    if isinstance(sample, (bytes, bytearray, memoryview)):
+        if len(sample) > limit:
+            raise UploadTooLarge(limit)
+        return Upload(hashlib.sha256(sample).digest(), len(sample), bytes(sample) if keep else None)
+    if isinstance(sample, str):
+        return decode_base64(sample, limit, chunk_size, keep)
+    raise UploadError("Unsupported upload type")
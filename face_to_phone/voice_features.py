@@ -0,0 +1,142 @@
+"""
+Lightweight voice feature extraction (CPU only)
+WAV/PCM clips are resampled to 16 kHz, framed with zero-copy strided views,
+and turned into MFCC-like features (STFT -> mel bands -> log -> DCT). Frames
+are pooled, weighted towards speech over silence, into a fixed-size voice
+embedding. A batch of clips goes through one FFT and one set of matrix
+products.
+
+Target: a real-time factor (processing seconds per second of audio,
+decoding included) of at most REAL_TIME_FACTOR on one CPU core, for 16 kHz
+and 44.1 kHz clips alike. tests/test_voice_features.py checks it; a
+typical core runs at about 0.001.
+"""
+
+import io
+import wave
+
+from face_to_phone.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+SAMPLE_RATE = 16000
+MIN_INPUT_RATE = 8000
+MAX_INPUT_RATE = 48000
+MAX_CLIP_SECONDS = 30  # longer clips are cut, so a header can't make us allocate without bound
+FRAME_LENGTH = 400  # 25 ms
+HOP_LENGTH = 160  # 10 ms
+FFT_SIZE = 512
+MEL_BANDS = 40
+CEPSTRA = 20  # c1..c20, c0 (loudness) is dropped
+EMBEDDING_DIMS = CEPSTRA * 2  # mean and standard deviation of each coefficient
+REAL_TIME_FACTOR = 0.01  # at most 10 ms of CPU per second of audio
+
+_filters = {}
+
+
+def mel_filterbank():
+    """(FFT_SIZE // 2 + 1, MEL_BANDS) triangular mel filters (computed once)"""
+    if 'mel' not in _filters:
+        mel_max = 2595 * np.log10(1 + (SAMPLE_RATE / 2) / 700)
+        hz = 700 * (10 ** (np.linspace(0, mel_max, MEL_BANDS + 2) / 2595) - 1)
+        bins = np.fft.rfftfreq(FFT_SIZE, 1 / SAMPLE_RATE)
+        lower, centre, upper = hz[:-2, None], hz[1:-1, None], hz[2:, None]
+        rising = (bins - lower) / (centre - lower)
+        falling = (upper - bins) / (upper - centre)
+        _filters['mel'] = np.maximum(0, np.minimum(rising, falling)).T.astype(np.float32)
+    return _filters['mel']
+
+
+def cepstral_matrix():
+    """(MEL_BANDS, CEPSTRA) DCT-II basis for c1..c20 (computed once)"""
+    if 'dct' not in _filters:
+        bands = np.arange(MEL_BANDS)[:, None]
+        k = np.arange(1, CEPSTRA + 1)[None, :]
+        _filters['dct'] = np.cos(np.pi * k * (2 * bands + 1) / (2 * MEL_BANDS)).astype(np.float32)
+    return _filters['dct']
+
+
+def pcm_to_float(data, sample_width, channels=1):
+    """Little-endian signed PCM (8-bit unsigned) as mono float32 in [-1, 1]"""
+    if sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 2:
+        samples = np.frombuffer(data, dtype='<i2').astype(np.float32) / 32768
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(raw), 4), dtype=np.uint8)
+        padded[:, 1:] = raw  # 24-bit into the top of a 32-bit int
+        samples = padded.view('<i4').ravel().astype(np.float32) / 2 ** 31
+    elif sample_width == 4:
+        samples = np.frombuffer(data, dtype='<i4').astype(np.float32) / 2 ** 31
+    else:
+        raise ValueError(f"Unsupported sample width {sample_width}")
+    if channels > 1:
+        samples = samples[:len(samples) // channels * channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def decode_audio(data):
+    """16 kHz mono float32 samples of a WAV clip (at most MAX_CLIP_SECONDS)"""
+    try:
+        with wave.open(io.BytesIO(data)) as clip:
+            rate = clip.getframerate()
+            if not MIN_INPUT_RATE <= rate <= MAX_INPUT_RATE:
+                raise ValueError(f"Unsupported sample rate {rate} Hz ({MIN_INPUT_RATE}-{MAX_INPUT_RATE} Hz required)")
+            frame_count = min(clip.getnframes(), MAX_CLIP_SECONDS * rate)
+            samples = pcm_to_float(clip.readframes(frame_count), clip.getsampwidth(), clip.getnchannels())
+    except (wave.Error, EOFError):
+        raise ValueError("Unsupported audio format (PCM WAV required)")
+    if rate != SAMPLE_RATE and len(samples):
+        # Linear resampling is plenty for band energies
+        length = min(len(samples) * SAMPLE_RATE / rate, MAX_CLIP_SECONDS * SAMPLE_RATE)
+        positions = np.arange(0, length) * rate / SAMPLE_RATE
+        samples = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+    if len(samples) < FRAME_LENGTH:
+        raise ValueError("Audio clip too short")
+    return samples
+
+
+def frames(samples):
+    """(n_frames, FRAME_LENGTH) strided view of a clip, no copy"""
+    return np.lib.stride_tricks.sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+
+
+def describe_voices(clips):
+    """Embeddings, durations and quality scores for a list of decoded clips, one row each"""
+    framed = [frames(samples) for samples in clips]
+    counts = np.array([len(clip_frames) for clip_frames in framed])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # One windowed FFT over every frame of every clip
+    windowed = np.concatenate(framed) * np.hanning(FRAME_LENGTH).astype(np.float32)
+    power = np.abs(np.fft.rfft(windowed, n=FFT_SIZE)) ** 2
+    bands = np.log(power.astype(np.float32) @ mel_filterbank() + 1e-6)
+    cepstra = bands @ cepstral_matrix()
+
+    # Weight frames by loudness relative to their clip, so silence barely counts
+    energy = bands.max(axis=1)
+    peak = np.maximum.reduceat(energy, starts)
+    weights = np.clip((energy - np.repeat(peak, counts) + 6) / 6, 0, 1) ** 2 + 1e-3
+    totals = np.add.reduceat(weights, starts)
+    mean = np.add.reduceat(cepstra * weights[:, None], starts) / totals[:, None]
+    square = np.add.reduceat(cepstra ** 2 * weights[:, None], starts) / totals[:, None]
+    std = np.sqrt(np.maximum(square - mean ** 2, 0))
+
+    # Rough SNR: loud frames against quiet frames, in dB (log power, so *10/ln10)
+    floor = np.array([np.percentile(energy[start:start + count], 10) for start, count in zip(starts, counts)])
+    snr_db = (peak - floor) * 10 / np.log(10)
+
+    # Scale c_k by k: the spectral tilt in the first few coefficients is shared by
+    # every voice and would otherwise dominate cosine similarity
+    lifter = np.arange(1, CEPSTRA + 1, dtype=np.float32)
+    return {
+        'embeddings': np.concatenate([mean * lifter, std * lifter], axis=1).astype(np.float32),
+        'duration': np.array([len(samples) / SAMPLE_RATE for samples in clips]),
+        'quality': np.clip(snr_db / 40, 0, 1) * 100
+    }
+
+
+def extract_voice_features(clips):
+    """describe_voices for a batch of encoded WAV clips"""
+    return describe_voices([decode_audio(data) for data in clips])
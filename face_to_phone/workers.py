@@ -0,0 +1,167 @@
+"""
+Bounded worker pools
+Heavy request work (biometric decode, hashing, feature extraction) runs on
+its own pool instead of the Flask request thread. Pools refuse new jobs when
+their queue is full, so a burst of large uploads gets fast 429s rather than
+piling up and starving fraud scoring.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class PoolSaturated(RuntimeError):
+    """Raised when a pool already has max_pending jobs queued or running"""
+
+
+class JobTimeout(RuntimeError):
+    """Raised when a job does not finish within its timeout"""
+
+
+class BoundedPool:
+    """Thread pool with a hard limit on queued + running jobs"""
+
+    def __init__(self, name, workers, max_pending):
+        self.name = name
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def reserve(self):
+        """Claim a queue slot for one job, or raise PoolSaturated"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PoolSaturated(f"{self.name} pool is busy, retry shortly")
+        with self._lock:
+            self.pending += 1
+
+    def release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+        self._slots.release()
+
+    def submit(self, fn, *args):
+        """Queue a job; raises PoolSaturated instead of waiting for room"""
+        self.reserve()
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self.release()
+            raise
+        future.add_done_callback(self.release)
+        return future
+
+    def wait(self, future, timeout=None):
+        """Result of a job, raising JobTimeout after timeout seconds"""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise JobTimeout(f"{self.name} job timed out")
+
+    def run(self, fn, *args, timeout=None):
+        return self.wait(self.submit(fn, *args), timeout)
+
+    def execute(self, fn, *args):
+        """Run on the pool's threads without taking a slot (the caller already holds them)"""
+        return self._executor.submit(fn, *args)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_pending': self.max_pending,
+                'pending': self.pending,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out
+            }
+
+
+class Batcher:
+    """Groups jobs that arrive close together and hands them to a batch handler
+
+    handler(list of args tuples) must return one result per item. A batch is
+    dispatched when it reaches max_batch items or max_wait seconds after its
+    first item, whichever comes first. Each item holds a slot of the pool.
+    """
+
+    def __init__(self, pool, handler, max_batch=8, max_wait=0.005):
+        self.pool = pool
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, *args):
+        """Queue one item; returns a Future for its result"""
+        self.pool.reserve()
+        future = Future()
+        future.add_done_callback(self.pool.release)
+        self._ensure_thread()
+        self._queue.put((args, future))
+        return future
+
+    def run(self, *args, timeout=None):
+        return self.pool.wait(self.submit(*args), timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._dispatch, name=f"{self.pool.name}-batcher",
+                                                    daemon=True)
+                    self._thread.start()
+
+    def _dispatch(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            # Items whose callers already gave up are skipped
+            batch = [(args, future) for args, future in batch if future.set_running_or_notify_cancel()]
+            if batch:
+                self.batches += 1
+                self.items += len(batch)
+                self.pool.execute(self._run_batch, batch)
+
+    def _run_batch(self, batch):
+        try:
+            results = self.handler([args for args, _ in batch])
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'items': self.items,
+            'average_batch': round(self.items / self.batches, 2) if self.batches else 0
+        }
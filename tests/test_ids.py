@@ -0,0 +1,55 @@
+"""
+Multi-process uniqueness, ordering and throughput of face_to_phone.ids
+"""
+
+import os
+import time
+from multiprocessing import Pool
+
+from face_to_phone.ids import IdGenerator, _check_unique, _generate, decode_id, encode_id, id_parts
+
+PROCESSES = 4
+PER_PROCESS = 200000
+# Conservative floor for shared CI runners; a free core does ~500k ids/s
+MIN_IDS_PER_SECOND = 200000
+
+
+def generate(worker_ids):
+    with Pool(len(worker_ids), maxtasksperchild=1) as pool:
+        return pool.map(_generate, [(worker, PER_PROCESS) for worker in worker_ids], chunksize=1)
+
+
+def test_ids_unique_and_sortable_across_processes():
+    results = generate(list(range(PROCESSES)))
+    ids = _check_unique(results, PROCESSES * PER_PROCESS)
+
+    # Text order is numeric order, and numeric order is time order
+    ordered = sorted(ids)
+    assert [decode_id(text) for text in ordered] == sorted(decode_id(text) for text in ids)
+    times = [id_parts(text)[0] for text in ordered]
+    assert times == sorted(times)
+    assert {id_parts(text)[1] for text in ids} == set(range(PROCESSES))
+
+
+def test_derived_worker_ids_unique_across_processes():
+    results = generate([None] * PROCESSES)
+    _check_unique(results, PROCESSES * PER_PROCESS)
+    assert len({worker for _, _, worker in results}) == PROCESSES
+
+
+def test_throughput_across_processes():
+    results = generate(list(range(PROCESSES)))
+    slowest = max(elapsed for _, elapsed, _ in results)
+    # Processes only run in parallel as far as there are cores for them
+    parallel = min(PROCESSES, os.cpu_count() or 1)
+    assert PROCESSES * PER_PROCESS / slowest >= MIN_IDS_PER_SECOND * parallel
+
+
+def test_burst_borrows_milliseconds_instead_of_repeating():
+    generator = IdGenerator(7)
+    started = time.time()
+    values = [generator.next_int() for _ in range(20000)]
+    assert values == sorted(values) and len(set(values)) == len(values)
+    # More than 4096 ids per millisecond may run ahead of the clock, but only by the overflow
+    assert id_parts(encode_id(values[-1]))[0] <= int(time.time() * 1000) + len(values) // 4096 + 1
+    assert id_parts(encode_id(values[0]))[0] >= int(started * 1000) - 1
@@ -0,0 +1,62 @@
+"""
+Real-time factor and input limits of face_to_phone.voice_features
+"""
+
+import io
+import time
+import wave
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from face_to_phone.voice_features import (EMBEDDING_DIMS, MAX_CLIP_SECONDS, REAL_TIME_FACTOR, SAMPLE_RATE,
+                                          decode_audio, extract_voice_features)
+
+
+def wav_clip(seconds, rate=SAMPLE_RATE, seed=0):
+    """16-bit mono WAV of a voiced, amplitude-modulated tone with a little noise"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    signal = 0.3 * np.sin(2 * np.pi * 180 * t) * (1 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    signal += 0.01 * rng.standard_normal(len(t))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as clip:
+        clip.setnchannels(1)
+        clip.setsampwidth(2)
+        clip.setframerate(rate)
+        clip.writeframes((signal * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - started
+
+
+@pytest.mark.parametrize('rate', [SAMPLE_RATE, 44100])
+def test_real_time_factor(rate):
+    clips = [wav_clip(5, rate, seed) for seed in range(8)]
+    audio_seconds = 5 * len(clips)
+    extract_voice_features(clips)  # filter banks are built on first use
+
+    # Best of a few runs, so a busy CI neighbour doesn't fail the check
+    best = min(timed(extract_voice_features, clips) for _ in range(5))
+    assert best / audio_seconds <= REAL_TIME_FACTOR
+
+
+def test_features_shape():
+    features = extract_voice_features([wav_clip(2), wav_clip(3, 44100)])
+    assert features['embeddings'].shape == (2, EMBEDDING_DIMS)
+    assert np.allclose(features['duration'], [2, 3], atol=0.01)
+
+
+def test_long_clips_are_cut():
+    samples = decode_audio(wav_clip(MAX_CLIP_SECONDS + 5, 8000))
+    assert len(samples) == MAX_CLIP_SECONDS * SAMPLE_RATE
+
+
+def test_implausible_sample_rate_rejected():
+    with pytest.raises(ValueError):
+        decode_audio(wav_clip(1, 4000))